@@ -1,14 +1,32 @@
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from video_note_generator import VideoNoteGenerator
 from check_illegal_report import CheckIllegalReport
+from services import get_services
 
 app = FastAPI()
+# 两个实例共用 services 中的客户端注册表（OpenRouter、腾讯云ASR/OCR、Unsplash）
+# 接口都是 async def：腾讯云 ASR/OCR 通过原生异步客户端直接 await，同步的处理步骤在线程中执行
 generator = VideoNoteGenerator()
 checker = CheckIllegalReport()
 
+@app.on_event("startup")
+def prewarm_connections():
+    # 在后台预先建立到常用主机的连接
+    get_services().prewarm()
+
+@app.on_event("shutdown")
+async def close_shared_clients():
+    await get_services().aclose()
+
 class UrlRequest(BaseModel):
     url: str
+    # 转录后端（tencent / whisper / faster-whisper），不填时使用服务配置
+    backend: Optional[str] = None
+    # Whisper 解码配置（fast / balanced / accurate），只对本地 Whisper 后端有效
+    profile: Optional[str] = None
 
 @app.get("/")
 def read_root():
@@ -24,37 +42,39 @@ def read_root():
 #         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/generate_xhs_note_from_audio")
-def generate_xhs_note_from_audio(request: UrlRequest):
+async def generate_xhs_note_from_audio(request: UrlRequest):
     try:
-        result = generator.generate_xhs_note_from_audio(request.url)
+        result = await generator.generate_xhs_note_from_audio_async(request.url, request.backend, request.profile)
         if isinstance(result, dict) and result.get("error"):
             raise HTTPException(status_code=500, detail=result["error"])
         return {
             "note": result["note"],
             "xhs_content": result["xhs_content"],
             "transcript": result["transcript"],
+            "segments": result["segments"],
             "organized_content": result["organized_content"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/generate_wj_note_from_audio")
-def generate_wj_note_from_audio(request: UrlRequest):
+async def generate_wj_note_from_audio(request: UrlRequest):
     try:
-        result = generator.generate_wj_note_from_audio(request.url)
+        result = await generator.generate_wj_note_from_audio_async(request.url, request.backend, request.profile)
         if isinstance(result, dict) and result.get("error"):
             raise HTTPException(status_code=500, detail=result["error"])
         return {
             "transcript": result["transcript"],
+            "segments": result["segments"],
             "checked_content": result["checked_content"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
  
 @app.post("/check_illegal_from_image")
-def generate_report_from_detail(request: UrlRequest):
+async def generate_report_from_detail(request: UrlRequest):
     try:
-        result = checker.generate_report_from_detail(request.url)
+        result = await checker.generate_report_from_detail_async(request.url)
         if isinstance(result, dict) and result.get("error"):
             raise HTTPException(status_code=500, detail=result["error"])
         return {
@@ -0,0 +1,137 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 提取模式
+#   asr    - 按转录后端需要的格式一次性转码（默认）
+#   native - 直接保留平台原始音频流（m4a/opus 等），不做任何转码
+#   mp3    - 旧行为，转码为 MP3
+EXTRACT_MODES = ('asr', 'native', 'mp3')
+
+# 各转录后端需要的音频格式：一次 ffmpeg 转码直接得到 16kHz 单声道
+ASR_AUDIO_TARGETS: Dict[str, Dict] = {
+    # Whisper 内部按 16kHz 单声道处理，FLAC 无损且体积只有 WAV 的一半左右
+    'whisper': {
+        'codec': 'flac',
+        'ext': 'flac',
+        'args': ['-ar', '16000', '-ac', '1'],
+    },
+    # 腾讯云 ASR 支持 ogg-opus，低码率 opus 上传和拉取都更快
+    'tencent': {
+        'codec': 'opus',
+        'ext': 'opus',
+        'args': ['-ar', '16000', '-ac', '1', '-b:a', '32k'],
+    },
+}
+
+# native 模式下优先选择的音频流，以及可能得到的文件扩展名
+NATIVE_AUDIO_FORMAT = 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best'
+NATIVE_AUDIO_EXTS = ('.m4a', '.webm', '.opus', '.ogg', '.mp3', '.aac', '.mp4', '.flv')
+
+
+def resolve_extract_mode(mode: Optional[str] = None) -> str:
+    """确定提取模式，未指定时读取 AUDIO_EXTRACT_MODE 环境变量"""
+    mode = (mode or os.getenv('AUDIO_EXTRACT_MODE', 'asr')).strip().lower()
+    if mode not in EXTRACT_MODES:
+        print(f"⚠️ 未知的音频提取模式 {mode}，将使用 asr")
+        return 'asr'
+    return mode
+
+
+def audio_variant(backend: str, mode: Optional[str] = None) -> str:
+    """返回提取结果的格式标识，用于区分同一视频在不同模式下的缓存"""
+    mode = resolve_extract_mode(mode)
+    return f'asr-{backend}' if mode == 'asr' else mode
+
+
+def build_audio_options(backend: str, mode: Optional[str] = None) -> Tuple[Dict, Tuple[str, ...]]:
+    """生成 yt-dlp 的音频下载/提取选项
+
+    Args:
+        backend: 转录后端 ('tencent' 或 'whisper')
+        mode: 提取模式，见 EXTRACT_MODES
+
+    Returns:
+        Tuple[Dict, Tuple[str, ...]]: (yt-dlp 选项, 可能的输出文件扩展名)
+    """
+    mode = resolve_extract_mode(mode)
+
+    if mode == 'native':
+        return {'format': NATIVE_AUDIO_FORMAT}, NATIVE_AUDIO_EXTS
+
+    if mode == 'mp3':
+        return {
+            'format': 'bestaudio/best',
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+            }],
+        }, ('.mp3',)
+
+    target = ASR_AUDIO_TARGETS.get(backend, ASR_AUDIO_TARGETS['tencent'])
+    return {
+        # 优先只下载音频流，减少下载量
+        'format': NATIVE_AUDIO_FORMAT,
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': target['codec'],
+        }],
+        # 重采样和声道参数与编码在同一次 ffmpeg 调用中完成
+        'postprocessor_args': {'extractaudio': list(target['args'])},
+    }, (f".{target['ext']}",)
+
+
+def find_audio_file(info: Dict, temp_dir: str, extensions: Tuple[str, ...]) -> Optional[str]:
+    """从 yt-dlp 的返回信息中找到最终的音频文件路径，找不到时按扩展名扫描目录"""
+    for download in info.get('requested_downloads') or []:
+        path = download.get('filepath')
+        if path and os.path.exists(path):
+            return path
+
+    candidates: List[str] = [f for f in os.listdir(temp_dir) if f.lower().endswith(extensions)]
+    if not candidates:
+        return None
+    return os.path.join(temp_dir, sorted(candidates)[0])
+
+
+# ffmpeg 中对应的编码器名称
+FFMPEG_ENCODERS = {'flac': 'flac', 'opus': 'libopus', 'mp3': 'libmp3lame'}
+
+
+def asr_output_args(backend: str) -> Tuple[List[str], str]:
+    """转录后端所需格式的 ffmpeg 输出参数和扩展名（用于切分、转码等自行调用 ffmpeg 的场景）"""
+    target = ASR_AUDIO_TARGETS.get(backend, ASR_AUDIO_TARGETS['tencent'])
+    return ['-vn', '-c:a', FFMPEG_ENCODERS[target['codec']], *target['args']], f".{target['ext']}"
+
+
+def extract_audio_file(ffmpeg_path: str, source_path: str, backend: str, mode: Optional[str] = None) -> str:
+    """把备用下载方法得到的视频文件转为与 yt-dlp 提取结果相同格式的音频
+
+    native 模式下直接返回原文件（转录时由 ffmpeg/Whisper 自行解码）。
+
+    Returns:
+        str: 音频文件路径（与源文件在同一目录）
+    """
+    import subprocess
+
+    mode = resolve_extract_mode(mode)
+    if mode == 'native':
+        return source_path
+
+    if mode == 'mp3':
+        codec, ext, args = 'mp3', 'mp3', []
+    else:
+        target = ASR_AUDIO_TARGETS.get(backend, ASR_AUDIO_TARGETS['tencent'])
+        codec, ext, args = target['codec'], target['ext'], list(target['args'])
+
+    audio_path = os.path.splitext(source_path)[0] + f'.{ext}'
+    cmd = [ffmpeg_path, '-y', '-loglevel', 'error', '-i', source_path, '-vn',
+           '-c:a', FFMPEG_ENCODERS[codec], *args, audio_path]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"音频提取失败: {result.stderr.strip()}")
+    return audio_path
@@ -0,0 +1,199 @@
+import os
+import re
+import subprocess
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 每个分段的目标时长（分钟）
+DEFAULT_SEGMENT_MINUTES = 10
+# 在目标切点前后多少比例的范围内寻找静音
+CUT_SEARCH_WINDOW = 0.2
+# 相邻分段之间重叠的秒数，避免切点附近的字被截断；合并时按时间戳去重
+DEFAULT_OVERLAP_SECONDS = 1.0
+# 静音检测参数
+DEFAULT_SILENCE_DB = -35
+DEFAULT_SILENCE_SECONDS = 0.4
+
+DURATION_PATTERN = re.compile(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)')
+SILENCE_START_PATTERN = re.compile(r'silence_start:\s*(-?\d+(?:\.\d+)?)')
+SILENCE_END_PATTERN = re.compile(r'silence_end:\s*(\d+(?:\.\d+)?)')
+
+# 一句带时间戳的转录：(开始秒, 结束秒, 文本)，时间相对于所在的音频文件
+TimedText = Tuple[float, float, str]
+
+
+class AudioSegment:
+    """切分出的一段音频
+
+    start / end 是该分段负责的时间范围（切点），文件实际包含 [file_start, file_end]
+    （即前后各多出 overlap 秒），合并时只保留落在 [start, end) 内的句子。
+    path 可以是切分出的文件，也可以是整段音频（此时按 file_start / file_end 截取）。
+    """
+
+    def __init__(self, path: str, start: float, end: float, file_start: float,
+                 file_end: Optional[float] = None):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.file_start = file_start
+        self.file_end = file_end
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def segment_seconds() -> float:
+    return float(os.getenv('AUDIO_SEGMENT_MINUTES', str(DEFAULT_SEGMENT_MINUTES))) * 60
+
+
+def probe_duration(ffmpeg_path: str, audio_path: str) -> float:
+    """读取音频时长（秒），无法获取时返回 0"""
+    result = subprocess.run([ffmpeg_path, '-hide_banner', '-i', audio_path],
+                            capture_output=True, text=True)
+    match = DURATION_PATTERN.search(result.stderr)
+    if not match:
+        return 0.0
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def detect_silences(ffmpeg_path: str, audio_path: str,
+                    noise_db: Optional[float] = None,
+                    min_silence: Optional[float] = None) -> List[Tuple[float, float]]:
+    """用 ffmpeg 的 silencedetect 找出所有静音区间"""
+    noise_db = noise_db if noise_db is not None else float(os.getenv('SILENCE_NOISE_DB', str(DEFAULT_SILENCE_DB)))
+    min_silence = min_silence or float(os.getenv('SILENCE_MIN_SECONDS', str(DEFAULT_SILENCE_SECONDS)))
+    result = subprocess.run(
+        [ffmpeg_path, '-hide_banner', '-nostats', '-i', audio_path,
+         '-af', f'silencedetect=noise={noise_db}dB:d={min_silence}', '-f', 'null', '-'],
+        capture_output=True, text=True,
+    )
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = SILENCE_START_PATTERN.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END_PATTERN.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def plan_cuts(duration: float, silences: Sequence[Tuple[float, float]], target: float) -> List[float]:
+    """在每个目标切点附近选择最长的静音，返回切点（秒），附近没有静音时直接在目标位置切分"""
+    cuts = []
+    position = 0.0
+    while duration - position > target * (1 + CUT_SEARCH_WINDOW):
+        goal = position + target
+        window = target * CUT_SEARCH_WINDOW
+        candidates = [(end - start, (start + end) / 2) for start, end in silences
+                      if goal - window <= (start + end) / 2 <= goal + window]
+        cut = max(candidates)[1] if candidates else goal
+        cuts.append(cut)
+        position = cut
+    return cuts
+
+
+def plan_segments(audio_path: str, ffmpeg_path: str,
+                  target: Optional[float] = None,
+                  overlap: Optional[float] = None,
+                  duration: float = 0,
+                  silences: Optional[Sequence[Tuple[float, float]]] = None) -> List[AudioSegment]:
+    """在静音处规划分段，不写文件：每个分段的 path 都是原音频，按 file_start / file_end 截取
+
+    参数同 split_at_silence，适合已经解码到内存（或内存映射）的音频直接切片。
+    silences 为已知的静音区间（例如 VAD 的结果），为 None 时用 ffmpeg 检测。
+    """
+    target = target or segment_seconds()
+    if overlap is None:
+        overlap = float(os.getenv('AUDIO_SEGMENT_OVERLAP', str(DEFAULT_OVERLAP_SECONDS)))
+    duration = duration or probe_duration(ffmpeg_path, audio_path)
+    if not duration or duration <= target * (1 + CUT_SEARCH_WINDOW):
+        return [AudioSegment(audio_path, 0.0, duration or float('inf'), 0.0)]
+
+    if silences is None:
+        silences = detect_silences(ffmpeg_path, audio_path)
+    cuts = plan_cuts(duration, silences, target)
+    bounds = [0.0] + cuts + [duration]
+    segments = [AudioSegment(audio_path, start, end, max(0.0, start - overlap), min(duration, end + overlap))
+                for start, end in zip(bounds, bounds[1:])]
+    print(f"✂️ {duration / 60:.0f} 分钟的音频在静音处切分为 {len(segments)} 段")
+    return segments
+
+
+def split_at_silence(audio_path: str, work_dir: str, ffmpeg_path: str,
+                     output_args: Sequence[str], ext: str,
+                     target: Optional[float] = None,
+                     overlap: Optional[float] = None,
+                     duration: float = 0) -> List[AudioSegment]:
+    """在静音处把长音频切分为若干分段文件
+
+    Args:
+        audio_path: 音频文件
+        work_dir: 分段文件的输出目录
+        ffmpeg_path: ffmpeg 路径
+        output_args: 分段文件的编码参数（与转录后端需要的格式一致）
+        ext: 分段文件的扩展名
+        target: 每段的目标秒数，默认 AUDIO_SEGMENT_MINUTES 分钟
+        overlap: 相邻分段重叠的秒数，默认 AUDIO_SEGMENT_OVERLAP
+        duration: 音频时长，未知时用 ffmpeg 读取
+
+    Returns:
+        List[AudioSegment]: 按时间顺序排列的分段；音频不够长时只有一段（原文件）
+    """
+    segments = plan_segments(audio_path, ffmpeg_path, target, overlap, duration)
+    if len(segments) == 1:
+        return segments
+
+    for index, segment in enumerate(segments):
+        path = os.path.join(work_dir, f'segment_{index:03d}{ext}')
+        result = subprocess.run(
+            [ffmpeg_path, '-y', '-loglevel', 'error',
+             '-ss', f'{segment.file_start:.3f}', '-to', f'{segment.file_end:.3f}',
+             '-i', audio_path, *output_args, path],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"音频切分失败: {result.stderr.strip()}")
+        segment.path = path
+    return segments
+
+
+def merge_timed_texts(segments: Sequence[AudioSegment], results: Sequence[List[TimedText]]) -> List[TimedText]:
+    """按顺序合并各分段的带时间戳转录，时间换算为整段音频的时间
+
+    重叠区域会被相邻两段都识别到，每句只保留在其中点所属的分段中，从而去掉边界处的重复。
+    """
+    merged = []
+    for segment, sentences in zip(segments, results):
+        for start, end, text in sentences:
+            start, end = start + segment.file_start, end + segment.file_start
+            middle = (start + end) / 2
+            if segment.start <= middle < segment.end:
+                merged.append((start, end, text))
+    return merged
+
+
+def transcribe_segments(segments: Sequence[AudioSegment],
+                        transcribe: Callable[[AudioSegment], List[TimedText]],
+                        executor=None) -> List[TimedText]:
+    """并发转录所有分段并按顺序合并
+
+    Args:
+        segments: split_at_silence 的结果
+        transcribe: 转录一个分段的函数，返回相对于分段文件的带时间戳句子
+        executor: 执行转录的线程池/进程池，为 None 时依次转录
+    """
+    if executor is None or len(segments) == 1:
+        results = [transcribe(segment) for segment in segments]
+    else:
+        results = list(executor.map(transcribe, segments))
+    return merge_timed_texts(segments, results)
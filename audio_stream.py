@@ -0,0 +1,101 @@
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# Whisper 固定使用 16kHz 单声道
+SAMPLE_RATE = 16000
+
+# 每次从网络读取并写入 ffmpeg 的字节数
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class AudioStreamError(Exception):
+    """ffmpeg 无法从管道解码音频（例如索引在文件末尾的 mp4）"""
+    pass
+
+
+def stream_pcm(client, url: str, ffmpeg_path: str,
+               sample_rate: int = SAMPLE_RATE,
+               headers: Optional[Dict[str, str]] = None,
+               chunk_size: Optional[int] = None):
+    """边下载边解码：把 HTTP 响应直接写入 ffmpeg 的标准输入，输出 16kHz 单声道 PCM
+
+    网络传输和解码同时进行，不产生临时文件，也不需要额外的下载进程。
+
+    Args:
+        client: httpx.Client（通常是 services.http）
+        url: 音频/视频地址
+        ffmpeg_path: ffmpeg 可执行文件路径
+        sample_rate: 输出采样率
+        headers: 额外的请求头
+        chunk_size: 每次读取的字节数，默认 AUDIO_STREAM_CHUNK_SIZE 或 256KiB
+
+    Returns:
+        np.ndarray: float32 音频采样（范围 -1 ~ 1），可以直接传给 whisper 的 transcribe
+
+    Raises:
+        AudioStreamError: ffmpeg 解码失败
+        httpx.HTTPError: 下载失败
+    """
+    import numpy as np
+
+    chunk_size = chunk_size or int(os.getenv('AUDIO_STREAM_CHUNK_SIZE', str(STREAM_CHUNK_SIZE)))
+    start = time.time()
+    process = subprocess.Popen(
+        [ffmpeg_path, '-loglevel', 'error', '-i', 'pipe:0',
+         '-vn', '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+
+    errors: List[Exception] = []
+    received = [0]
+    stderr_output: List[bytes] = []
+
+    def feed() -> None:
+        try:
+            with client.stream('GET', url, headers=headers) as response:
+                response.raise_for_status()
+                for chunk in response.iter_bytes(chunk_size):
+                    received[0] += len(chunk)
+                    process.stdin.write(chunk)
+        except BrokenPipeError:
+            # ffmpeg 已经退出（解码失败），错误信息从 stderr 获取
+            pass
+        except Exception as e:
+            errors.append(e)
+            process.kill()
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    # stderr 在单独的线程中读取，避免管道写满后 ffmpeg 阻塞
+    feeder = threading.Thread(target=feed, name='audio-stream-feed', daemon=True)
+    drainer = threading.Thread(target=lambda: stderr_output.append(process.stderr.read()),
+                               name='audio-stream-stderr', daemon=True)
+    feeder.start()
+    drainer.start()
+
+    pcm = process.stdout.read()
+    process.wait()
+    feeder.join()
+    drainer.join()
+
+    if errors:
+        raise errors[0]
+    if process.returncode != 0 or not pcm:
+        message = b''.join(stderr_output).decode('utf-8', errors='replace').strip()
+        raise AudioStreamError(f"ffmpeg 解码失败: {message or '没有输出音频'}")
+
+    audio = np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+    print(f"✅ 已流式下载并解码 {len(audio) / sample_rate:.0f} 秒音频"
+          f"（{received[0] / 1024 / 1024:.1f}MB，用时 {time.time() - start:.1f} 秒）")
+    return audio
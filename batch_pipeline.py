@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# 流水线阶段：下载（含字幕）→ 转录 → AI整理和生成笔记
+STAGES = ('download', 'transcribe', 'llm')
+
+
+class JobResult:
+    """单个URL的处理结果"""
+
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.url = url
+        self.files: List[str] = []
+        self.error: Optional[str] = None
+        self.stage_times: Dict[str, float] = {}
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.files)
+
+
+class StageLimits:
+    """每个阶段独立的并发上限"""
+
+    def __init__(self, download: int, transcribe: int, llm: int):
+        self.limits = {'download': download, 'transcribe': transcribe, 'llm': llm}
+        self._semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+
+    def gate(self, result: JobResult):
+        """返回传给 process_video 的阶段闸门，进入阶段时占用该阶段的一个名额并记录耗时"""
+
+        @contextmanager
+        def stage(name: str) -> Iterator[None]:
+            semaphore = self._semaphores[name]
+            with semaphore:
+                start = time.time()
+                try:
+                    yield
+                finally:
+                    result.stage_times[name] = result.stage_times.get(name, 0.0) + time.time() - start
+
+        return stage
+
+
+def run_batch(generator, urls: List[str], workers: int = 1,
+              download_workers: Optional[int] = None,
+              transcribe_workers: Optional[int] = None,
+              llm_workers: Optional[int] = None) -> List[JobResult]:
+    """并发处理多个视频链接
+
+    每个URL在自己的线程中依次经过下载、转录、AI整理三个阶段，各阶段有独立的并发上限，
+    因此第N+1个视频下载的同时，第N个视频在转录、第N-1个视频在调用AI。
+
+    Args:
+        generator: VideoNoteGenerator 实例（线程安全，可共享）
+        urls: 视频链接列表
+        workers: 同时在流水线中的视频数量
+        download_workers / transcribe_workers / llm_workers: 各阶段的并发上限，默认等于 workers
+    """
+    workers = max(1, workers)
+    limits = StageLimits(
+        download=download_workers or workers,
+        transcribe=transcribe_workers or workers,
+        llm=llm_workers or workers,
+    )
+    results = [JobResult(i, url) for i, url in enumerate(urls, 1)]
+
+    def run(result: JobResult) -> JobResult:
+        print(f"\n处理第 {result.index}/{len(urls)} 个URL: {result.url}")
+        start = time.time()
+        try:
+            result.files = generator.process_video(result.url, stage_gate=limits.gate(result))
+            if not result.files:
+                result.error = "未生成笔记"
+        except Exception as e:
+            result.error = str(e)
+            print(f"⚠️ 处理URL时出错：{str(e)}")
+        result.elapsed = time.time() - start
+        return result
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='video-job') as executor:
+        list(executor.map(run, results))
+    print_summary(results, time.time() - start, limits)
+    return results
+
+
+def print_summary(results: List[JobResult], elapsed: float, limits: Optional[StageLimits] = None) -> None:
+    """打印每个URL的结果和整体吞吐量"""
+    print("\n=== 批量处理结果 ===")
+    for result in results:
+        stages = ' '.join(f"{name}={result.stage_times[name]:.0f}s" for name in STAGES if name in result.stage_times)
+        if result.ok:
+            print(f"✅ {result.index}. {result.url}（{result.elapsed:.0f}秒 {stages}）")
+        else:
+            print(f"❌ {result.index}. {result.url}（{result.elapsed:.0f}秒 {stages}）: {result.error}")
+
+    succeeded = sum(1 for result in results if result.ok)
+    print(f"\n成功 {succeeded}/{len(results)}，总耗时 {elapsed:.0f} 秒")
+    if elapsed > 0:
+        print(f"吞吐量: {succeeded / elapsed * 3600:.1f} 个视频/小时")
+    if limits:
+        print("阶段并发上限: " + ', '.join(f"{name}={limit}" for name, limit in limits.limits.items()))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准测试
+
+在全新的子进程中用 `python -X importtime` 导入各入口模块，
+按顶层包汇总导入耗时，并与下方的预算比较。超出预算时返回非零退出码，
+可以直接放进 CI。
+
+用法：
+    python bench_startup.py                 # 测试所有入口模块
+    python bench_startup.py api_server      # 只测试指定模块
+    python bench_startup.py --top 15        # 显示耗时最多的前15个包
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# 各入口模块的导入耗时预算（毫秒）。
+# 重量级依赖（yt_dlp、whisper/torch、tencentcloud、openai）按需导入后，
+# 导入入口模块只应加载标准库、dotenv 和本项目的轻量模块。
+IMPORT_BUDGET_MS = {
+    'services': 150,
+    'video_note_generator': 300,
+    'video_note_generator_whisper': 300,
+    'check_illegal_report': 300,
+    'api_server': 1500,  # 包含 fastapi/pydantic
+}
+
+# 每个模块重复测量的次数，取中位数
+DEFAULT_RUNS = 3
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, float]]:
+    """在子进程中导入模块，返回 (总耗时ms, 各顶层包自身导入耗时之和ms)"""
+    env = dict(os.environ)
+    env.pop('PYTHONSTARTUP', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''
+        raise RuntimeError(f"导入 {module} 失败: {last_line}")
+
+    packages: Dict[str, float] = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        # 格式: "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        name = name.strip()
+        # 按顶层包汇总各模块自身的导入耗时
+        top_level = name.split('.')[0]
+        packages[top_level] = packages.get(top_level, 0.0) + int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, packages
+
+
+def median(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='入口模块启动耗时基准测试')
+    parser.add_argument('modules', nargs='*', help='要测试的模块，默认测试所有有预算的模块')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='每个模块的测量次数')
+    parser.add_argument('--top', type=int, default=10, help='显示耗时最多的前N个顶层包')
+    args = parser.parse_args()
+
+    modules = args.modules or list(IMPORT_BUDGET_MS)
+    over_budget = []
+
+    for module in modules:
+        print(f"\n=== {module} ===")
+        try:
+            runs = [measure_import(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"⚠️ {str(e)}")
+            over_budget.append(module)
+            continue
+
+        total = median([run[0] for run in runs])
+        # 使用总耗时为中位数的那次测量的分包明细
+        _, packages = min(runs, key=lambda run: abs(run[0] - total))
+        for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {name:<40} {ms:>9.1f} ms")
+
+        budget = IMPORT_BUDGET_MS.get(module)
+        if budget is None:
+            print(f"总耗时: {total:.1f} ms（未设置预算）")
+        elif total > budget:
+            print(f"❌ 总耗时: {total:.1f} ms，超出预算 {budget} ms")
+            over_budget.append(module)
+        else:
+            print(f"✅ 总耗时: {total:.1f} ms（预算 {budget} ms）")
+
+    if over_budget:
+        print(f"\n❌ 以下模块超出启动预算或导入失败: {', '.join(over_budget)}")
+        sys.exit(1)
+    print("\n✅ 所有模块均在启动预算内")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Whisper 解码配置基准测试
+
+用每个解码配置（fast / balanced / accurate）转录测试音频，报告实时率（RTF = 转录耗时 / 音频时长，
+越小越快）和字错误率（CER）。测试音频旁边有同名 .txt 参考文本时与参考文本比较；
+没有参考文本时以 accurate 配置的输出作为参考（CER 代理指标，只反映与最慢配置的差距）。
+
+测试音频目录默认为 fixtures/asr，其中附带了几段参考文本（*.txt）。没有对应音频的参考文本会先用本机的
+语音合成程序（espeak-ng / espeak / macOS say）生成音频，因此不需要另外准备音频就能运行。
+也可以放入任意 ffmpeg 能解码的真实录音，真实录音更能反映实际的准确率：
+    fixtures/asr/lecture.m4a
+    fixtures/asr/lecture.txt    # 可选，人工校对的文本
+
+用法：
+    python bench_transcribe.py                                  # 测试所有配置
+    python bench_transcribe.py --backend faster-whisper         # 测试 int8 引擎
+    python bench_transcribe.py fixtures/asr/lecture.m4a --profiles fast,balanced
+    python bench_transcribe.py --json results.json              # 同时保存结果
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from pcm_cache import SAMPLE_RATE, decode_pcm, load_pcm
+from services import get_services
+from transcription import get_backend
+from whisper_models import DECODING_PROFILES
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'asr')
+AUDIO_EXTS = ('.wav', '.aiff', '.flac', '.mp3', '.m4a', '.opus', '.ogg', '.webm', '.mp4')
+
+# 为参考文本合成语音时依次尝试的程序：(程序名, 参数, 输出扩展名)，{output} 为不含扩展名的输出路径
+TTS_COMMANDS = [
+    ('espeak-ng', ['-v', 'cmn', '-s', '150', '-w', '{output}.wav', '{text}'], '.wav'),
+    ('espeak', ['-v', 'zh', '-s', '150', '-w', '{output}.wav', '{text}'], '.wav'),
+    ('say', ['-v', 'Tingting', '-o', '{output}.aiff', '{text}'], '.aiff'),
+]
+
+# 计算 CER 前去掉的字符：空白和中英文标点
+IGNORED_CHARS = re.compile(r'[\s\.,!?;:"\'()\[\]，。！？；：、“”‘’（）《》…—-]+')
+
+
+def normalize(text: str) -> str:
+    return IGNORED_CHARS.sub('', text).lower()
+
+
+def edit_distance(reference: str, hypothesis: str) -> int:
+    """字符级编辑距离（只保留一行动态规划表）"""
+    if len(reference) < len(hypothesis):
+        reference, hypothesis = hypothesis, reference
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_char != hyp_char)))
+        previous = current
+    return previous[-1]
+
+
+def cer(reference: str, hypothesis: str) -> float:
+    reference, hypothesis = normalize(reference), normalize(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    return edit_distance(reference, hypothesis) / len(reference)
+
+
+def synthesize_fixtures(fixture_dir: str) -> int:
+    """为只有参考文本、没有音频的测试用例合成语音，返回合成的数量"""
+    names = os.listdir(fixture_dir)
+    audio_bases = {os.path.splitext(name)[0] for name in names if name.lower().endswith(AUDIO_EXTS)}
+    missing = sorted(os.path.splitext(name)[0] for name in names
+                     if name.endswith('.txt') and os.path.splitext(name)[0] not in audio_bases)
+    if not missing:
+        return 0
+
+    tts = next(((program, args, ext) for program, args, ext in TTS_COMMANDS if shutil.which(program)), None)
+    if tts is None:
+        print("⚠️ 没有可用的语音合成程序（espeak-ng / espeak / say），无法为参考文本生成测试音频")
+        return 0
+
+    program, args, ext = tts
+    count = 0
+    for base in missing:
+        output = os.path.join(fixture_dir, base)
+        text = read_reference(output + ext)
+        command = [program] + [text if arg == '{text}' else arg.replace('{output}', output) for arg in args]
+        try:
+            subprocess.run(command, check=True, capture_output=True, timeout=120)
+            count += 1
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️ 用 {program} 合成 {base} 失败: {str(e)}")
+    if count:
+        print(f"🔊 已用 {program} 为 {count} 段参考文本合成测试音频")
+    return count
+
+
+def find_fixtures(paths: List[str]) -> List[str]:
+    fixtures = []
+    for path in paths:
+        if os.path.isdir(path):
+            fixtures.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                            if name.lower().endswith(AUDIO_EXTS))
+        elif os.path.isfile(path):
+            fixtures.append(path)
+        else:
+            print(f"⚠️ 找不到测试音频: {path}")
+    return fixtures
+
+
+def read_reference(audio_path: str) -> Optional[str]:
+    reference_path = os.path.splitext(audio_path)[0] + '.txt'
+    if not os.path.exists(reference_path):
+        return None
+    with open(reference_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def run_benchmark(backend_name: str, fixtures: List[str], profiles: List[str]) -> List[Dict]:
+    """依次用每个配置转录每个测试音频，返回每次转录的结果"""
+    backend = get_backend(backend_name)
+    ffmpeg_path = get_services().ffmpeg_path
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench_transcribe_') as work_dir:
+        # 先解码并加载模型，不计入转录耗时；测试期间一直持有模型，避免被空闲卸载
+        durations = {path: len(load_pcm(decode_pcm(ffmpeg_path, path, work_dir))) / SAMPLE_RATE
+                     for path in fixtures}
+        with backend.models.acquire():
+            for profile in profiles:
+                for path in fixtures:
+                    start = time.perf_counter()
+                    transcript = backend.transcribe(path, work_dir, profile)
+                    elapsed = time.perf_counter() - start
+                    results.append({
+                        'profile': profile,
+                        'fixture': os.path.basename(path),
+                        'path': path,
+                        'audio_seconds': round(durations[path], 2),
+                        'seconds': round(elapsed, 2),
+                        'rtf': round(elapsed / durations[path], 4) if durations[path] else None,
+                        'text': transcript.text,
+                    })
+
+    # 计算 CER：优先使用人工参考文本，否则以 accurate 的输出为参考
+    accurate = {result['path']: result['text'] for result in results if result['profile'] == 'accurate'}
+    for result in results:
+        reference = read_reference(result['path'])
+        result['reference'] = 'text' if reference is not None else ('accurate' if result['path'] in accurate else None)
+        if reference is None:
+            reference = accurate.get(result['path'])
+        result['cer'] = round(cer(reference, result['text']), 4) if reference is not None else None
+    return results
+
+
+def summarize(results: List[Dict], profiles: List[str]) -> List[Dict]:
+    """按配置汇总：总耗时 / 总音频时长得到整体 RTF，CER 按音频时长加权平均"""
+    summary = []
+    for profile in profiles:
+        rows = [result for result in results if result['profile'] == profile]
+        audio_seconds = sum(row['audio_seconds'] for row in rows)
+        seconds = sum(row['seconds'] for row in rows)
+        scored = [row for row in rows if row['cer'] is not None]
+        scored_seconds = sum(row['audio_seconds'] for row in scored)
+        summary.append({
+            'profile': profile,
+            'audio_seconds': round(audio_seconds, 1),
+            'seconds': round(seconds, 1),
+            'rtf': round(seconds / audio_seconds, 4) if audio_seconds else None,
+            'cer': round(sum(row['cer'] * row['audio_seconds'] for row in scored) / scored_seconds, 4)
+            if scored_seconds else None,
+        })
+    return summary
+
+
+def print_report(backend_name: str, results: List[Dict], summary: List[Dict]) -> None:
+    def fmt(value, pattern):
+        return pattern.format(value) if value is not None else '-'
+
+    print(f"\n=== 解码配置基准测试（{backend_name}）===")
+    print(f"{'配置':<10}{'音频':<28}{'时长(s)':>9}{'耗时(s)':>9}{'RTF':>8}{'CER':>8}  参考")
+    for row in results:
+        print(f"{row['profile']:<10}{row['fixture'][:26]:<28}{row['audio_seconds']:>9.1f}{row['seconds']:>9.1f}"
+              f"{fmt(row['rtf'], '{:.3f}'):>8}{fmt(row['cer'], '{:.2%}'):>8}  {row['reference'] or '-'}")
+
+    print("\n汇总：")
+    for row in summary:
+        print(f"  {row['profile']:<10} RTF {fmt(row['rtf'], '{:.3f}'):>7}   CER {fmt(row['cer'], '{:.2%}'):>7}"
+              f"   （{row['audio_seconds']:.0f} 秒音频，用时 {row['seconds']:.0f} 秒）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Whisper 解码配置的实时率与字错误率基准测试')
+    parser.add_argument('paths', nargs='*', default=[DEFAULT_FIXTURE_DIR], help='测试音频文件或目录，默认 fixtures/asr')
+    parser.add_argument('--backend', default='whisper', choices=['whisper', 'faster-whisper'], help='本地转录后端')
+    parser.add_argument('--profiles', default=','.join(DECODING_PROFILES), help='要测试的解码配置，逗号分隔')
+    parser.add_argument('--json', help='把详细结果保存为 JSON 文件')
+    args = parser.parse_args()
+
+    profiles = [profile.strip() for profile in args.profiles.split(',') if profile.strip()]
+    unknown = [profile for profile in profiles if profile not in DECODING_PROFILES]
+    if unknown:
+        parser.error(f"未知的解码配置: {', '.join(unknown)}")
+    if not get_services().ffmpeg_path:
+        print("❌ 未找到 ffmpeg")
+        sys.exit(1)
+
+    for path in args.paths:
+        if os.path.isdir(path):
+            synthesize_fixtures(path)
+    fixtures = find_fixtures(args.paths)
+    if not fixtures:
+        print("❌ 没有测试音频：请安装 espeak-ng 以合成附带的参考文本，或把音频（及可选的同名 .txt 参考文本）放入 fixtures/asr")
+        sys.exit(1)
+
+    results = run_benchmark(args.backend, fixtures, profiles)
+    summary = summarize(results, profiles)
+    print_report(args.backend, results, summary)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'backend': args.backend, 'summary': summary, 'results': results}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"\n✅ 详细结果已保存至: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 import json
@@ -6,13 +7,9 @@ import subprocess
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
-import openai
 
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
-from tencentcloud.ocr.v20181119 import ocr_client, models
+# openai 和 tencentcloud SDK 在使用处按需导入，避免拖慢启动
+from services import get_services
 
 # 加载环境变量
 load_dotenv()
@@ -41,43 +38,38 @@ if missing_env_vars:
 import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
-# OpenRouter configuration
-openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
-openrouter_app_name = os.getenv('OPENROUTER_APP_NAME', 'video-note')
-openrouter_http_referer = os.getenv('OPENROUTER_HTTP_REFERER', 'https://github.com')
-openrouter_available = False
-
-# 配置 OpenAI API
-client = openai.OpenAI(
-    api_key=openrouter_api_key,
-    base_url="https://openrouter.ai/api/v1",
-    default_headers={
-        "HTTP-Referer": openrouter_http_referer,
-        "X-Title": openrouter_app_name,
-    }
-)
+# OpenRouter 客户端延迟初始化，导入时不做连接测试
+services = get_services()
 
 # 选择要使用的模型
 AI_MODEL = "deepseek/deepseek-chat-v3-0324:free"
 
-# Test OpenRouter connection
-if openrouter_api_key:
-    try:
-        print(f"正在测试 OpenRouter API 连接...")
-        response = client.models.list()  # 使用更简单的API调用来测试连接
-        print("✅ OpenRouter API 连接测试成功")
-        openrouter_available = True
-    except Exception as e:
-        print(f"⚠️ OpenRouter API 连接测试失败: {str(e)}")
-        print("将继续尝试使用API，但可能会遇到问题")
+# 兼容旧的模块级全局变量，实际值由服务层在首次访问时提供
+_LAZY_GLOBALS = {
+    'client': 'openrouter_client',
+    'openrouter_available': 'openrouter_available',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_GLOBALS:
+        return getattr(services, _LAZY_GLOBALS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class CheckIllegalReport:
     def __init__(self, output_dir: str = "temp_pics"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-        
-        self.openrouter_available = openrouter_available
-        
+
+    @property
+    def openrouter_client(self):
+        """OpenRouter 客户端（首次使用时创建）"""
+        return services.openrouter_client
+
+    @property
+    def openrouter_available(self) -> bool:
+        """OpenRouter 是否可用（首次使用时探测并缓存）"""
+        return services.openrouter_available
 
     def _determine_platform(self, url: str) -> Optional[str]:
         """
@@ -296,7 +288,7 @@ class CheckIllegalReport:
 {content}"""
 
             # 调用API
-            response = client.chat.completions.create(
+            response = self.openrouter_client.chat.completions.create(
                 model=AI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -327,20 +319,38 @@ class CheckIllegalReport:
         checked_content = self._check_content(transcript)
         return {"transcript": transcript, "checked_content": checked_content}
 
+    async def generate_report_from_detail_async(self, url: str) -> dict:
+        """
+        generate_report_from_detail 的异步版本：OCR 直接 await 原生异步客户端，识别失败时抛出异常；
+        内容检查（同步的 OpenRouter 调用）在线程中执行
+        """
+        transcript = await recognize_text_from_image_async(url, os.getenv("SECRET_ID"), os.getenv("SECRET_KEY"))
+        if not transcript:
+            return {"error": "图片识别失败"}
+
+        checked_content = await asyncio.to_thread(self._check_content, transcript)
+        return {"transcript": transcript, "checked_content": checked_content}
+
+async def recognize_text_from_image_async(image_url, secret_id, secret_key, region="ap-shanghai"):
+    """
+    recognize_text_from_image 的异步版本，使用原生异步客户端（不经过线程池）。
+    与同步版本不同，接口调用失败时抛出 TencentCloudError（或 httpx 的网络异常），由调用方处理。
+    """
+    client = services.tencent_async_client(secret_id, secret_key, region)
+    resp = await client.general_fast_ocr(image_url=image_url)
+    return json.dumps(resp, ensure_ascii=False)
+
+
 def recognize_text_from_image(image_url, secret_id, secret_key, region="ap-shanghai"):
     """
     使用腾讯云OCR的API识别文字。
     """
+    # 按需加载腾讯云SDK
+    from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+    from tencentcloud.ocr.v20181119 import models
+
     try:
-        cred = credential.Credential(
-            secret_id,
-            secret_key)
-        httpProfile = HttpProfile()
-        httpProfile.endpoint = "ocr.tencentcloudapi.com"
-
-        clientProfile = ClientProfile()
-        clientProfile.httpProfile = httpProfile
-        client = ocr_client.OcrClient(cred, region, clientProfile)
+        client = services.tencent_ocr_client(secret_id, secret_key, region)
 
         req = models.GeneralFastOCRRequest()
         req.ImageUrl = image_url
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""检查下载错误分类（retry_policy.classify_download_error）
+
+用一组典型的 yt-dlp / httpx 错误信息逐条核对分类结果，不访问网络。
+
+用法: python check_retry_policy.py
+"""
+import socket
+import sys
+
+from retry_policy import BLOCKED, PERMANENT, TRANSIENT, UNKNOWN, classify_download_error
+
+# (错误, 期望的分类)
+CASES = [
+    (Exception('ERROR: Unable to download webpage: HTTP Error 503: Service Unavailable'), TRANSIENT),
+    (Exception('HTTP Error 502: Bad Gateway'), TRANSIENT),
+    (Exception('Temporarily unavailable, try again later'), TRANSIENT),
+    (Exception('ERROR: [youtube] abc: Unable to download API page: <urlopen error timed out>'), TRANSIENT),
+    (Exception('ERROR: [SSL: UNEXPECTED_EOF_WHILE_READING] EOF occurred in violation of protocol'), TRANSIENT),
+    (Exception('Connection reset by peer'), TRANSIENT),
+    (socket.timeout('read timed out'), TRANSIENT),
+    (ConnectionError('peer closed connection'), TRANSIENT),
+    (Exception('ERROR: [youtube] abc: Video unavailable'), PERMANENT),
+    (Exception('ERROR: [youtube] abc: This video is not available'), PERMANENT),
+    (Exception('ERROR: [youtube] abc: Private video. Sign in if you\'ve been granted access to this video'), PERMANENT),
+    (Exception('HTTP Error 404: Not Found'), PERMANENT),
+    (Exception('HTTP Error 410: Gone'), PERMANENT),
+    (Exception('ERROR: Unsupported URL: https://example.com/'), PERMANENT),
+    (Exception('视频不存在或已删除'), PERMANENT),
+    (Exception('HTTP Error 429: Too Many Requests'), BLOCKED),
+    (Exception('HTTP Error 403: Forbidden'), BLOCKED),
+    (Exception('ERROR: [youtube] abc: Sign in to confirm you\'re not a bot. Use --cookies'), BLOCKED),
+    (Exception('something odd happened'), UNKNOWN),
+]
+
+
+def main():
+    print("=== 下载错误分类检查 ===")
+    failures = 0
+    for error, expected in CASES:
+        actual = classify_download_error(error)
+        if actual == expected:
+            print(f"✅ {expected:<10} {error}")
+        else:
+            failures += 1
+            print(f"❌ 期望 {expected}，实际 {actual}: {error}")
+    print(f"\n{len(CASES) - failures}/{len(CASES)} 通过")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
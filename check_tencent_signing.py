@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""用本地模拟服务检查腾讯云原生异步客户端的 TC3 签名
+
+模拟服务按腾讯云文档独立地重新计算签名，签名不一致时返回 AuthFailure.SignatureFailure，
+一致时返回 CreateRecTask / DescribeTaskStatus / GeneralFastOCR 的模拟结果。不会访问腾讯云。
+
+用法: python check_tencent_signing.py
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tencent_cloud import AsyncTencentCloudClient, TencentCloudError
+
+SECRET_ID = 'AKIDlocalcheck'
+SECRET_KEY = 'local-check-secret-key'
+
+MOCK_RESPONSES = {
+    'CreateRecTask': {'Data': {'TaskId': 1234}},
+    'DescribeTaskStatus': {'Data': {'TaskId': 1234, 'StatusStr': 'success', 'Result': '你好世界'}},
+    'GeneralFastOCR': {'TextDetections': [{'DetectedText': '本地测试', 'Confidence': 99}]},
+}
+
+
+def expected_authorization(headers, body: bytes, service: str, secret_key: str) -> str:
+    """按腾讯云文档（签名方法 v3）计算服务端期望的 Authorization"""
+    timestamp = int(headers['X-TC-Timestamp'])
+    date = time.strftime('%Y-%m-%d', time.gmtime(timestamp))
+    canonical_request = (
+        "POST\n/\n\n"
+        f"content-type:{headers['Content-Type']}\n"
+        f"host:{headers['Host']}\n"
+        f"x-tc-action:{headers['X-TC-Action'].lower()}\n\n"
+        "content-type;host;x-tc-action\n"
+        f"{hashlib.sha256(body).hexdigest()}"
+    )
+    scope = f"{date}/{service}/tc3_request"
+    string_to_sign = (f"TC3-HMAC-SHA256\n{timestamp}\n{scope}\n"
+                      f"{hashlib.sha256(canonical_request.encode()).hexdigest()}")
+
+    def sign(key: bytes, msg: str) -> bytes:
+        return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+    signing_key = sign(sign(sign(('TC3' + secret_key).encode(), date), service), 'tc3_request')
+    signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return (f"TC3-HMAC-SHA256 Credential={SECRET_ID}/{scope}, "
+            f"SignedHeaders=content-type;host;x-tc-action, Signature={signature}")
+
+
+class MockTencentCloud(BaseHTTPRequestHandler):
+    """模拟腾讯云接口，服务器的 service 属性为产品名（asr/ocr）"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        headers = {key: self.headers[key] for key in
+                   ('Host', 'Content-Type', 'X-TC-Action', 'X-TC-Timestamp')}
+        action = headers['X-TC-Action']
+
+        if self.headers.get('Authorization') != expected_authorization(headers, body, self.server.service, SECRET_KEY):
+            response = {'Error': {'Code': 'AuthFailure.SignatureFailure', 'Message': '签名不一致'}}
+        elif action not in MOCK_RESPONSES:
+            response = {'Error': {'Code': 'InvalidAction', 'Message': action}}
+        else:
+            response = dict(MOCK_RESPONSES[action], Params=json.loads(body))
+        response['RequestId'] = 'local-check'
+
+        data = json.dumps({'Response': response}, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(service: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockTencentCloud)
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_checks() -> bool:
+    import httpx
+
+    servers = {service: start_server(service) for service in ('asr', 'ocr')}
+    endpoints = {service: f"http://127.0.0.1:{server.server_address[1]}" for service, server in servers.items()}
+    passed = True
+
+    async with httpx.AsyncClient() as http:
+        client = AsyncTencentCloudClient(SECRET_ID, SECRET_KEY, http=http, endpoints=endpoints)
+        try:
+            task_id = await client.create_rec_task('https://example.com/audio.opus')
+            # 内联上传的请求体包含 base64 音频，同样需要签名一致
+            inline_id = await client.create_rec_task(audio_data=b'local audio bytes')
+            data = await client.describe_task_status(task_id)
+            ocr = await client.general_fast_ocr(image_url='https://example.com/image.png')
+            assert task_id == inline_id == 1234 and data['Result'] == '你好世界'
+            assert ocr['TextDetections'][0]['DetectedText'] == '本地测试'
+            print("✅ 签名校验通过：CreateRecTask（URL / 内联上传）/ DescribeTaskStatus / GeneralFastOCR")
+        except Exception as e:
+            print(f"❌ 正确密钥的请求失败: {e}")
+            passed = False
+
+        wrong = AsyncTencentCloudClient(SECRET_ID, 'wrong-key', http=http, endpoints=endpoints)
+        try:
+            await wrong.create_rec_task('https://example.com/audio.opus')
+            print("❌ 错误密钥的请求没有被拒绝")
+            passed = False
+        except TencentCloudError as e:
+            if e.code == 'AuthFailure.SignatureFailure':
+                print("✅ 错误密钥的请求被拒绝")
+            else:
+                print(f"❌ 错误密钥返回了意外的错误: {e}")
+                passed = False
+
+    for server in servers.values():
+        server.shutdown()
+    return passed
+
+
+def main():
+    print("=== 腾讯云 TC3 签名检查（本地模拟服务）===")
+    sys.exit(0 if asyncio.run(run_checks()) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import math
+import os
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 中文口播每分钟大约的字数，用于估算转录文本长度
+CHARS_PER_MINUTE = 250
+
+
+class DownloadPlan:
+    """下载前的规划结果
+
+    由 extract_info(download=False) 的元数据生成，不下载任何媒体数据。
+    用于拒绝超长视频、估算 ASR/LLM 成本，以及在下载前选出最小的纯音频格式。
+    """
+
+    def __init__(self,
+                 title: str,
+                 duration: int,
+                 platform: str,
+                 formats: List[Dict],
+                 subtitles: Dict[str, List[str]],
+                 format_id: Optional[str] = None,
+                 rejected_reason: Optional[str] = None):
+        self.title = title
+        self.duration = duration
+        self.platform = platform
+        self.formats = formats
+        self.subtitles = subtitles
+        self.format_id = format_id
+        self.rejected_reason = rejected_reason
+
+    @property
+    def rejected(self) -> bool:
+        return self.rejected_reason is not None
+
+    @property
+    def estimated_asr_minutes(self) -> float:
+        return round(self.duration / 60, 1)
+
+    @property
+    def estimated_transcript_chars(self) -> int:
+        return int(self.duration / 60 * CHARS_PER_MINUTE)
+
+    @property
+    def estimated_llm_calls(self) -> int:
+        """整理长文按 CONTENT_CHUNK_SIZE 分块调用一次，再加一次小红书转换"""
+        chunk_size = int(os.getenv('CONTENT_CHUNK_SIZE', '2000'))
+        return math.ceil(self.estimated_transcript_chars / chunk_size) + 1
+
+    @property
+    def estimated_asr_cost(self) -> float:
+        """按 ASR_COST_PER_HOUR（每小时音频的价格）估算转录费用"""
+        cost_per_hour = float(os.getenv('ASR_COST_PER_HOUR', '0'))
+        return round(self.duration / 3600 * cost_per_hour, 4)
+
+    @property
+    def selected_format(self) -> Optional[Dict]:
+        for fmt in self.formats:
+            if fmt['format_id'] == self.format_id:
+                return fmt
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            'title': self.title,
+            'duration': self.duration,
+            'platform': self.platform,
+            'format_id': self.format_id,
+            'selected_format': self.selected_format,
+            'audio_formats': len(self.formats),
+            'subtitles': self.subtitles,
+            'estimated_asr_minutes': self.estimated_asr_minutes,
+            'estimated_asr_cost': self.estimated_asr_cost,
+            'estimated_transcript_chars': self.estimated_transcript_chars,
+            'estimated_llm_calls': self.estimated_llm_calls,
+            'rejected_reason': self.rejected_reason,
+        }
+
+
+def _estimate_size(fmt: Dict, duration: int) -> Optional[float]:
+    """估算格式的文件大小（字节），优先使用平台给出的大小"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return float(size)
+    bitrate = fmt.get('abr') or fmt.get('tbr')
+    if bitrate and duration:
+        return bitrate * 1000 / 8 * duration
+    return None
+
+
+def audio_only_formats(info: Dict) -> List[Dict]:
+    """提取纯音频格式，按估算大小从小到大排序"""
+    duration = info.get('duration') or 0
+    formats = []
+    for fmt in info.get('formats') or []:
+        if fmt.get('vcodec') not in (None, 'none') or fmt.get('acodec') in (None, 'none'):
+            continue
+        formats.append({
+            'format_id': fmt.get('format_id'),
+            'ext': fmt.get('ext'),
+            'acodec': fmt.get('acodec'),
+            'abr': fmt.get('abr'),
+            'size': _estimate_size(fmt, duration),
+        })
+    return sorted(formats, key=lambda fmt: fmt['size'] if fmt['size'] is not None else math.inf)
+
+
+def available_subtitles(info: Dict) -> Dict[str, List[str]]:
+    """列出上传者字幕和自动字幕的语言"""
+    return {
+        'subtitles': sorted((info.get('subtitles') or {}).keys()),
+        'automatic_captions': sorted((info.get('automatic_captions') or {}).keys()),
+    }
+
+
+def duration_rejection(duration, max_duration: Optional[int] = None) -> Optional[str]:
+    """视频时长超过 max_duration（默认 MAX_VIDEO_DURATION，0 表示不限制）时返回拒绝原因，否则返回 None"""
+    if max_duration is None:
+        max_duration = int(os.getenv('MAX_VIDEO_DURATION', '0'))
+    duration = int(duration or 0)
+    if max_duration and duration > max_duration:
+        return f"视频时长 {duration} 秒超过上限 {max_duration} 秒"
+    return None
+
+
+def build_download_plan(info: Dict, platform: str,
+                        max_duration: Optional[int] = None,
+                        min_audio_abr: Optional[float] = None) -> DownloadPlan:
+    """根据视频元数据生成下载规划
+
+    Args:
+        info: extract_info(download=False) 的结果
+        platform: 平台名称
+        max_duration: 最长允许的视频时长（秒），默认读取 MAX_VIDEO_DURATION，0 表示不限制
+        min_audio_abr: 可选音频格式的最低码率（kbps），避免选到影响识别率的低码率流
+    """
+    if min_audio_abr is None:
+        min_audio_abr = float(os.getenv('MIN_AUDIO_ABR', '48'))
+
+    duration = int(info.get('duration') or 0)
+    formats = audio_only_formats(info)
+
+    # 选择满足最低码率要求的最小纯音频格式；码率未知的格式也可以接受
+    format_id = None
+    for fmt in formats:
+        if fmt['abr'] is None or fmt['abr'] >= min_audio_abr:
+            format_id = fmt['format_id']
+            break
+
+    rejected_reason = duration_rejection(duration, max_duration)
+
+    return DownloadPlan(
+        title=info.get('title', '未知标题'),
+        duration=duration,
+        platform=platform,
+        formats=formats,
+        subtitles=available_subtitles(info),
+        format_id=format_id,
+        rejected_reason=rejected_reason,
+    )
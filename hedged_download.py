@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from retry_policy import PERMANENT, classify_download_error
+
+# 加载环境变量
+load_dotenv()
+
+# 主下载方法在该秒数内没有收到任何数据时，并行启动下一个方法
+DEFAULT_HEDGE_DELAY = 20.0
+
+# 取消其余方法后最多等待它们退出的秒数，避免任务工作区被清理时它们还在写入
+DEFAULT_CANCEL_WAIT = 10.0
+
+# 延迟的指数移动平均系数
+LATENCY_SMOOTHING = 0.3
+
+
+class DownloadCancelled(Exception):
+    """其他下载方法已经先完成，本次下载被取消"""
+    pass
+
+
+class DownloadAttempt:
+    """一个下载方法的运行状态，下载函数通过它汇报进度、检查是否被取消"""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.started_at = time.time()
+        self._cancelled = threading.Event()
+        self._got_bytes = threading.Event()
+        self._wants_hedge = threading.Event()
+
+    def mark_bytes(self) -> None:
+        """已经收到媒体数据"""
+        self._got_bytes.set()
+
+    def on_progress(self, downloaded_bytes: int) -> None:
+        """下载进度回调：检查是否被取消，并记录是否已收到数据"""
+        self.check_cancelled()
+        if downloaded_bytes:
+            self.mark_bytes()
+
+    def request_hedge(self) -> None:
+        """遇到可重试的错误、正在退避等待，请求并行启动下一个方法"""
+        self._wants_hedge.set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check_cancelled(self) -> None:
+        """在下载循环中调用，已被取消时抛出 DownloadCancelled"""
+        if self._cancelled.is_set():
+            raise DownloadCancelled(f"{self.method} 已取消")
+
+    def sleep(self, seconds: float) -> None:
+        """可被取消的等待（重试退避时使用）"""
+        if self._cancelled.wait(seconds):
+            raise DownloadCancelled(f"{self.method} 已取消")
+
+    def should_hedge(self, hedge_delay: float) -> bool:
+        if self._wants_hedge.is_set():
+            return True
+        return not self._got_bytes.is_set() and time.time() - self.started_at >= hedge_delay
+
+
+class DownloadMethodStats:
+    """按平台统计每种下载方法的成功率和耗时，用于决定方法的尝试顺序"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(self, platform: str, method: str, success: bool, latency: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault((platform, method), {
+                'attempts': 0, 'successes': 0, 'latency': None,
+            })
+            stats['attempts'] += 1
+            if success:
+                stats['successes'] += 1
+                # 只统计成功下载的耗时
+                if stats['latency'] is None:
+                    stats['latency'] = latency
+                else:
+                    stats['latency'] += LATENCY_SMOOTHING * (latency - stats['latency'])
+
+    def _score(self, platform: str, method: str) -> Tuple[float, float]:
+        stats = self._stats.get((platform, method))
+        if not stats:
+            return -0.5, 0.0
+        # 拉普拉斯平滑，没有记录的方法按 50% 成功率计
+        success_rate = (stats['successes'] + 1) / (stats['attempts'] + 2)
+        return -success_rate, stats['latency'] or 0.0
+
+    def rank(self, platform: str, methods: Sequence[str]) -> List[str]:
+        """按成功率从高到低、耗时从短到长排序，没有记录时保持原顺序"""
+        with self._lock:
+            return sorted(methods, key=lambda method: self._score(platform, method))
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        with self._lock:
+            result: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for (platform, method), stats in self._stats.items():
+                result.setdefault(platform, {})[method] = {
+                    'attempts': stats['attempts'],
+                    'success_rate': round(stats['successes'] / stats['attempts'], 4),
+                    'latency': round(stats['latency'], 2) if stats['latency'] is not None else None,
+                }
+            return result
+
+
+download_method_stats = DownloadMethodStats()
+
+
+def hedged_download(platform: str,
+                    methods: Dict[str, Callable[[DownloadAttempt], str]],
+                    hedge_delay: Optional[float] = None,
+                    stats: Optional[DownloadMethodStats] = None) -> Tuple[str, str]:
+    """对冲下载：按统计排序依次启动下载方法，先完成的方法胜出
+
+    排在前面的方法在 hedge_delay 秒内没有收到数据，或者遇到可重试的错误时，
+    并行启动下一个方法；任一方法成功后取消其余方法。遇到永久错误（视频不存在、404 等）时
+    换方法也没有意义，立即取消其余方法并抛出，也不计入该方法的失败统计。
+
+    Args:
+        platform: 平台名称，统计按平台区分
+        methods: 方法名 -> 下载函数，下载函数接收 DownloadAttempt，返回文件路径
+        hedge_delay: 启动下一个方法前等待的秒数，默认 DOWNLOAD_HEDGE_DELAY 或 20
+        stats: 方法统计，默认使用进程内共享的 download_method_stats
+
+    Returns:
+        Tuple[str, str]: (胜出的方法名, 下载结果)
+
+    Raises:
+        所有方法都失败时，抛出排在最前面的方法的异常
+    """
+    if hedge_delay is None:
+        hedge_delay = float(os.getenv('DOWNLOAD_HEDGE_DELAY', str(DEFAULT_HEDGE_DELAY)))
+    stats = stats or download_method_stats
+    order = stats.rank(platform, list(methods))
+    pending = list(order)
+    errors: Dict[str, Exception] = {}
+    running: Dict = {}
+    latest: List[DownloadAttempt] = []
+
+    def run(attempt: DownloadAttempt) -> str:
+        return methods[attempt.method](attempt)
+
+    executor = ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix='download')
+
+    def start_next() -> None:
+        method = pending.pop(0)
+        if running:
+            print(f"⏱️ 并行启动备用下载方法: {method}")
+        attempt = DownloadAttempt(method)
+        latest[:] = [attempt]
+        running[executor.submit(run, attempt)] = attempt
+
+    try:
+        start_next()
+        while running:
+            done, _ = wait(list(running), timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt = running.pop(future)
+                latency = time.time() - attempt.started_at
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if isinstance(e, DownloadCancelled):
+                        errors[attempt.method] = e
+                        continue
+                    if classify_download_error(e) == PERMANENT:
+                        # 错误说明的是视频本身，与下载方法无关
+                        print(f"❌ 下载方法 {attempt.method} 遇到不可重试的错误: {str(e)}")
+                        for other in running.values():
+                            other.cancel()
+                        raise
+                    stats.record(platform, attempt.method, False, latency)
+                    errors[attempt.method] = e
+                    print(f"⚠️ 下载方法 {attempt.method} 失败: {str(e)}")
+                    continue
+                if result:
+                    stats.record(platform, attempt.method, True, latency)
+                    for other in running.values():
+                        other.cancel()
+                    return attempt.method, result
+                stats.record(platform, attempt.method, False, latency)
+                errors[attempt.method] = Exception(f"{attempt.method} 未返回下载文件")
+
+            # 只看最近启动的方法，避免一次性启动所有方法
+            if pending and (latest[0] not in running.values() or latest[0].should_hedge(hedge_delay)):
+                start_next()
+    finally:
+        # 被取消的方法在下一次进度检查时退出；短暂等待它们结束再返回，
+        # 调用方随后可能清理工作区（JobWorkspace.cleanup），不能让它们继续往里写文件
+        for attempt in running.values():
+            attempt.cancel()
+        if running:
+            cancel_wait = float(os.getenv('DOWNLOAD_CANCEL_WAIT', str(DEFAULT_CANCEL_WAIT)))
+            _, still_running = wait(list(running), timeout=cancel_wait)
+            if still_running:
+                names = ', '.join(running[future].method for future in still_running)
+                print(f"⚠️ 已取消的下载方法 {cancel_wait:.0f} 秒内没有退出: {names}")
+        executor.shutdown(wait=False)
+
+    # 优先抛出首选方法的异常，便于按错误类型给出提示
+    first = next(method for method in order if method in errors)
+    raise errors[first]
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，只做进程内加锁
+    fcntl = None
+
+# 加载环境变量
+load_dotenv()
+
+INDEX_FILE = 'index.json'
+LOCK_FILE = 'index.lock'
+# 最近多少秒内被取用过的条目不会被淘汰（可能还在转录中）
+DEFAULT_IN_USE_SECONDS = 1800
+# put 写入的缓存文件名：条目键的 sha1 + 扩展名
+CACHE_FILE_PATTERN = re.compile(r'^[0-9a-f]{40}\.\w+$')
+STAT_NAMES = ('hits', 'misses', 'evictions')
+
+# 不经过 yt-dlp 就能从链接中解析出的 (extractor, id)，用于缓存命中时完全跳过 yt-dlp
+URL_ID_PATTERNS = [
+    ('youtube', re.compile(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/)|youtu\.be/)([0-9A-Za-z_-]{11})')),
+    ('bilibili', re.compile(r'bilibili\.com/video/(BV[0-9A-Za-z]{10})')),
+    ('douyin', re.compile(r'douyin\.com/video/(\d+)')),
+]
+
+
+def cache_key_from_info(info: Dict) -> str:
+    """根据 yt-dlp 的 extract_info 结果生成 extractor:id 缓存键"""
+    extractor = (info.get('extractor_key') or info.get('extractor') or 'generic').lower()
+    return f"{extractor}:{info['id']}"
+
+
+def cache_key_from_url(url: str) -> Optional[str]:
+    """从常见平台链接中直接解析 extractor:id，无法解析时返回 None"""
+    # B站分P视频的ID带有 _pN 后缀，交给别名索引处理
+    if re.search(r'[?&]p=\d+', url):
+        return None
+    for extractor, pattern in URL_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return f"{extractor}:{match.group(1)}"
+    return None
+
+
+class MediaCache:
+    """按平台视频ID寻址的持久化下载缓存
+
+    每个条目保存提取后的音频文件和 video_info，键为 yt-dlp 的 extractor:id
+    加上音频格式（同一视频在不同提取模式下得到的文件不同）。超出字节预算时
+    按最近最少使用（LRU）淘汰。
+
+    索引只在 put 时写入：先加文件锁、重新读取磁盘上的索引再合并写回，多个进程（API 的多个 worker、
+    命令行）共用一个缓存目录时不会互相覆盖条目。命中时只更新音频文件的修改时间作为最近访问时间，
+    不重写索引；命中/未命中次数先记在内存中，下次写索引时一并合并。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('MEDIA_CACHE_DIR', 'media_cache')
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('MEDIA_CACHE_MAX_BYTES', str(5 * 1024 ** 3))))
+        self.max_bytes = max_bytes
+        self.in_use_seconds = float(os.getenv('MEDIA_CACHE_IN_USE_SECONDS', str(DEFAULT_IN_USE_SECONDS)))
+        self._lock = threading.RLock()
+        self._index: Optional[Dict] = None
+        self._index_mtime: Optional[int] = None
+        self._pending_stats = dict.fromkeys(STAT_NAMES, 0)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.cache_dir, LOCK_FILE)
+
+    def _read_index(self) -> Dict:
+        index = {'entries': {}, 'aliases': {}}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        index['stats'] = {name: index.get('stats', {}).get(name, 0) for name in STAT_NAMES}
+        return index
+
+    def _load_index(self) -> Dict:
+        """只读地获取索引，磁盘上的索引被其他进程更新后重新读取"""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._index is None or mtime != self._index_mtime:
+            self._index = self._read_index()
+            self._index_mtime = mtime
+        return self._index
+
+    @contextmanager
+    def _update_index(self) -> Iterator[Dict]:
+        """在文件锁内重新读取索引，修改后连同内存中累计的统计一起写回"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            index = self._read_index()
+            yield index
+            for name, count in self._pending_stats.items():
+                index['stats'][name] += count
+            self._pending_stats = dict.fromkeys(STAT_NAMES, 0)
+            self._save_index(index)
+
+    def _save_index(self, index: Dict) -> None:
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._index = index
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    def _resolve_key(self, url: str) -> Optional[str]:
+        """先查链接别名（短链接等），再尝试直接从链接解析"""
+        return self._load_index()['aliases'].get(url) or cache_key_from_url(url)
+
+    def get(self, url: str, variant: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """查找缓存，命中时返回 (音频路径, video_info)，否则返回 (None, None)"""
+        if not self.enabled:
+            return None, None
+        with self._lock:
+            index = self._load_index()
+            key = self._resolve_key(url)
+            entry_key = f"{key}|{variant}" if key else None
+            entry = index['entries'].get(entry_key) if entry_key else None
+            audio_path = os.path.join(self.cache_dir, entry['audio']) if entry else None
+
+            if entry:
+                try:
+                    # 用音频文件的修改时间记录最近访问，不重写索引
+                    now = time.time()
+                    os.utime(audio_path, (now, now))
+                except FileNotFoundError:
+                    # 文件已被删除，失效的条目在下次写索引时清理
+                    entry = None
+            if not entry:
+                self._pending_stats['misses'] += 1
+                return None, None
+
+            self._pending_stats['hits'] += 1
+            return audio_path, dict(entry['video_info'])
+
+    def put(self, info: Dict, url: str, variant: str, audio_path: str, video_info: Dict) -> str:
+        """把下载好的音频移入缓存，返回缓存中的文件路径"""
+        if not self.enabled:
+            return audio_path
+        key = cache_key_from_info(info)
+        entry_key = f"{key}|{variant}"
+        digest = hashlib.sha1(entry_key.encode('utf-8')).hexdigest()
+        ext = os.path.splitext(audio_path)[1]
+        filename = f"{digest}{ext}"
+        cached_path = os.path.join(self.cache_dir, filename)
+
+        with self._update_index() as index:
+            shutil.move(audio_path, cached_path)
+            index['entries'][entry_key] = {
+                'audio': filename,
+                'video_info': video_info,
+                'size': os.path.getsize(cached_path),
+                'last_access': time.time(),
+            }
+            index['aliases'][url] = key
+            self._evict(index, keep=entry_key)
+        return cached_path
+
+    def _last_access(self, entry: Dict) -> float:
+        """最近访问时间：写入时间和命中时更新的文件修改时间中较晚的一个"""
+        try:
+            return max(entry['last_access'], os.path.getmtime(os.path.join(self.cache_dir, entry['audio'])))
+        except FileNotFoundError:
+            return entry['last_access']
+
+    def _evict(self, index: Dict, keep: str) -> None:
+        """按 LRU 淘汰条目直到总大小不超过预算
+
+        最近 in_use_seconds 秒内被取用过的条目可能还在转录，不淘汰；同时清理文件已不存在的条目，
+        以及不属于任何条目的缓存文件（旧版本并发写索引时丢失的条目留下的）。
+        """
+        now = time.time()
+        entries = index['entries']
+        for entry_key in [entry_key for entry_key, entry in entries.items()
+                          if not os.path.exists(os.path.join(self.cache_dir, entry['audio']))]:
+            del entries[entry_key]
+
+        last_access = {entry_key: self._last_access(entry) for entry_key, entry in entries.items()}
+        total = sum(entry['size'] for entry in entries.values())
+        for entry_key, entry in sorted(entries.items(), key=lambda item: last_access[item[0]]):
+            if total <= self.max_bytes:
+                break
+            if entry_key == keep or now - last_access[entry_key] < self.in_use_seconds:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['audio']))
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+            del entries[entry_key]
+            index['stats']['evictions'] += 1
+
+        referenced = {entry['audio'] for entry in entries.values()}
+        for name in os.listdir(self.cache_dir):
+            if not CACHE_FILE_PATTERN.match(name) or name in referenced:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if now - os.path.getmtime(path) >= self.in_use_seconds:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        live_keys = {entry_key.split('|', 1)[0] for entry_key in entries}
+        index['aliases'] = {url: key for url, key in index['aliases'].items() if key in live_keys}
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中/未命中/淘汰次数以及当前条目数和占用字节数"""
+        with self._lock:
+            index = self._load_index()
+            stats = {name: index['stats'][name] + self._pending_stats[name] for name in STAT_NAMES}
+            stats['entries'] = len(index['entries'])
+            stats['bytes'] = sum(entry['size'] for entry in index['entries'].values())
+            return stats
+
+
+_cache: Optional[MediaCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_media_cache() -> MediaCache:
+    """获取进程内共享的下载缓存"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MediaCache()
+    return _cache
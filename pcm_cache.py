@@ -0,0 +1,131 @@
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Optional
+
+# Whisper 固定使用 16kHz 单声道
+SAMPLE_RATE = 16000
+
+# .npy 文件头的固定长度：先在文件头之后写入采样，解码结束、知道采样数后再回填文件头
+NPY_HEADER_SIZE = 128
+# 从 ffmpeg 读取输出时的缓冲区大小
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class AudioDecodeError(Exception):
+    """ffmpeg 无法把音频解码为 PCM"""
+    pass
+
+
+def _npy_header(length: int) -> bytes:
+    """float32 一维数组的 .npy（1.0 版）文件头，补齐到 NPY_HEADER_SIZE 字节"""
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d,), }" % length
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def pcm_cache_path(cache_dir: str, source_path: str, sample_rate: int = SAMPLE_RATE) -> str:
+    """PCM 缓存文件路径，源文件变化（路径、大小、修改时间）后使用新的缓存"""
+    stat = os.stat(source_path)
+    key = f"{os.path.abspath(source_path)}:{stat.st_size}:{stat.st_mtime_ns}:{sample_rate}"
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, f"{name}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.npy")
+
+
+def decode_pcm(ffmpeg_path: str, source_path: str, cache_dir: str, sample_rate: int = SAMPLE_RATE) -> str:
+    """把音频解码为 16kHz 单声道 float32 PCM，保存为 .npy，已解码过时直接返回缓存
+
+    ffmpeg 的输出直接写入文件，不在内存中保留完整的音频。
+
+    Returns:
+        str: .npy 文件路径，用 load_pcm 以内存映射方式读取
+
+    Raises:
+        AudioDecodeError: ffmpeg 解码失败
+    """
+    path = pcm_cache_path(cache_dir, source_path, sample_rate)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    start = time.time()
+    # 同一文件可能被多个线程同时解码，各自写入临时文件后原子替换
+    part_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        with tempfile.TemporaryFile() as stderr, open(part_path, 'wb') as f:
+            process = subprocess.Popen(
+                [ffmpeg_path, '-nostdin', '-loglevel', 'error', '-i', source_path,
+                 '-vn', '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'],
+                stdout=subprocess.PIPE, stderr=stderr,
+            )
+            f.seek(NPY_HEADER_SIZE)
+            shutil.copyfileobj(process.stdout, f, COPY_BUFFER_SIZE)
+            process.stdout.close()
+            process.wait()
+
+            length = (f.tell() - NPY_HEADER_SIZE) // 4
+            if process.returncode != 0 or not length:
+                stderr.seek(0)
+                message = stderr.read().decode('utf-8', errors='replace').strip()
+                raise AudioDecodeError(f"ffmpeg 解码失败: {message or '没有输出音频'}")
+            f.seek(0)
+            f.write(_npy_header(length))
+        os.replace(part_path, path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    print(f"🎧 已解码为 {sample_rate // 1000}kHz PCM 缓存（{length / sample_rate:.0f} 秒，用时 {time.time() - start:.1f} 秒）")
+    return path
+
+
+def load_pcm(path: str):
+    """以内存映射方式读取 PCM 缓存
+
+    使用写时复制（copy-on-write）映射：不会把整个文件读入内存，切片是零拷贝的视图，
+    多个进程映射同一文件时共享页缓存；数组是可写的（修改不会写回文件），可以直接交给 torch。
+    """
+    import numpy as np
+
+    return np.load(path, mmap_mode='c')
+
+
+def pcm_view(pcm, start: float, end: Optional[float] = None, sample_rate: int = SAMPLE_RATE):
+    """按秒截取 PCM 的视图（不复制数据）"""
+    first = max(0, int(start * sample_rate))
+    last = int(end * sample_rate) if end is not None and end != float('inf') else None
+    return pcm[first:last]
+
+
+def save_pcm(pcm, cache_dir: str, name: str) -> str:
+    """把内存中的 PCM 保存为 .npy，返回路径（之后用 load_pcm 以内存映射方式读取）"""
+    import numpy as np
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{name}.npy")
+    np.save(path, np.asarray(pcm, dtype=np.float32))
+    return path
+
+
+def encode_pcm(ffmpeg_path: str, pcm, output_path: str, output_args, sample_rate: int = SAMPLE_RATE) -> str:
+    """把 PCM 编码为音频文件（例如上传给云端识别的 opus）
+
+    Raises:
+        AudioDecodeError: ffmpeg 编码失败
+    """
+    import numpy as np
+
+    process = subprocess.Popen(
+        [ffmpeg_path, '-nostdin', '-y', '-loglevel', 'error',
+         '-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0', *output_args, output_path],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    _, stderr = process.communicate(np.asarray(pcm, dtype='<f4').tobytes())
+    if process.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg 编码失败: {stderr.decode('utf-8', errors='replace').strip()}")
+    return output_path
@@ -0,0 +1,137 @@
+import os
+import random
+import re
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 错误分类
+PERMANENT = 'permanent'    # 视频不存在、不可用、平台不支持等，重试没有意义
+TRANSIENT = 'transient'    # 5xx、SSL、超时、连接中断等，退避后重试
+BLOCKED = 'blocked'        # 403/429/cookie 失效，可以慢一点再试一次
+UNKNOWN = 'unknown'
+
+# 下载错误中不值得重试的 DownloadError.error_type
+PERMANENT_ERROR_TYPES = ('platform_error', 'duration_error')
+
+# 异常信息中的 HTTP 状态码（yt-dlp: "HTTP Error 503: Service Unavailable"）
+STATUS_PATTERN = re.compile(r'\b(?:HTTP Error|HTTP status(?: code)?|status code|状态码)[\s:：]*(\d{3})\b', re.IGNORECASE)
+PERMANENT_STATUS = (404, 410)
+BLOCKED_STATUS = (401, 403, 429)
+
+# 文字匹配只认提取器明确的“视频不可用”提示，不匹配裸的 unavailable（503 Service Unavailable 是临时错误）
+PERMANENT_PATTERNS = re.compile(
+    r'\b404\b|\b410\b|video unavailable|this video is not available|video is not available|private video|'
+    r'has been removed|does not exist|unsupported url|no video formats|'
+    r'视频(?:不存在|已被?删除|不可用)|作品不存在',
+    re.IGNORECASE,
+)
+BLOCKED_PATTERNS = re.compile(r'\b403\b|\b429\b|too many requests|cookies|sign in|login', re.IGNORECASE)
+TRANSIENT_PATTERNS = re.compile(
+    r'\b5\d\d\b|ssl|timed out|timeout|connection (?:reset|aborted|refused)|remote end closed|'
+    r'temporar(?:y|ily)|try again later|incompleteread|broken pipe|network is unreachable|暂时|稍后再试',
+    re.IGNORECASE,
+)
+
+# 每类错误允许的重试次数
+DEFAULT_RETRY_BUDGETS = {
+    PERMANENT: 0,
+    TRANSIENT: 3,
+    BLOCKED: 1,
+    UNKNOWN: 1,
+}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """异常对应的 HTTP 状态码：httpx 的响应，或异常信息中的 "HTTP Error 503" 等"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if isinstance(status, int):
+        return status
+    match = STATUS_PATTERN.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def classify_download_error(error: Exception) -> str:
+    """把下载异常归类为 permanent / transient / blocked / unknown
+
+    依次看：DownloadError 类型、明确的 HTTP 状态码、临时错误的提示，然后才是“视频不可用”之类的文字和限流提示，
+    避免 "503: Service Unavailable"、"Temporarily unavailable" 被当成永久错误。
+    """
+    error_type = getattr(error, 'error_type', None)
+    if error_type in PERMANENT_ERROR_TYPES:
+        return PERMANENT
+
+    status = _status_code(error)
+    if status is not None:
+        if status >= 500:
+            return TRANSIENT
+        if status in PERMANENT_STATUS:
+            return PERMANENT
+        if status in BLOCKED_STATUS:
+            return BLOCKED
+
+    message = str(error)
+    if TRANSIENT_PATTERNS.search(message) or isinstance(error, (TimeoutError, ConnectionError)):
+        return TRANSIENT
+    if PERMANENT_PATTERNS.search(message):
+        return PERMANENT
+    if BLOCKED_PATTERNS.search(message):
+        return BLOCKED
+    return UNKNOWN
+
+
+class RetryPolicy:
+    """指数退避 + 随机抖动的重试策略，每类错误有独立的重试次数"""
+
+    def __init__(self,
+                 base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None,
+                 multiplier: float = 2.0,
+                 jitter: float = 0.5,
+                 budgets: Optional[Dict[str, int]] = None):
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv('DOWNLOAD_RETRY_BASE_DELAY', '1'))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv('DOWNLOAD_RETRY_MAX_DELAY', '30'))
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.budgets = dict(DEFAULT_RETRY_BUDGETS, **(budgets or {}))
+
+    def delay(self, retry_number: int, error_class: str = TRANSIENT) -> float:
+        """第 retry_number 次重试（从0开始）前的等待秒数"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** retry_number)
+        if error_class == BLOCKED:
+            # 被限流时多等一会儿
+            delay = min(self.max_delay, delay * 4)
+        # 抖动：在 [delay * (1 - jitter), delay] 之间随机，避免多个任务同时重试
+        return delay * (1 - self.jitter * random.random())
+
+    def start(self) -> 'RetryState':
+        """开始一次新的重试过程"""
+        return RetryState(self)
+
+
+class RetryState:
+    """一次操作的重试状态"""
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.retries: Dict[str, int] = {}
+        self.last_error_class: Optional[str] = None
+
+    @property
+    def total_retries(self) -> int:
+        return sum(self.retries.values())
+
+    def next_delay(self, error: Exception) -> Optional[float]:
+        """根据错误类别返回重试前的等待秒数，不应再重试时返回 None"""
+        error_class = classify_download_error(error)
+        self.last_error_class = error_class
+        used = self.retries.get(error_class, 0)
+        if used >= self.policy.budgets.get(error_class, 0):
+            return None
+        delay = self.policy.delay(self.total_retries, error_class)
+        self.retries[error_class] = used + 1
+        return delay
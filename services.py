@@ -0,0 +1,465 @@
+import asyncio
+import importlib.util
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 默认的 OpenRouter 地址
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Homebrew 安装的 ffmpeg 路径（macOS）
+HOMEBREW_FFMPEG_PATH = "/opt/homebrew/bin/ffmpeg"
+
+# Unsplash API 地址
+UNSPLASH_API_URL = "https://api.unsplash.com"
+
+# 腾讯云服务域名
+TENCENT_ENDPOINTS = {
+    'asr': "asr.tencentcloudapi.com",
+    'ocr': "ocr.tencentcloudapi.com",
+}
+
+# 共享 HTTP 客户端中空闲长连接的保持时间（秒）
+HTTP_KEEPALIVE_EXPIRY = 60
+
+# DNS 缓存最多保存的主机数
+DNS_CACHE_MAX_ENTRIES = 256
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """读取布尔型环境变量：1 / true / yes / on 为真，未设置时返回 default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class DnsCache:
+    """共享 httpx 客户端使用的 DNS 缓存
+
+    只通过该客户端的网络后端生效，不修改 socket.getaddrinfo，yt-dlp、腾讯云 SDK、openai 等
+    仍按系统方式解析。最多保存 max_entries 个主机，写入时清理过期的条目；连接失败时丢弃对应条目，
+    下次重新解析。
+    """
+
+    def __init__(self, ttl: float, max_entries: int = DNS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int], Tuple[float, str]] = {}
+
+    def resolve(self, host: str, port: int) -> str:
+        """返回 host 的 IP 地址（带 TTL 缓存），解析失败时抛出 socket.gaierror"""
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+        address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][4][0]
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+            self._entries[key] = (now + self.ttl, address)
+        return address
+
+    def invalidate(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+def _dns_cached_backend(cache: DnsCache, is_async: bool):
+    """创建先查 DNS 缓存再连接 IP 的 httpcore 网络后端（TLS 的 SNI 仍使用原主机名）"""
+    import httpcore
+
+    def resolve(host: str, port: int) -> str:
+        try:
+            return cache.resolve(host, port)
+        except OSError as e:
+            # 转换为 httpcore 的异常，httpx 会把它映射为 ConnectError
+            raise httpcore.ConnectError(str(e)) from e
+
+    if is_async:
+        class CachedAsyncBackend(httpcore.AnyIOBackend):
+            async def connect_tcp(self, host, port, *args, **kwargs):
+                import anyio
+                address = await anyio.to_thread.run_sync(resolve, host, port)
+                try:
+                    return await super().connect_tcp(address, port, *args, **kwargs)
+                except Exception:
+                    cache.invalidate(host, port)
+                    raise
+        return CachedAsyncBackend()
+
+    class CachedSyncBackend(httpcore.SyncBackend):
+        def connect_tcp(self, host, port, *args, **kwargs):
+            address = resolve(host, port)
+            try:
+                return super().connect_tcp(address, port, *args, **kwargs)
+            except Exception:
+                cache.invalidate(host, port)
+                raise
+    return CachedSyncBackend()
+
+
+@dataclass
+class PoolConfig:
+    """单个客户端的连接池配置"""
+    pool_size: int
+    timeout: float
+
+    @classmethod
+    def from_env(cls, prefix: str, pool_size: int, timeout: float) -> 'PoolConfig':
+        """从环境变量 {prefix}_POOL_SIZE / {prefix}_TIMEOUT 读取配置"""
+        return cls(
+            pool_size=int(os.getenv(f'{prefix}_POOL_SIZE', str(pool_size))),
+            timeout=float(os.getenv(f'{prefix}_TIMEOUT', str(timeout))),
+        )
+
+
+class ServiceRegistry:
+    """外部服务的延迟初始化层，也是进程内共享的客户端注册表
+
+    客户端在第一次使用时才创建，连通性探测（OpenRouter、ffmpeg）的结果会被缓存，
+    因此导入模块时不会产生任何网络请求或子进程。VideoNoteGenerator 和
+    CheckIllegalReport 共用同一个实例，OpenRouter、腾讯云 ASR/OCR、Unsplash
+    的连接池和 SDK 客户端对象只创建一次并保持长连接。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._openrouter_client = None
+        self._openrouter_available: Optional[bool] = None
+        self._unsplash_client = None
+        self._unsplash_initialized = False
+        self._ffmpeg_path: Optional[str] = None
+        self._ffmpeg_checked = False
+        self._http = None
+        # httpx.AsyncClient 的连接绑定在创建它的事件循环上，每个事件循环各用一个
+        self._async_http: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+        self._tencent_clients: Dict[Tuple[str, str, str, str], object] = {}
+
+        # 各客户端的连接池大小和超时（秒）
+        self.pool_configs: Dict[str, PoolConfig] = {
+            'openrouter': PoolConfig.from_env('OPENROUTER', pool_size=20, timeout=120),
+            'tencent_asr': PoolConfig.from_env('TENCENT_ASR', pool_size=10, timeout=60),
+            'tencent_ocr': PoolConfig.from_env('TENCENT_OCR', pool_size=10, timeout=30),
+            # Unsplash 搜索、页面抓取、媒体下载共用的 HTTP 连接池
+            'http': PoolConfig.from_env('HTTP', pool_size=20, timeout=30),
+        }
+
+        self.openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
+        self.openrouter_app_name = os.getenv('OPENROUTER_APP_NAME', 'video-note')
+        self.openrouter_http_referer = os.getenv('OPENROUTER_HTTP_REFERER', 'https://github.com')
+        self.unsplash_access_key = os.getenv('UNSPLASH_ACCESS_KEY')
+        # 探测超时（秒），避免探测挂起阻塞请求
+        self.probe_timeout = float(os.getenv('SERVICE_PROBE_TIMEOUT', '5'))
+        # 安装了 h2 时启用 HTTP/2，同一主机的并发请求复用一条连接
+        self.http2 = env_flag('HTTP2', True) and importlib.util.find_spec('h2') is not None
+        # DNS 缓存时间（秒），0 表示不缓存；只作用于共享的 http / async_http 客户端
+        self.dns_cache_ttl = float(os.getenv('DNS_CACHE_TTL', '300'))
+        self.dns_cache = DnsCache(self.dns_cache_ttl) if self.dns_cache_ttl > 0 else None
+
+    @property
+    def openrouter_client(self):
+        """OpenRouter（OpenAI 兼容）客户端，首次访问时创建"""
+        if self._openrouter_client is None:
+            with self._lock:
+                if self._openrouter_client is None:
+                    import httpx
+                    import openai
+                    config = self.pool_configs['openrouter']
+                    self._openrouter_client = openai.OpenAI(
+                        api_key=self.openrouter_api_key,
+                        base_url=OPENROUTER_BASE_URL,
+                        default_headers={
+                            "HTTP-Referer": self.openrouter_http_referer,
+                            "X-Title": self.openrouter_app_name,
+                        },
+                        timeout=config.timeout,
+                        http_client=httpx.Client(
+                            limits=httpx.Limits(
+                                max_connections=config.pool_size,
+                                max_keepalive_connections=config.pool_size,
+                            ),
+                            timeout=config.timeout,
+                        )
+                    )
+        return self._openrouter_client
+
+    @property
+    def openrouter_available(self) -> bool:
+        """OpenRouter 是否可用，只在首次访问时测试一次连接"""
+        if self._openrouter_available is None:
+            with self._lock:
+                if self._openrouter_available is None:
+                    self._openrouter_available = self._probe_openrouter()
+        return self._openrouter_available
+
+    def _probe_openrouter(self) -> bool:
+        """测试 OpenRouter 连接"""
+        if not self.openrouter_api_key:
+            return False
+        try:
+            print(f"正在测试 OpenRouter API 连接...")
+            # 使用更简单的API调用来测试连接，并限制超时避免阻塞
+            self.openrouter_client.with_options(
+                timeout=self.probe_timeout, max_retries=0
+            ).models.list()
+            print("✅ OpenRouter API 连接测试成功")
+            return True
+        except Exception as e:
+            print(f"⚠️ OpenRouter API 连接测试失败: {str(e)}")
+            print("将继续尝试使用API，但可能会遇到问题")
+            return False
+
+    @property
+    def unsplash_client(self):
+        """Unsplash 客户端，未配置或初始化失败时为 None"""
+        if not self._unsplash_initialized:
+            with self._lock:
+                if not self._unsplash_initialized:
+                    self._unsplash_client = self._build_unsplash_client()
+                    self._unsplash_initialized = True
+        return self._unsplash_client
+
+    def _build_unsplash_client(self):
+        """创建 Unsplash 客户端"""
+        if not self.unsplash_access_key:
+            return None
+        try:
+            from unsplash.api import Api as UnsplashApi
+            from unsplash.auth import Auth as UnsplashAuth
+            auth = UnsplashAuth(
+                client_id=self.unsplash_access_key,
+                client_secret=None,
+                redirect_uri=None
+            )
+            print("✅ Unsplash API 配置成功")
+            return UnsplashApi(auth)
+        except Exception as e:
+            print(f"❌ Failed to initialize Unsplash client: {str(e)}")
+            return None
+
+    @property
+    def unsplash_headers(self) -> Dict[str, str]:
+        """调用 Unsplash API 的认证请求头"""
+        return {'Authorization': f'Client-ID {self.unsplash_access_key}'}
+
+    def _http_client_options(self, is_async: bool = False) -> Dict:
+        """共享 httpx 客户端（同步/异步）的公共配置"""
+        import httpx
+        config = self.pool_configs['http']
+        transport_class = httpx.AsyncHTTPTransport if is_async else httpx.HTTPTransport
+        transport = transport_class(
+            limits=httpx.Limits(
+                max_connections=config.pool_size,
+                max_keepalive_connections=config.pool_size,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=self.http2,
+            verify=False,  # 禁用SSL验证
+        )
+        if self.dns_cache is not None:
+            # httpx 没有公开设置解析器的接口，替换连接池的网络后端；版本不兼容时不使用 DNS 缓存
+            pool = getattr(transport, '_pool', None)
+            if pool is not None and hasattr(pool, '_network_backend'):
+                pool._network_backend = _dns_cached_backend(self.dns_cache, is_async)
+            else:
+                print("⚠️ 当前 httpx 版本不支持替换网络后端，DNS 缓存未启用")
+        return {
+            'transport': transport,
+            # 超时针对单次连接/读写，而不是整个下载过程
+            'timeout': config.timeout,
+            'follow_redirects': True,
+        }
+
+    @property
+    def http(self):
+        """进程内共享的长连接 httpx 客户端（Unsplash 搜索、页面抓取、媒体下载）"""
+        if self._http is None:
+            with self._lock:
+                if self._http is None:
+                    import httpx
+                    self._http = httpx.Client(**self._http_client_options())
+        return self._http
+
+    @property
+    def async_http(self):
+        """与 http 配置相同的 httpx.AsyncClient，供异步代码使用
+
+        必须在事件循环中访问，每个事件循环各有一个客户端（事件循环被回收时随之释放），
+        不会把一个循环上建立的连接交给另一个循环使用。
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_http.get(loop)
+        if client is None:
+            with self._lock:
+                client = self._async_http.get(loop)
+                if client is None:
+                    import httpx
+                    client = self._async_http[loop] = httpx.AsyncClient(**self._http_client_options(is_async=True))
+        return client
+
+    def prewarm(self, urls: Optional[List[str]] = None, background: bool = True) -> None:
+        """预先建立到常用主机的连接（DNS + TCP + TLS），首个真实请求不再付握手延迟
+
+        Args:
+            urls: 要预热的地址，默认读取 HTTP_PREWARM_URLS，未设置时为已配置的 Unsplash API
+            background: 是否在后台线程中进行，不阻塞启动
+        """
+        if urls is None:
+            configured = os.getenv('HTTP_PREWARM_URLS')
+            if configured is not None:
+                urls = [url.strip() for url in configured.split(',') if url.strip()]
+            else:
+                urls = [UNSPLASH_API_URL] if self.unsplash_access_key else []
+        if not urls:
+            return
+
+        def warm() -> None:
+            for url in urls:
+                try:
+                    self.http.head(url, timeout=self.probe_timeout)
+                except Exception as e:
+                    print(f"⚠️ 预热连接失败 {url}: {str(e)}")
+
+        if background:
+            threading.Thread(target=warm, name='http-prewarm', daemon=True).start()
+        else:
+            warm()
+
+    def tencent_asr_client(self, secret_id: str, secret_key: str, region: str = "ap-shanghai"):
+        """获取共享的腾讯云 ASR 客户端"""
+        return self._tencent_client('asr', secret_id, secret_key, region)
+
+    def tencent_ocr_client(self, secret_id: str, secret_key: str, region: str = "ap-shanghai"):
+        """获取共享的腾讯云 OCR 客户端"""
+        return self._tencent_client('ocr', secret_id, secret_key, region)
+
+    def tencent_async_client(self, secret_id: str, secret_key: str, region: str = "ap-shanghai"):
+        """获取共享的腾讯云原生异步客户端（ASR 和 OCR 共用，请求时使用当前事件循环的 async_http）"""
+        key = ('async', secret_id, secret_key, region)
+        client = self._tencent_clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._tencent_clients.get(key)
+                if client is None:
+                    from tencent_cloud import AsyncTencentCloudClient
+                    client = AsyncTencentCloudClient(secret_id, secret_key, region)
+                    self._tencent_clients[key] = client
+        return client
+
+    def _tencent_client(self, product: str, secret_id: str, secret_key: str, region: str):
+        """按 (产品, 密钥, 区域) 缓存腾讯云 SDK 客户端，避免每次请求重复构造"""
+        key = (product, secret_id, secret_key, region)
+        client = self._tencent_clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._tencent_clients.get(key)
+            if client is None:
+                from tencentcloud.common import credential
+                from tencentcloud.common.profile.client_profile import ClientProfile
+                from tencentcloud.common.profile.http_profile import HttpProfile
+
+                config = self.pool_configs[f'tencent_{product}']
+                httpProfile = HttpProfile()
+                httpProfile.endpoint = TENCENT_ENDPOINTS[product]
+                httpProfile.reqTimeout = int(config.timeout)
+                httpProfile.keepAlive = True
+                httpProfile.pre_conn_pool_size = config.pool_size
+
+                clientProfile = ClientProfile()
+                clientProfile.httpProfile = httpProfile
+
+                cred = credential.Credential(secret_id, secret_key)
+                if product == 'asr':
+                    from tencentcloud.asr.v20190614 import asr_client
+                    client = asr_client.AsrClient(cred, region, clientProfile)
+                else:
+                    from tencentcloud.ocr.v20181119 import ocr_client
+                    client = ocr_client.OcrClient(cred, region, clientProfile)
+                self._tencent_clients[key] = client
+        return client
+
+    def describe_pools(self) -> Dict[str, Dict[str, float]]:
+        """返回各客户端的连接池大小和超时配置"""
+        return {
+            name: {'pool_size': config.pool_size, 'timeout': config.timeout}
+            for name, config in self.pool_configs.items()
+        }
+
+    def close(self) -> None:
+        """关闭所有长连接（进程退出时调用）"""
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+            if self._openrouter_client is not None:
+                self._openrouter_client.close()
+                self._openrouter_client = None
+            self._tencent_clients.clear()
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的异步客户端和所有同步长连接"""
+        async_http = self._async_http.pop(asyncio.get_running_loop(), None)
+        if async_http is not None:
+            await async_http.aclose()
+        self.close()
+
+    @property
+    def ffmpeg_path(self) -> Optional[str]:
+        """ffmpeg 可执行文件路径，只在首次访问时探测一次"""
+        if not self._ffmpeg_checked:
+            with self._lock:
+                if not self._ffmpeg_checked:
+                    self._ffmpeg_path = self._probe_ffmpeg()
+                    self._ffmpeg_checked = True
+        return self._ffmpeg_path
+
+    def _probe_ffmpeg(self) -> Optional[str]:
+        """按 FFMPEG_PATH、Homebrew、PATH 的顺序查找 ffmpeg"""
+        candidates = [os.getenv('FFMPEG_PATH'), HOMEBREW_FFMPEG_PATH, shutil.which('ffmpeg')]
+        for candidate in candidates:
+            if not candidate or not os.path.exists(candidate):
+                continue
+            try:
+                subprocess.run([candidate, "-version"],
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               timeout=self.probe_timeout,
+                               check=True)
+                print(f"✅ ffmpeg is available at {candidate}")
+                return candidate
+            except Exception:
+                continue
+        print("⚠️ ffmpeg not found")
+        return None
+
+
+_registry: Optional[ServiceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_services() -> ServiceRegistry:
+    """获取进程内共享的服务层实例"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ServiceRegistry()
+    return _registry
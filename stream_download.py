@@ -0,0 +1,124 @@
+import os
+import re
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+# 默认每次读取 1MiB，减少大文件下载时的系统调用和 Python 循环次数
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class StreamDownloadError(Exception):
+    """流式下载失败"""
+    pass
+
+
+def _total_size(response, offset: int) -> Optional[int]:
+    """从 Content-Range / Content-Length 得到文件总大小，未知时返回 None"""
+    match = CONTENT_RANGE_PATTERN.match(response.headers.get('content-range', ''))
+    if match:
+        return int(match.group(3)) if match.group(3) != '*' else None
+    length = response.headers.get('content-length')
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+def stream_to_file(client, url: str, file_path: str,
+                   headers: Optional[Dict[str, str]] = None,
+                   chunk_size: Optional[int] = None,
+                   max_bytes: Optional[int] = None,
+                   max_resumes: Optional[int] = None,
+                   progress: Optional[Callable[[int], None]] = None) -> str:
+    """边下载边写入文件，内存占用与文件大小无关
+
+    数据先写入 file_path + '.part'，下载完成后再改名为 file_path。连接中断时
+    通过 HTTP Range 从 .part 文件末尾继续下载，而不是从头开始；上一次任务留下的
+    .part 文件同样会被续传。
+
+    Args:
+        client: httpx.Client（通常是 services.http）
+        url: 下载地址
+        file_path: 保存路径
+        headers: 额外的请求头
+        chunk_size: 每次读取的字节数，默认 DOWNLOAD_CHUNK_SIZE 或 1MiB
+        max_bytes: 最多下载的字节数，默认 DOWNLOAD_MAX_BYTES，0 或 None 表示不限制。
+            只需要前面一部分音频时使用；截断的文件需要容器把索引放在文件头部才能解码
+        max_resumes: 中断后最多续传的次数，默认 DOWNLOAD_MAX_RESUMES 或 3
+        progress: 每写入一块数据后调用，参数为已下载的字节数；回调抛出的异常会中止下载
+
+    Returns:
+        str: 下载完成的文件路径
+    """
+    import httpx
+
+    chunk_size = chunk_size or int(os.getenv('DOWNLOAD_CHUNK_SIZE', str(DEFAULT_CHUNK_SIZE)))
+    if max_bytes is None:
+        max_bytes = int(os.getenv('DOWNLOAD_MAX_BYTES', '0'))
+    if max_resumes is None:
+        max_resumes = int(os.getenv('DOWNLOAD_MAX_RESUMES', '3'))
+
+    part_path = file_path + '.part'
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset:
+        print(f"发现未完成的下载，从 {offset} 字节处继续")
+
+    resumes = 0
+    # 服务器对 Range 返回 416 而本地没有可用的 .part 时，改为不带 Range 从头下载
+    use_range = True
+    while True:
+        request_headers = dict(headers or {})
+        if use_range and (offset or max_bytes):
+            end = str(max_bytes - 1) if max_bytes else ''
+            request_headers['Range'] = f'bytes={offset}-{end}'
+
+        try:
+            with client.stream('GET', url, headers=request_headers) as response:
+                if response.status_code == 416:
+                    if offset and os.path.exists(part_path):
+                        # 续传的起点已在文件末尾：.part 已经是完整文件
+                        break
+                    if 'Range' in request_headers:
+                        print("服务器拒绝了请求的范围，不带 Range 从头下载")
+                        use_range, offset = False, 0
+                        continue
+                    raise StreamDownloadError("无法下载视频: HTTP 416（请求的范围无效）")
+                if response.status_code not in (200, 206):
+                    raise StreamDownloadError(f"无法下载视频: HTTP {response.status_code}")
+
+                if response.status_code == 200 and offset:
+                    # 服务器不支持 Range，只能从头下载
+                    print("服务器不支持断点续传，从头开始下载")
+                    offset = 0
+                total = _total_size(response, offset)
+
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_bytes(chunk_size):
+                        if max_bytes and offset + len(chunk) >= max_bytes:
+                            f.write(chunk[:max_bytes - offset])
+                            offset = max_bytes
+                            break
+                        f.write(chunk)
+                        offset += len(chunk)
+                        if progress:
+                            progress(offset)
+
+            if max_bytes and offset >= max_bytes:
+                print(f"已下载前 {max_bytes} 字节（达到 DOWNLOAD_MAX_BYTES 上限）")
+                break
+            if total is not None and offset < total:
+                raise httpx.ReadError(f"连接提前关闭: 已下载 {offset}/{total} 字节")
+            break
+        except httpx.TransportError as e:
+            if resumes >= max_resumes:
+                raise StreamDownloadError(f"下载中断且续传次数已用完: {str(e)}") from e
+            resumes += 1
+            print(f"⚠️ 下载中断（{str(e)}），从 {offset} 字节处续传（第 {resumes}/{max_resumes} 次）")
+
+    os.replace(part_path, file_path)
+    return file_path
@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services import env_flag
+
+# 加载环境变量
+load_dotenv()
+
+# 默认的字幕语言优先级：中文优先，然后是其他语言
+DEFAULT_SUBTITLE_LANGS = 'zh-Hans,zh-CN,zh,zh-Hant,zh-TW,zh-HK,en'
+
+# 不是字幕的轨道（B站弹幕、YouTube直播聊天）
+IGNORED_TRACKS = ('danmaku', 'live_chat', 'rechat')
+
+# 能解析的字幕格式，按优先级排列
+SUPPORTED_EXTS = ('json3', 'srt', 'vtt')
+
+
+def subtitle_languages() -> List[str]:
+    return [lang.strip() for lang in os.getenv('SUBTITLE_LANGS', DEFAULT_SUBTITLE_LANGS).split(',') if lang.strip()]
+
+
+def _usable_formats(formats: List[Dict]) -> List[Dict]:
+    """过滤掉无法解析的格式和 YouTube 机器翻译的自动字幕"""
+    usable = [
+        fmt for fmt in formats
+        if fmt.get('ext') in SUPPORTED_EXTS and 'tlang=' not in (fmt.get('url') or '')
+    ]
+    return sorted(usable, key=lambda fmt: SUPPORTED_EXTS.index(fmt['ext']))
+
+
+def select_subtitle_track(info: Dict, languages: Optional[List[str]] = None,
+                          allow_auto: Optional[bool] = None) -> Optional[Tuple[str, str, Dict]]:
+    """选择最合适的字幕轨道
+
+    顺序：按语言优先级的上传者字幕 → 按语言优先级的自动字幕 → 其他语言的上传者字幕 → 其他语言的自动字幕
+
+    Returns:
+        Tuple[str, str, Dict]: (语言, 'manual' 或 'auto', 字幕格式信息)，没有可用字幕时返回 None
+    """
+    languages = languages or subtitle_languages()
+    if allow_auto is None:
+        allow_auto = env_flag('SUBTITLE_ALLOW_AUTO', True)
+
+    sources = [('manual', info.get('subtitles') or {})]
+    if allow_auto:
+        sources.append(('auto', info.get('automatic_captions') or {}))
+
+    def tracks(preferred: bool):
+        for kind, tracks_by_lang in sources:
+            if preferred:
+                langs = [lang for lang in languages if lang in tracks_by_lang]
+            else:
+                langs = sorted(lang for lang in tracks_by_lang if lang not in languages)
+            for lang in langs:
+                if lang in IGNORED_TRACKS:
+                    continue
+                formats = _usable_formats(tracks_by_lang[lang])
+                if formats:
+                    yield lang, kind, formats[0]
+
+    for preferred in (True, False):
+        for track in tracks(preferred):
+            return track
+    return None
+
+
+def _parse_timestamp(value: str) -> float:
+    """解析 00:01:02.345 / 00:01:02,345 / 01:02.345 格式的时间戳"""
+    parts = value.strip().replace(',', '.').split(':')
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_subtitle(text: str, ext: str) -> List[Tuple[float, float, str]]:
+    """把字幕解析为 (开始秒, 结束秒, 文本) 列表"""
+    cues = []
+    if ext == 'json3':
+        data = json.loads(text)
+        for event in data.get('events', []):
+            line = ''.join(seg.get('utf8', '') for seg in event.get('segs') or []).strip()
+            if line:
+                start = event.get('tStartMs', 0) / 1000
+                cues.append((start, start + event.get('dDurationMs', 0) / 1000, line))
+        return cues
+
+    # srt 和 vtt 都是 "开始 --> 结束" 加若干行文本的块结构
+    for block in re.split(r'\n\s*\n', text.replace('\r\n', '\n')):
+        lines = block.strip().split('\n')
+        for i, line in enumerate(lines):
+            if '-->' in line:
+                start, end = line.split('-->')[:2]
+                content = ' '.join(lines[i + 1:])
+                # 去掉 vtt 的内联时间标签和样式标签
+                content = re.sub(r'<[^>]+>', '', content).strip()
+                if content:
+                    cues.append((_parse_timestamp(start), _parse_timestamp(end.split()[0]), content))
+                break
+    return cues
+
+
+class TranscriptSourceStats:
+    """统计转录文本来源（字幕 / ASR），用于衡量字幕快速路径的命中率"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def record(self, source: str) -> None:
+        with self._lock:
+            self._counts[source.split(':', 1)[0]] += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            total = sum(self._counts.values())
+            stats = dict(self._counts)
+        stats['total'] = total
+        stats['subtitle_hit_rate'] = round(stats.get('subtitles', 0) / total, 4) if total else 0.0
+        return stats
+
+
+transcript_source_stats = TranscriptSourceStats()
+
+
+def subtitle_fast_path_enabled() -> bool:
+    return env_flag('SUBTITLE_FAST_PATH', True)
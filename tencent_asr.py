@@ -0,0 +1,577 @@
+import asyncio
+import base64
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from audio_segments import AudioSegment, merge_timed_texts, probe_duration, split_at_silence
+from services import get_services
+
+# 加载环境变量
+load_dotenv()
+
+# 腾讯云录音文件识别的引擎
+DEFAULT_ENGINE_MODEL = "16k_zh_large"
+
+# 轮询间隔的上下限（秒）
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 30.0
+
+# 识别耗时约为音频时长的比例，用于估计第一次轮询的时间
+EXPECTED_RTF = 0.05
+
+# 本地音频以 base64 内联上传（SourceType=1）时，请求中的音频数据不能超过 5MB
+INLINE_MAX_BYTES = 5 * 1024 * 1024
+
+# 上传前统一转为 16kHz 单声道 32kbps opus，减小上传体积
+UPLOAD_AUDIO_ARGS = ['-vn', '-ar', '16000', '-ac', '1', '-c:a', 'libopus', '-b:a', '32k']
+UPLOAD_BYTES_PER_SECOND = 32000 / 8
+
+
+# ResTextFormat=3 的识别结果每行一句：[分:秒.毫秒,分:秒.毫秒]  文本
+RESULT_LINE_PATTERN = re.compile(r'^\[([\d:.]+),([\d:.]+)\]\s*(.*)$')
+
+
+class AsrTaskError(Exception):
+    """腾讯云识别任务失败"""
+    pass
+
+
+class AsrUploadStats:
+    """统计本地音频上传的文件数、分片数、字节数和耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'files': 0, 'chunks': 0, 'source_bytes': 0, 'upload_bytes': 0, 'upload_seconds': 0.0}
+
+    def record_file(self, source_bytes: int) -> None:
+        with self._lock:
+            self._stats['files'] += 1
+            self._stats['source_bytes'] += source_bytes
+
+    def record_upload(self, upload_bytes: int, seconds: float) -> None:
+        with self._lock:
+            self._stats['chunks'] += 1
+            self._stats['upload_bytes'] += upload_bytes
+            self._stats['upload_seconds'] += seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['upload_seconds'] = round(stats['upload_seconds'], 2)
+        return stats
+
+
+asr_upload_stats = AsrUploadStats()
+
+
+def poll_interval(audio_duration: float, elapsed: float,
+                  min_interval: float = MIN_POLL_INTERVAL, max_interval: float = MAX_POLL_INTERVAL) -> float:
+    """下一次查询前等待的秒数
+
+    第一次查询按音频时长估计（长音频不必一提交就开始查询），之后间隔随已等待的时间增长：
+    刚提交时查得勤，等得越久查得越少。
+    """
+    first = min(max_interval, max(min_interval, audio_duration * EXPECTED_RTF))
+    if elapsed <= 0:
+        return first
+    return min(max_interval, max(min_interval, first * 0.5, elapsed * 0.2))
+
+
+class _PendingTask:
+    """一个已提交、尚未完成的识别任务"""
+
+    def __init__(self, task_id: int, future: Future, audio_duration: float, timeout: float,
+                 min_interval: float = MIN_POLL_INTERVAL, max_interval: float = MAX_POLL_INTERVAL):
+        self.task_id = task_id
+        self.future = future
+        self.audio_duration = audio_duration
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.submitted_at = time.monotonic()
+        self.deadline = self.submitted_at + timeout
+        self.polls = 0
+        self.polling = False
+        self.next_poll_at = self.submitted_at + poll_interval(audio_duration, 0, min_interval, max_interval)
+
+    def schedule_next(self, now: float) -> None:
+        interval = poll_interval(self.audio_duration, now - self.submitted_at, self.min_interval, self.max_interval)
+        self.next_poll_at = min(now + interval, self.deadline)
+
+
+def _resolve(future: Future, result=None, error: Optional[BaseException] = None) -> None:
+    """设置 future 的结果，调用方已经取消时忽略"""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class AsrTaskManager:
+    """腾讯云录音文件识别任务管理器
+
+    submit() 提交 CreateRecTask 后立即返回 Future，由一个后台轮询线程统一查询
+    所有未完成任务的 DescribeTaskStatus，查询请求在一个小线程池中并发执行。
+    调用方既可以 future.result() 阻塞等待，也可以在异步代码中
+    await asyncio.wrap_future(future)，等待期间不占用任何线程。
+
+    - 轮询间隔随音频时长和已等待时间自适应（ASR_POLL_MIN_INTERVAL / ASR_POLL_MAX_INTERVAL）
+    - 超过 ASR_TASK_TIMEOUT 秒未完成的任务以 TimeoutError 结束
+    - future.cancel() 或 cancel(task_id) 后不再轮询该任务
+    """
+
+    def __init__(self, secret_id: str, secret_key: str, region: str = "ap-shanghai",
+                 poll_workers: Optional[int] = None, timeout: Optional[float] = None):
+        self.secret_id = secret_id
+        self.secret_key = secret_key
+        self.region = region
+        self.timeout = timeout if timeout is not None else float(os.getenv('ASR_TASK_TIMEOUT', '1800'))
+        self.min_interval = float(os.getenv('ASR_POLL_MIN_INTERVAL', str(MIN_POLL_INTERVAL)))
+        self.max_interval = float(os.getenv('ASR_POLL_MAX_INTERVAL', str(MAX_POLL_INTERVAL)))
+        poll_workers = poll_workers or int(os.getenv('ASR_POLL_WORKERS', '4'))
+
+        self._condition = threading.Condition()
+        self._tasks: Dict[int, _PendingTask] = {}
+        self._poller: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=poll_workers, thread_name_prefix='asr-poll')
+
+    @property
+    def client(self):
+        return get_services().tencent_asr_client(self.secret_id, self.secret_key, self.region)
+
+    def submit(self, audio_url: str, audio_duration: float = 0,
+               engine_model: str = DEFAULT_ENGINE_MODEL, timeout: Optional[float] = None) -> Future:
+        """提交识别任务
+
+        Args:
+            audio_url: 音频文件的公共可访问URL
+            audio_duration: 音频时长（秒），用于估计轮询间隔，未知时为 0
+            engine_model: 引擎模型类型
+            timeout: 任务超时秒数，默认 ASR_TASK_TIMEOUT
+
+        Returns:
+            Future: 结果为识别文本（Data.Result），future.task_id 为腾讯云的 TaskId
+        """
+        req = self._new_request(engine_model)
+        req.SourceType = 0                   # 音频来源：0表示音频URL
+        req.Url = audio_url                  # 音频文件的URL
+
+        print(f"正在提交录音文件识别任务，URL: {audio_url}...")
+        task_id = self.client.CreateRecTask(req).Data.TaskId
+        print(f"任务提交成功，TaskId: {task_id}")
+        return self._track(task_id, audio_duration, timeout)
+
+    def submit_file(self, audio_path: str, audio_duration: float = 0,
+                    engine_model: str = DEFAULT_ENGINE_MODEL, timeout: Optional[float] = None) -> Future:
+        """提交本地音频文件的识别任务（base64 内联上传，文件需不超过 INLINE_MAX_BYTES）"""
+        with open(audio_path, 'rb') as f:
+            data = f.read()
+
+        req = self._new_request(engine_model)
+        req.SourceType = 1                   # 音频来源：1表示请求中的音频数据
+        req.Data = base64.b64encode(data).decode('ascii')
+        req.DataLen = len(data)              # base64 编码前的数据长度
+
+        print(f"正在上传本地音频并提交识别任务（{len(data) / 1024:.0f}KB）...")
+        start = time.time()
+        task_id = self.client.CreateRecTask(req).Data.TaskId
+        asr_upload_stats.record_upload(len(req.Data), time.time() - start)
+        print(f"任务提交成功，TaskId: {task_id}")
+        return self._track(task_id, audio_duration, timeout)
+
+    @staticmethod
+    def _new_request(engine_model: str):
+        from tencentcloud.asr.v20190614 import models
+
+        req = models.CreateRecTaskRequest()
+        req.EngineModelType = engine_model   # 引擎模型类型
+        req.ChannelNum = 1                   # 声道数：1表示单声道
+        req.ResTextFormat = 3                # 返回识别结果的格式
+        return req
+
+    def _track(self, task_id: int, audio_duration: float, timeout: Optional[float]) -> Future:
+        """登记已提交的任务，交给后台轮询线程"""
+        future: Future = Future()
+        future.task_id = task_id
+        task = _PendingTask(task_id, future, audio_duration, timeout or self.timeout,
+                            self.min_interval, self.max_interval)
+        with self._condition:
+            self._tasks[task_id] = task
+            self._ensure_poller()
+            self._condition.notify()
+        return future
+
+    def cancel(self, task_id: int) -> bool:
+        """取消等待某个任务（腾讯云侧的任务不会被中止，只是不再查询）"""
+        with self._condition:
+            task = self._tasks.pop(task_id, None)
+        if not task or not task.future.cancel():
+            return False
+        # 通知 wait()/as_completed() 中等待该 future 的调用方
+        task.future.set_running_or_notify_cancel()
+        return True
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._tasks)
+
+    def _ensure_poller(self) -> None:
+        if self._poller is None or not self._poller.is_alive():
+            self._poller = threading.Thread(target=self._poll_loop, name='asr-poller', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self) -> None:
+        while True:
+            with self._condition:
+                if not self._tasks:
+                    # 没有未完成的任务时退出，下次提交时重新启动
+                    self._poller = None
+                    return
+                now = time.monotonic()
+                due = []
+                for task_id, task in list(self._tasks.items()):
+                    if task.future.cancelled():
+                        del self._tasks[task_id]
+                        task.future.set_running_or_notify_cancel()
+                    elif now >= task.deadline:
+                        del self._tasks[task_id]
+                        _resolve(task.future, error=TimeoutError(
+                            f"识别任务 {task_id} 超过 {task.deadline - task.submitted_at:.0f} 秒未完成"))
+                    elif not task.polling and now >= task.next_poll_at:
+                        task.polling = True
+                        due.append(task)
+
+                for task in due:
+                    self._executor.submit(self._poll_task, task)
+
+                waiting = [task.next_poll_at for task in self._tasks.values() if not task.polling]
+                wait = min(waiting) - now if waiting else self.max_interval
+                self._condition.wait(timeout=max(0.05, min(wait, self.max_interval)))
+
+    def _poll_task(self, task: _PendingTask) -> None:
+        """查询一个任务的状态（在轮询线程池中执行）"""
+        from tencentcloud.asr.v20190614 import models
+
+        done, result, error = False, None, None
+        try:
+            req = models.DescribeTaskStatusRequest()
+            req.TaskId = task.task_id
+            data = self.client.DescribeTaskStatus(req).Data
+            task.polls += 1
+            if data.StatusStr == "success":
+                done, result = True, data.Result
+            elif data.StatusStr in ("failed", "error"):
+                done, error = True, AsrTaskError(f"识别失败，状态: {data.StatusStr}, 错误信息: {data.ErrorMsg}")
+        except Exception as e:
+            # 查询本身出错（网络抖动等）时继续等待，直到任务超时
+            print(f"⚠️ 查询识别任务 {task.task_id} 状态失败: {str(e)}")
+
+        with self._condition:
+            if done:
+                self._tasks.pop(task.task_id, None)
+            else:
+                task.schedule_next(time.monotonic())
+            task.polling = False
+            self._condition.notify()
+        if done:
+            elapsed = time.monotonic() - task.submitted_at
+            print(f"识别任务 {task.task_id} 完成，用时 {elapsed:.0f} 秒，查询 {task.polls} 次")
+            _resolve(task.future, result, error)
+
+
+_managers: Dict[Tuple[str, str, str], AsrTaskManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_asr_manager(secret_id: str, secret_key: str, region: str = "ap-shanghai") -> AsrTaskManager:
+    """获取进程内共享的识别任务管理器（按密钥和区域区分）"""
+    key = (secret_id, secret_key, region)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = AsrTaskManager(secret_id, secret_key, region)
+    return manager
+
+
+def prepare_upload_chunks(audio_path: str, work_dir: str, ffmpeg_path: Optional[str],
+                          max_bytes: Optional[int] = None, audio_duration: float = 0) -> List[str]:
+    """把本地音频转为适合内联上传的文件
+
+    非 opus 文件先转为 16kHz 单声道 32kbps opus；转换后仍超过内联上传上限时，
+    按时长切分为多个分片，每个分片单独提交识别任务。
+
+    Args:
+        audio_path: 本地音频文件
+        work_dir: 存放转换结果和分片的临时目录
+        ffmpeg_path: ffmpeg 路径，为空时只能直接上传原文件
+        max_bytes: base64 编码后的大小上限，默认 ASR_INLINE_MAX_BYTES 或 5MB
+        audio_duration: 音频时长（秒），未知时按目标码率估计
+
+    Returns:
+        List[str]: 按时间顺序排列的待上传文件
+    """
+    max_bytes = max_bytes or int(os.getenv('ASR_INLINE_MAX_BYTES', str(INLINE_MAX_BYTES)))
+    # base64 编码后体积增加 1/3
+    max_raw_bytes = max_bytes * 3 // 4
+
+    upload_path = audio_path
+    if not audio_path.lower().endswith('.opus'):
+        if not ffmpeg_path:
+            if os.path.getsize(audio_path) > max_raw_bytes:
+                raise AsrTaskError("音频文件过大且未找到 ffmpeg，无法压缩或切分后上传")
+            return [audio_path]
+        upload_path = os.path.join(work_dir, 'upload.opus')
+        result = subprocess.run([ffmpeg_path, '-y', '-loglevel', 'error', '-i', audio_path,
+                                 *UPLOAD_AUDIO_ARGS, upload_path], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise AsrTaskError(f"音频转码失败: {result.stderr.strip()}")
+
+    size = os.path.getsize(upload_path)
+    if size <= max_raw_bytes:
+        return [upload_path]
+    if not ffmpeg_path:
+        raise AsrTaskError("音频文件过大且未找到 ffmpeg，无法切分后上传")
+
+    # 按实际码率（时长未知时按目标码率）估计每个分片的时长，留 20% 余量
+    bytes_per_second = size / audio_duration if audio_duration else UPLOAD_BYTES_PER_SECOND
+    segment_seconds = max(30, int(max_raw_bytes * 0.8 / bytes_per_second))
+    pattern = os.path.join(work_dir, 'chunk_%03d.opus')
+    result = subprocess.run([ffmpeg_path, '-y', '-loglevel', 'error', '-i', upload_path,
+                             '-f', 'segment', '-segment_time', str(segment_seconds), '-c', 'copy', pattern],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AsrTaskError(f"音频切分失败: {result.stderr.strip()}")
+
+    chunks = sorted(os.path.join(work_dir, name) for name in os.listdir(work_dir) if name.startswith('chunk_'))
+    oversized = [chunk for chunk in chunks if os.path.getsize(chunk) > max_raw_bytes]
+    if oversized:
+        raise AsrTaskError(f"切分后的分片仍超过上传上限: {os.path.basename(oversized[0])}")
+    print(f"音频 {size / 1024 / 1024:.1f}MB 超过内联上传上限，已切分为 {len(chunks)} 个分片")
+    return chunks
+
+
+def _parse_time(value: str) -> float:
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _format_time(seconds: float) -> str:
+    return f"{int(seconds // 60)}:{seconds % 60:.3f}"
+
+
+def parse_timed_result(result: str) -> List[Tuple[float, float, str]]:
+    """把带时间戳的识别结果解析为 (开始秒, 结束秒, 文本) 列表，没有时间戳的行被忽略"""
+    sentences = []
+    for line in (result or '').splitlines():
+        match = RESULT_LINE_PATTERN.match(line.strip())
+        if match:
+            sentences.append((_parse_time(match.group(1)), _parse_time(match.group(2)), match.group(3)))
+    return sentences
+
+
+def format_timed_result(sentences: List[Tuple[float, float, str]]) -> str:
+    """按腾讯云识别结果的格式输出带时间戳的句子"""
+    return '\n'.join(f"[{_format_time(start)},{_format_time(end)}]  {text}" for start, end, text in sentences)
+
+
+def _split_source(source: str, work_dir: str, audio_duration: float) -> List[AudioSegment]:
+    """长音频先在静音处切分，各分段作为独立任务同时识别"""
+    ffmpeg_path = get_services().ffmpeg_path
+    if ffmpeg_path:
+        return split_at_silence(source, work_dir, ffmpeg_path, UPLOAD_AUDIO_ARGS, '.opus', duration=audio_duration)
+    return [AudioSegment(source, 0.0, audio_duration or float('inf'), 0.0)]
+
+
+def _segment_chunks(segment: AudioSegment, work_dir: str) -> List[Tuple[float, str, float]]:
+    """把一个分段转为待上传的分片（超过上传上限时再按大小切分），返回各分片的 (分段内起始秒数, 文件, 时长)"""
+    ffmpeg_path = get_services().ffmpeg_path
+    # 分段文件自身的时长（含前后重叠部分），最后一段不知道结尾时为 0
+    file_end = segment.file_end
+    segment_duration = file_end - segment.file_start if file_end is not None and file_end != float('inf') else 0
+    chunk_dir = tempfile.mkdtemp(prefix='chunks_', dir=work_dir)
+    chunks = prepare_upload_chunks(segment.path, chunk_dir, ffmpeg_path, audio_duration=segment_duration)
+
+    planned = []
+    offset = 0.0
+    for chunk in chunks:
+        chunk_duration = probe_duration(ffmpeg_path, chunk) if len(chunks) > 1 else segment_duration
+        planned.append((offset, chunk, chunk_duration))
+        offset += chunk_duration
+    return planned
+
+
+def _recognize_segment(manager: AsrTaskManager, segment: AudioSegment, work_dir: str) -> List[Tuple[float, Future]]:
+    """提交一个分段的所有分片，返回各分片在分段内的起始秒数和 Future"""
+    return [(offset, manager.submit_file(chunk, duration))
+            for offset, chunk, duration in _segment_chunks(segment, work_dir)]
+
+
+def _shifted_sentences(chunk_results: List[Tuple[float, str]]) -> List[Tuple[float, float, str]]:
+    """把各分片的识别结果换算为分段内的时间"""
+    sentences = []
+    for offset, result in chunk_results:
+        sentences.extend((start + offset, end + offset, text) for start, end, text in parse_timed_result(result))
+    return sentences
+
+
+def _merge_results(segments: List[AudioSegment], results: List[List[Tuple[float, str]]]) -> str:
+    """合并各分段各分片的识别结果：时间戳换算为整段音频的时间，去掉相邻分段重叠部分的重复句子"""
+    if len(results) == 1 and len(results[0]) == 1:
+        return results[0][0][1]
+
+    timed = [_shifted_sentences(chunk_results) for chunk_results in results]
+    if not any(timed):
+        return '\n'.join(result for chunk_results in results for _, result in chunk_results if result)
+    return format_timed_result(merge_timed_texts(segments, timed))
+
+
+def recognize_audio(source: str, secret_id: str, secret_key: str, region: str = "ap-shanghai",
+                    audio_duration: float = 0) -> Optional[str]:
+    """识别音频：本地文件内联上传，其他视为可公开访问的URL
+
+    本地文件会转为 16kHz 单声道 opus 后以 base64 上传（SourceType=1），过大时切分为多个分片，
+    所有分片同时提交，结果按顺序拼接。
+
+    Returns:
+        str: 识别结果，失败时返回 None
+    """
+    if not os.path.isfile(source):
+        return recognize_audio_from_url(source, secret_id, secret_key, region, audio_duration)
+
+    # 按需加载腾讯云SDK
+    from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+
+    try:
+        manager = get_asr_manager(secret_id, secret_key, region)
+        asr_upload_stats.record_file(os.path.getsize(source))
+        with tempfile.TemporaryDirectory(prefix='asr_upload_') as work_dir:
+            segments = _split_source(source, work_dir, audio_duration)
+            submitted = [_recognize_segment(manager, segment, work_dir) for segment in segments]
+
+        print("正在等待识别结果...")
+        results = [[(offset, future.result() or '') for offset, future in futures] for futures in submitted]
+        return _merge_results(segments, results)
+    except TencentCloudSDKException as err:
+        print(f"腾讯云SDK异常: {err}")
+    except AsrTaskError as e:
+        print(f"\n{str(e)}")
+    except Exception as e:
+        print(f"发生未知错误: {e}")
+
+
+def recognize_audio_from_url(audio_url, secret_id, secret_key, region="ap-shanghai", audio_duration=0):
+    """
+    使用腾讯云ASR的CreateRecTask API识别录音文件（通过URL方式）。
+
+    Args:
+        audio_url (str): 音频文件的公共可访问URL。
+        secret_id (str): 您的腾讯云SecretId。
+        secret_key (str): 您的腾讯云SecretKey。
+        region (str): 腾讯云服务区域，默认为“ap-shanghai”。
+        audio_duration (float): 音频时长（秒），用于估计轮询间隔。
+
+    Returns:
+        str: 识别结果，失败时返回 None
+    """
+    # 按需加载腾讯云SDK
+    from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+
+    try:
+        future = get_asr_manager(secret_id, secret_key, region).submit(audio_url, audio_duration)
+        print("正在等待识别结果...")
+        return future.result()
+    except TencentCloudSDKException as err:
+        print(f"腾讯云SDK异常: {err}")
+    except AsrTaskError as e:
+        print(f"\n{str(e)}")
+    except Exception as e:
+        print(f"发生未知错误: {e}")
+
+
+async def _wait_for_task_async(client, task_id: int, audio_duration: float, timeout: Optional[float]) -> str:
+    """在事件循环中轮询识别任务直到完成，轮询间隔与 AsrTaskManager 相同"""
+    timeout = timeout if timeout is not None else float(os.getenv('ASR_TASK_TIMEOUT', '1800'))
+    min_interval = float(os.getenv('ASR_POLL_MIN_INTERVAL', str(MIN_POLL_INTERVAL)))
+    max_interval = float(os.getenv('ASR_POLL_MAX_INTERVAL', str(MAX_POLL_INTERVAL)))
+
+    start = time.monotonic()
+    elapsed = 0.0
+    while True:
+        interval = poll_interval(audio_duration, elapsed, min_interval, max_interval)
+        if elapsed + interval > timeout:
+            raise TimeoutError(f"识别任务 {task_id} 超过 {timeout:.0f} 秒未完成")
+        await asyncio.sleep(interval)
+
+        data = await client.describe_task_status(task_id)
+        status = data.get('StatusStr')
+        if status == "success":
+            return data.get('Result')
+        if status in ("failed", "error"):
+            raise AsrTaskError(f"识别失败，状态: {status}, 错误信息: {data.get('ErrorMsg')}")
+        elapsed = time.monotonic() - start
+
+
+async def _recognize_chunk_async(client, audio_path: str, audio_duration: float, timeout: Optional[float]) -> str:
+    """内联上传一个本地分片并等待识别结果"""
+    with open(audio_path, 'rb') as f:
+        data = f.read()
+
+    print(f"正在上传本地音频并提交识别任务（{len(data) / 1024:.0f}KB）...")
+    start = time.time()
+    task_id = await client.create_rec_task(audio_data=data)
+    # 上传的是 base64 编码后的数据
+    asr_upload_stats.record_upload((len(data) + 2) // 3 * 4, time.time() - start)
+    print(f"任务提交成功，TaskId: {task_id}")
+    return await _wait_for_task_async(client, task_id, audio_duration, timeout) or ''
+
+
+async def recognize_audio_async(source: str, secret_id: str, secret_key: str, region: str = "ap-shanghai",
+                                audio_duration: float = 0, timeout: Optional[float] = None) -> str:
+    """recognize_audio 的异步版本，使用原生异步客户端，等待期间不占用线程
+
+    本地文件与 recognize_audio 相同：转为 opus 后内联上传，长音频在静音处切分、过大时再切分为多个分片，
+    所有分片同时提交并在事件循环中轮询，结果按顺序合并。其他视为可公开访问的URL。
+    与同步版本不同，失败时抛出异常而不是返回 None。
+
+    Raises:
+        AsrTaskError: 识别失败
+        TimeoutError: 超过 timeout（默认 ASR_TASK_TIMEOUT）秒未完成
+        TencentCloudError: 接口调用失败
+    """
+    client = get_services().tencent_async_client(secret_id, secret_key, region)
+    if not os.path.isfile(source):
+        task_id = await client.create_rec_task(source)
+        print(f"任务提交成功，TaskId: {task_id}")
+        return await _wait_for_task_async(client, task_id, audio_duration, timeout)
+
+    asr_upload_stats.record_file(os.path.getsize(source))
+    with tempfile.TemporaryDirectory(prefix='asr_upload_') as work_dir:
+        # 切分和转码是 ffmpeg 子进程，放到线程中执行，不阻塞事件循环
+        segments = await asyncio.to_thread(_split_source, source, work_dir, audio_duration)
+        planned = await asyncio.to_thread(lambda: [_segment_chunks(segment, work_dir) for segment in segments])
+
+        tasks = [[asyncio.ensure_future(_recognize_chunk_async(client, chunk, duration, timeout))
+                  for _, chunk, duration in chunks] for chunks in planned]
+        pending = [task for chunk_tasks in tasks for task in chunk_tasks]
+        try:
+            await asyncio.gather(*pending)
+        finally:
+            # 任一分片失败（或调用方取消）时不再轮询其余分片
+            for task in pending:
+                task.cancel()
+
+    results = [[(offset, task.result()) for (offset, _, _), task in zip(chunks, chunk_tasks)]
+               for chunks, chunk_tasks in zip(planned, tasks)]
+    return _merge_results(segments, results)
@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# 各产品的接口版本
+TENCENT_API_VERSIONS = {
+    'asr': '2019-06-14',
+    'ocr': '2018-11-19',
+}
+
+SIGN_ALGORITHM = 'TC3-HMAC-SHA256'
+CONTENT_TYPE = 'application/json; charset=utf-8'
+SIGNED_HEADERS = 'content-type;host;x-tc-action'
+
+
+class TencentCloudError(Exception):
+    """腾讯云 API 返回的错误"""
+
+    def __init__(self, code: str, message: str, request_id: Optional[str] = None):
+        self.code = code
+        self.message = message
+        self.request_id = request_id
+        super().__init__(f"[{code}] {message}")
+
+
+def _hmac_sha256(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+def tc3_authorization(secret_id: str, secret_key: str, service: str, host: str, action: str,
+                      payload: bytes, timestamp: int) -> str:
+    """按 TC3-HMAC-SHA256 规则计算 Authorization 请求头
+
+    签名覆盖 content-type、host、x-tc-action 三个请求头和请求体。
+    """
+    date = datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%d')
+
+    # 1. 规范请求串
+    canonical_headers = f"content-type:{CONTENT_TYPE}\nhost:{host}\nx-tc-action:{action.lower()}\n"
+    canonical_request = '\n'.join([
+        'POST', '/', '',
+        canonical_headers, SIGNED_HEADERS,
+        hashlib.sha256(payload).hexdigest(),
+    ])
+
+    # 2. 待签名字符串
+    credential_scope = f"{date}/{service}/tc3_request"
+    string_to_sign = '\n'.join([
+        SIGN_ALGORITHM, str(timestamp), credential_scope,
+        hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+    ])
+
+    # 3. 派生签名密钥并计算签名
+    secret_date = _hmac_sha256(('TC3' + secret_key).encode('utf-8'), date)
+    secret_service = _hmac_sha256(secret_date, service)
+    secret_signing = _hmac_sha256(secret_service, 'tc3_request')
+    signature = hmac.new(secret_signing, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    return (f"{SIGN_ALGORITHM} Credential={secret_id}/{credential_scope}, "
+            f"SignedHeaders={SIGNED_HEADERS}, Signature={signature}")
+
+
+class AsyncTencentCloudClient:
+    """腾讯云 API 的原生异步客户端
+
+    只实现项目用到的几个接口（CreateRecTask、DescribeTaskStatus、GeneralFastOCR），
+    自己完成 TC3 签名，请求通过共享的 httpx.AsyncClient 发出，异步接口中可以直接
+    await，不需要把同步 SDK 放进线程池。客户端本身不绑定事件循环，可以在多个事件循环中使用。
+    """
+
+    def __init__(self, secret_id: str, secret_key: str, region: str = "ap-shanghai",
+                 http=None, endpoints: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            secret_id / secret_key: 腾讯云密钥
+            region: 区域
+            http: httpx.AsyncClient，默认每次请求使用当前事件循环的 services.async_http
+            endpoints: 产品 -> 接口地址，默认 https://<产品>.tencentcloudapi.com（用于指向本地测试服务）
+        """
+        self.secret_id = secret_id
+        self.secret_key = secret_key
+        self.region = region
+        self._http = http
+        self.endpoints = endpoints or {}
+
+    @property
+    def http(self):
+        if self._http is not None:
+            return self._http
+        from services import get_services
+        return get_services().async_http
+
+    def _endpoint(self, service: str) -> str:
+        return self.endpoints.get(service) or f"https://{service}.tencentcloudapi.com"
+
+    async def call(self, service: str, action: str, params: Dict) -> Dict:
+        """调用一个接口，返回 Response 中的内容，接口报错时抛出 TencentCloudError"""
+        endpoint = self._endpoint(service)
+        host = urlsplit(endpoint).netloc
+        payload = json.dumps(params, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        timestamp = int(time.time())
+
+        headers = {
+            'Authorization': tc3_authorization(self.secret_id, self.secret_key, service, host,
+                                               action, payload, timestamp),
+            'Content-Type': CONTENT_TYPE,
+            'Host': host,
+            'X-TC-Action': action,
+            'X-TC-Timestamp': str(timestamp),
+            'X-TC-Version': TENCENT_API_VERSIONS[service],
+            'X-TC-Region': self.region,
+        }
+        response = await self.http.post(endpoint, content=payload, headers=headers)
+        response.raise_for_status()
+
+        body = response.json().get('Response', {})
+        error = body.get('Error')
+        if error:
+            raise TencentCloudError(error.get('Code', 'Unknown'), error.get('Message', ''), body.get('RequestId'))
+        return body
+
+    async def create_rec_task(self, audio_url: Optional[str] = None, audio_data: Optional[bytes] = None,
+                              engine_model: str = "16k_zh_large", **params) -> int:
+        """提交录音文件识别任务，返回 TaskId
+
+        Args:
+            audio_url: 音频URL（SourceType=0）
+            audio_data: 音频文件内容，base64 内联上传（SourceType=1），不超过 5MB
+        """
+        if audio_url:
+            source = {'SourceType': 0, 'Url': audio_url}
+        else:
+            source = {'SourceType': 1, 'Data': base64.b64encode(audio_data).decode('ascii'),
+                      'DataLen': len(audio_data)}
+        body = await self.call('asr', 'CreateRecTask', {
+            'EngineModelType': engine_model,
+            'ChannelNum': 1,
+            'ResTextFormat': 3,
+            **source,
+            **params,
+        })
+        return body['Data']['TaskId']
+
+    async def describe_task_status(self, task_id: int) -> Dict:
+        """查询识别任务状态，返回 Data（包含 StatusStr、Result、ErrorMsg 等）"""
+        body = await self.call('asr', 'DescribeTaskStatus', {'TaskId': task_id})
+        return body['Data']
+
+    async def general_fast_ocr(self, image_url: Optional[str] = None, image_base64: Optional[str] = None) -> Dict:
+        """通用印刷体识别（高速版），返回完整的 Response"""
+        params = {'ImageUrl': image_url} if image_url else {'ImageBase64': image_base64}
+        return await self.call('ocr', 'GeneralFastOCR', params)
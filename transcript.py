@@ -0,0 +1,153 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 相邻句子间隔超过该秒数时另起一段
+PARAGRAPH_GAP_SECONDS = 2.0
+# 单段的最大字数
+PARAGRAPH_MAX_CHARS = 300
+
+
+def _join(parts: List[str]) -> str:
+    """拼接句子：中文之间不加空格，英文单词之间用空格分隔"""
+    text = ''
+    for part in parts:
+        if not part:
+            continue
+        if text and (text[-1].isascii() and part[0].isascii()):
+            text += ' '
+        text += part
+    return text
+
+
+class Transcript:
+    """带时间戳的转录文本
+
+    用三个平行数组保存每句话的开始秒数、结束秒数和文本，开始时间按升序排列，
+    按时间查找句子用二分查找（O(log n)）。没有时间戳的文本（timed=False）
+    每个元素是一个段落，时间均为 0。
+
+    str(transcript) 得到按段落组织的纯文本（段落之间用空行分隔），用于保存笔记和交给 AI 整理；
+    to_dict() / from_dict() 用于序列化。
+    """
+
+    __slots__ = ('starts', 'ends', 'texts', 'timed')
+
+    def __init__(self, starts: Iterable[float] = (), ends: Iterable[float] = (),
+                 texts: Iterable[str] = (), timed: bool = True):
+        self.starts = array('d', starts)
+        self.ends = array('d', ends)
+        self.texts = list(texts)
+        self.timed = timed
+        if not len(self.starts) == len(self.ends) == len(self.texts):
+            raise ValueError("starts / ends / texts 的长度不一致")
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Tuple[float, float, str]]) -> 'Transcript':
+        """从 (开始秒, 结束秒, 文本) 列表创建
+
+        按开始时间排序，去掉空句子；自动字幕是滚动显示的，相邻的重复句子会合并为一句。
+        """
+        transcript = cls()
+        for start, end, text in sorted(segments, key=lambda segment: segment[0]):
+            text = text.strip()
+            if not text:
+                continue
+            if transcript.texts and transcript.texts[-1] == text:
+                transcript.ends[-1] = max(transcript.ends[-1], end)
+                continue
+            transcript.starts.append(start)
+            transcript.ends.append(end)
+            transcript.texts.append(text)
+        return transcript
+
+    @classmethod
+    def from_text(cls, text: str) -> 'Transcript':
+        """从没有时间戳的纯文本创建，每个段落作为一个元素"""
+        paragraphs = [para.strip() for para in (text or '').split('\n\n') if para.strip()]
+        return cls([0.0] * len(paragraphs), [0.0] * len(paragraphs), paragraphs, timed=False)
+
+    @classmethod
+    def from_whisper(cls, result: Dict) -> 'Transcript':
+        """从 whisper 的 transcribe 结果创建，使用其中的 segments"""
+        segments = result.get('segments')
+        if not segments:
+            return cls.from_text(result.get('text', ''))
+        return cls.from_segments((item['start'], item['end'], item['text']) for item in segments)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Transcript':
+        return cls(data['start'], data['end'], data['text'], data.get('timed', True))
+
+    def to_dict(self) -> Dict:
+        """序列化为 {'start': [...], 'end': [...], 'text': [...], 'timed': bool}"""
+        return {
+            'start': [round(value, 3) for value in self.starts],
+            'end': [round(value, 3) for value in self.ends],
+            'text': list(self.texts),
+            'timed': self.timed,
+        }
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __bool__(self) -> bool:
+        return bool(self.texts)
+
+    def __getitem__(self, index: int) -> Tuple[float, float, str]:
+        return self.starts[index], self.ends[index], self.texts[index]
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        return zip(self.starts, self.ends, self.texts)
+
+    def __str__(self) -> str:
+        return self.text
+
+    @property
+    def duration(self) -> float:
+        return self.ends[-1] if self.texts else 0.0
+
+    def index_at(self, seconds: float) -> int:
+        """返回 seconds 时刻正在说（或最近说过）的句子下标，早于第一句时返回 -1"""
+        return bisect_right(self.starts, seconds) - 1
+
+    def segment_at(self, seconds: float) -> Optional[Tuple[float, float, str]]:
+        """返回 seconds 时刻正在说的句子，处于句间空白时返回 None"""
+        index = self.index_at(seconds)
+        if index < 0 or seconds >= self.ends[index]:
+            return None
+        return self[index]
+
+    def slice(self, start: float, end: float) -> 'Transcript':
+        """截取开始时间落在 [start, end) 内的句子"""
+        i = bisect_left(self.starts, start)
+        j = bisect_left(self.starts, end)
+        return Transcript(self.starts[i:j], self.ends[i:j], self.texts[i:j], self.timed)
+
+    def paragraph_spans(self, gap: float = PARAGRAPH_GAP_SECONDS,
+                        max_chars: int = PARAGRAPH_MAX_CHARS) -> List[Tuple[int, int]]:
+        """按停顿把句子分组为段落，返回每段的下标范围 [i, j)
+
+        相邻句子间隔超过 gap 秒，或当前段落超过 max_chars 字时另起一段；没有时间戳时每个元素就是一段。
+        """
+        if not self.timed:
+            return [(i, i + 1) for i in range(len(self))]
+
+        spans = []
+        first = 0
+        length = 0
+        for i, text in enumerate(self.texts):
+            if i > first and (self.starts[i] - self.ends[i - 1] >= gap or length >= max_chars):
+                spans.append((first, i))
+                first, length = i, 0
+            length += len(text)
+        if self.texts:
+            spans.append((first, len(self.texts)))
+        return spans
+
+    def paragraphs(self) -> List[str]:
+        return [_join(self.texts[i:j]) for i, j in self.paragraph_spans()]
+
+    @property
+    def text(self) -> str:
+        return '\n\n'.join(self.paragraphs())
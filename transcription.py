@@ -0,0 +1,292 @@
+import asyncio
+import os
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+
+from audio_extract import asr_output_args
+from audio_segments import plan_segments, split_at_silence
+from pcm_cache import SAMPLE_RATE, AudioDecodeError, decode_pcm, encode_pcm, load_pcm, save_pcm
+from services import get_services
+from transcript import Transcript
+from vad import SpeechMap, detect_speech, speech_only, vad_enabled
+from whisper_batching import WhisperBatchServer, batching_enabled
+from whisper_models import FASTER_WHISPER, OPENAI_WHISPER, decoding_options, get_whisper_manager
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 加载环境变量
+load_dotenv()
+
+# 未指定时使用的转录后端（TRANSCRIBE_BACKEND 环境变量可覆盖）
+DEFAULT_BACKEND = 'tencent'
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(('http://', 'https://'))
+
+
+def fetch_audio(url: str, work_dir: str) -> Union[str, 'np.ndarray']:
+    """获取音频URL的内容用于本地转录
+
+    优先边下载边用 ffmpeg 解码为 16kHz PCM，不落盘；容器不支持流式解码时
+    （例如索引在文件末尾的 mp4），退回到先下载到 work_dir 再转录。
+
+    Returns:
+        np.ndarray 或 str: 音频采样，或下载到本地的文件路径
+    """
+    from audio_stream import AudioStreamError, stream_pcm
+    from stream_download import stream_to_file
+
+    services = get_services()
+    if services.ffmpeg_path:
+        try:
+            return stream_pcm(services.http, url, services.ffmpeg_path)
+        except AudioStreamError as e:
+            print(f"⚠️ {str(e)}，改为先下载再转录")
+    os.makedirs(work_dir, exist_ok=True)
+    return stream_to_file(services.http, url, os.path.join(work_dir, 'audio'))
+
+
+class TranscriptionBackend:
+    """转录后端接口
+
+    transcribe 接受本地文件路径、音频URL或已解码的 16kHz float32 采样，
+    所有后端都返回带时间戳的 Transcript，失败时抛出异常。
+    """
+
+    # 后端名称（get_backend 使用的键）
+    name = ''
+    # 下载时提取的音频格式（audio_extract.ASR_AUDIO_TARGETS 的键）
+    audio_format = 'tencent'
+    # 是否可以直接处理音频URL（不需要先下载到本地）
+    accepts_url = False
+
+    def transcribe(self, audio: Union[str, 'np.ndarray'], work_dir: Optional[str] = None,
+                   profile: Optional[str] = None) -> Transcript:
+        """转录音频
+
+        Args:
+            audio: 本地文件路径、音频URL或 16kHz float32 采样
+            work_dir: 可写的工作目录（PCM 缓存、临时音频），通常在任务工作区内；为 None 时使用临时目录
+            profile: 解码配置（fast / balanced / accurate），只对本地 Whisper 后端有效
+        """
+        if work_dir:
+            return self._transcribe(audio, work_dir, profile)
+        with tempfile.TemporaryDirectory(prefix=f'transcribe_{self.name}_') as scratch:
+            return self._transcribe(audio, scratch, profile)
+
+    async def transcribe_async(self, audio: Union[str, 'np.ndarray'], work_dir: Optional[str] = None,
+                               profile: Optional[str] = None) -> Transcript:
+        """transcribe 的异步版本，参数相同；默认在线程中执行 transcribe，不阻塞事件循环"""
+        return await asyncio.to_thread(self.transcribe, audio, work_dir, profile)
+
+    def _transcribe(self, audio: Union[str, 'np.ndarray'], work_dir: str, profile: Optional[str]) -> Transcript:
+        raise NotImplementedError
+
+
+class TencentAsrBackend(TranscriptionBackend):
+    """腾讯云录音文件识别
+
+    URL 由腾讯云直接拉取；本地文件先解码做语音活动检测，只上传语音部分（内联上传），
+    识别结果的时间戳再换算回原音频。
+    """
+
+    name = 'tencent'
+    audio_format = 'tencent'
+    accepts_url = True
+
+    def __init__(self, secret_id: Optional[str] = None, secret_key: Optional[str] = None,
+                 region: str = "ap-shanghai"):
+        self.secret_id = secret_id or os.getenv("SECRET_ID")
+        self.secret_key = secret_key or os.getenv("SECRET_KEY")
+        self.region = region
+
+    def _transcribe(self, audio: Union[str, 'np.ndarray'], work_dir: str, profile: Optional[str]) -> Transcript:
+        from tencent_asr import recognize_audio
+
+        audio, speech = self._speech_audio(audio, work_dir)
+        result = recognize_audio(audio, self.secret_id, self.secret_key, self.region)
+        if not result:
+            # recognize_audio 在识别任务失败或超时时返回 None
+            raise RuntimeError("腾讯云语音识别失败或超时，没有返回识别结果")
+        return self._to_transcript(result, speech)
+
+    async def transcribe_async(self, audio: Union[str, 'np.ndarray'], work_dir: Optional[str] = None,
+                               profile: Optional[str] = None) -> Transcript:
+        """用原生异步客户端提交和轮询识别任务，只有解码和语音活动检测在线程中执行"""
+        from tencent_asr import recognize_audio_async
+
+        with tempfile.TemporaryDirectory(prefix=f'transcribe_{self.name}_') as scratch:
+            audio, speech = await asyncio.to_thread(self._speech_audio, audio, work_dir or scratch)
+            result = await recognize_audio_async(audio, self.secret_id, self.secret_key, self.region)
+        if not result:
+            raise RuntimeError("腾讯云语音识别没有返回识别结果")
+        return self._to_transcript(result, speech)
+
+    def _speech_audio(self, audio: Union[str, 'np.ndarray'], work_dir: str) -> Tuple[str, Optional[SpeechMap]]:
+        """确定要上传的音频：URL 原样返回；本地音频尽量只保留语音部分，返回上传的音频和时间映射"""
+        ffmpeg_path = get_services().ffmpeg_path
+        speech = None
+        if not isinstance(audio, str):
+            # 已解码的采样需要重新编码为音频文件再上传
+            if not ffmpeg_path:
+                raise RuntimeError("上传已解码的音频需要 ffmpeg")
+            pcm, speech = speech_only(audio)
+            audio = self._encode(ffmpeg_path, pcm, work_dir)
+        elif ffmpeg_path and os.path.isfile(audio) and vad_enabled():
+            try:
+                pcm, speech = speech_only(load_pcm(decode_pcm(ffmpeg_path, audio, work_dir)))
+                if speech:
+                    audio = self._encode(ffmpeg_path, pcm, work_dir)
+            except AudioDecodeError as e:
+                print(f"⚠️ {str(e)}，将上传完整音频")
+                speech = None
+        return audio, speech
+
+    @staticmethod
+    def _to_transcript(result: str, speech: Optional[SpeechMap]) -> Transcript:
+        from tencent_asr import parse_timed_result
+
+        # ResTextFormat=3 的结果每行一句 "[开始,结束]  文本"，没有时间戳时按纯文本处理
+        sentences = parse_timed_result(result)
+        transcript = Transcript.from_segments(sentences) if sentences else Transcript.from_text(result)
+        return speech.remap(transcript) if speech else transcript
+
+    @staticmethod
+    def _encode(ffmpeg_path: str, pcm, work_dir: str) -> str:
+        output_args, ext = asr_output_args('tencent')
+        return encode_pcm(ffmpeg_path, pcm, os.path.join(work_dir, f'speech{ext}'), output_args)
+
+
+class WhisperBackend(TranscriptionBackend):
+    """本地 Whisper 转录（openai-whisper）
+
+    音频文件只解码一次，保存为内存映射的 PCM 缓存，先经过语音活动检测只转录语音部分，
+    CPU 上的长音频在静音处切分后用进程池并行转录。开启 WHISPER_BATCHING 后，
+    所有任务改为共用进程内的动态批处理推理服务（见 whisper_batching）。
+    """
+
+    name = 'whisper'
+    engine = OPENAI_WHISPER
+    audio_format = 'whisper'
+
+    def __init__(self, models=None):
+        # 模型由进程内共享的管理器按需加载，空闲超时后自动卸载
+        self.models = models or get_whisper_manager(self.engine)
+        # 跨请求的动态批处理只支持 openai-whisper
+        self.batch_server = WhisperBatchServer(self.models) if self.engine == OPENAI_WHISPER else None
+
+    def options(self, profile: Optional[str] = None) -> Dict:
+        """transcribe 参数：语言、提示词和解码配置（WHISPER_PROFILE，默认 balanced）"""
+        language = self.models.language
+        return dict(
+            decoding_options(profile),
+            language=language,
+            task='transcribe',
+            # 中文时添加提示，引导输出简体中文和标点
+            initial_prompt="以下是一段视频的转录内容。请用流畅的中文输出。" if language == 'zh' else None
+        )
+
+    def _transcribe(self, audio: Union[str, 'np.ndarray'], work_dir: str, profile: Optional[str]) -> Transcript:
+        ffmpeg_path = get_services().ffmpeg_path
+        options = self.options(profile)
+        if isinstance(audio, str) and is_url(audio):
+            audio = fetch_audio(audio, work_dir)
+
+        pcm_path = None
+        if isinstance(audio, str) and ffmpeg_path:
+            try:
+                pcm_path = decode_pcm(ffmpeg_path, audio, work_dir)
+                audio = load_pcm(pcm_path)
+            except AudioDecodeError as e:
+                print(f"⚠️ {str(e)}，由 whisper 直接读取音频文件")
+
+        speech = None
+        if not isinstance(audio, str):
+            # 跳过静音，避免 Whisper 在静音上编造文字
+            audio, speech = speech_only(audio)
+            if speech:
+                pcm_path = None
+
+        if self.batch_server and batching_enabled():
+            # 与其他任务的窗口一起批量解码，不再启动分段进程池
+            print("正在转录音频（动态批处理）...")
+            sentences = self.batch_server.transcribe(audio, options)
+        else:
+            sentences = self._transcribe_segmented(audio, options, work_dir, pcm_path, speech)
+        if sentences is None:
+            print("正在转录音频（这可能需要几分钟）...")
+            sentences = self.models.transcribe(audio, options)
+        transcript = Transcript.from_segments(sentences)
+        return speech.remap(transcript) if speech else transcript
+
+    def _transcribe_segmented(self, audio: Union[str, 'np.ndarray'], options: Dict, work_dir: str,
+                              pcm_path: Optional[str] = None, speech: Optional[SpeechMap] = None):
+        """长音频在静音处切分后用进程池并行转录
+
+        只在 CPU 上、有多个工作进程且音频长于一个分段时使用，否则返回 None 由调用方整段转录。
+        已解码的音频按 VAD 找到的静音规划切点，保存为 PCM 缓存后各进程直接截取自己的分段，不写分段文件。
+        """
+        ffmpeg_path = get_services().ffmpeg_path
+        workers = self.models.segment_workers()
+        if workers <= 1 or not ffmpeg_path or self.models.resolve_device() != 'cpu':
+            return None
+
+        if not isinstance(audio, str):
+            silences = speech.compact_gaps() if speech else detect_speech(audio).gaps()
+            segments = plan_segments(pcm_path, ffmpeg_path, duration=len(audio) / SAMPLE_RATE,
+                                     silences=silences)
+            if len(segments) == 1:
+                return None
+            pcm_path = pcm_path or save_pcm(audio, work_dir, 'speech' if speech else 'audio')
+            for segment in segments:
+                segment.path = pcm_path
+            return self.models.transcribe_parallel(segments, options, workers)
+
+        output_args, ext = asr_output_args(self.audio_format)
+        with tempfile.TemporaryDirectory(prefix='whisper_segments_', dir=work_dir) as segment_dir:
+            segments = split_at_silence(audio, segment_dir, ffmpeg_path, output_args, ext)
+            if len(segments) == 1:
+                return None
+            return self.models.transcribe_parallel(segments, options, workers)
+
+
+class FasterWhisperBackend(WhisperBackend):
+    """本地 Whisper 转录（faster-whisper / CTranslate2）
+
+    CPU 上默认使用 int8 量化（FASTER_WHISPER_COMPUTE_TYPE），速度是 openai-whisper fp32 的数倍，
+    解码、语音活动检测和分段并行与 WhisperBackend 相同。
+    """
+
+    name = 'faster-whisper'
+    engine = FASTER_WHISPER
+
+
+BACKENDS = {backend.name: backend for backend in (TencentAsrBackend, WhisperBackend, FasterWhisperBackend)}
+
+_backends: Dict[str, TranscriptionBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def backend_name(name: Optional[str] = None, default: str = DEFAULT_BACKEND) -> str:
+    """确定转录后端：显式指定 > TRANSCRIBE_BACKEND 环境变量 > default"""
+    name = (name or os.getenv('TRANSCRIBE_BACKEND') or default).strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"未知的转录后端: {name}（可选：{', '.join(BACKENDS)}）")
+    return name
+
+
+def get_backend(name: Optional[str] = None, default: str = DEFAULT_BACKEND) -> TranscriptionBackend:
+    """获取进程内共享的转录后端实例"""
+    name = backend_name(name, default)
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = BACKENDS[name]()
+    return backend
@@ -0,0 +1,212 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from pcm_cache import SAMPLE_RATE, pcm_view
+from services import env_flag
+from transcript import Transcript
+
+# 加载环境变量
+load_dotenv()
+
+# 计算能量的帧长（毫秒）
+FRAME_MS = 30
+# 噪声底（能量第 10 百分位）之上多少 dB 视为语音
+DEFAULT_MARGIN_DB = 12.0
+# 绝对下限：低于该能量（dBFS）的帧一定是静音
+DEFAULT_MIN_DB = -50.0
+# 短于该秒数的停顿不跳过（句间停顿保留给转录）
+DEFAULT_MIN_SILENCE_SECONDS = 1.0
+# 短于该秒数的语音视为噪声（咳嗽、按键声等）
+DEFAULT_MIN_SPEECH_SECONDS = 0.2
+# 每段语音前后保留的秒数，避免切掉字头字尾
+DEFAULT_PADDING_SECONDS = 0.25
+
+
+def vad_enabled() -> bool:
+    return env_flag('VAD_ENABLED', True)
+
+
+class SpeechMap:
+    """语音区间以及“只保留语音的紧凑音频”与原音频之间的时间映射
+
+    regions 是原音频中的语音区间（秒），紧凑音频按顺序拼接这些区间；
+    转录紧凑音频得到的时间戳用 to_original / remap 换算回原音频的时间。
+    """
+
+    def __init__(self, regions: Sequence[Tuple[float, float]], duration: float):
+        self.regions = list(regions)
+        self.duration = duration
+        # 每个区间在紧凑音频中的起点
+        self.compact_starts: List[float] = []
+        position = 0.0
+        for start, end in self.regions:
+            self.compact_starts.append(position)
+            position += end - start
+        self.speech_seconds = position
+
+    @property
+    def skipped_seconds(self) -> float:
+        return max(0.0, self.duration - self.speech_seconds)
+
+    @property
+    def skipped_fraction(self) -> float:
+        return self.skipped_seconds / self.duration if self.duration else 0.0
+
+    def compact(self, pcm, sample_rate: int = SAMPLE_RATE):
+        """拼接所有语音区间，返回紧凑音频"""
+        import numpy as np
+
+        return np.concatenate([pcm_view(pcm, start, end, sample_rate) for start, end in self.regions])
+
+    def gaps(self) -> List[Tuple[float, float]]:
+        """原音频中被跳过的区间"""
+        bounds = [0.0] + [value for region in self.regions for value in region] + [self.duration]
+        return [(start, end) for start, end in zip(bounds[::2], bounds[1::2]) if end > start]
+
+    def compact_gaps(self) -> List[Tuple[float, float]]:
+        """紧凑音频中各拼接点对应的静音，用于规划分段切点
+
+        拼接点本身没有时长，这里以拼接点为中心、以原静音的长度表示，静音越长越优先作为切点。
+        """
+        silences = []
+        for index in range(1, len(self.regions)):
+            junction = self.compact_starts[index]
+            half = (self.regions[index][0] - self.regions[index - 1][1]) / 2
+            silences.append((junction - half, junction + half))
+        return silences
+
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        """把紧凑音频中的时间换算为原音频中的时间
+
+        正好落在拼接点上的结束时间归入前一个区间，开始时间归入后一个区间。
+        """
+        if not self.regions:
+            return seconds
+        if is_end:
+            index = max(0, bisect_left(self.compact_starts, seconds) - 1)
+        else:
+            index = max(0, bisect_right(self.compact_starts, seconds) - 1)
+        start, end = self.regions[index]
+        return min(end, start + seconds - self.compact_starts[index])
+
+    def remap(self, transcript: Transcript) -> Transcript:
+        """把紧凑音频的转录换算为原音频的时间"""
+        if not transcript.timed:
+            return transcript
+        return Transcript([self.to_original(start) for start in transcript.starts],
+                          [self.to_original(end, is_end=True) for end in transcript.ends],
+                          transcript.texts)
+
+
+def detect_speech(pcm, sample_rate: int = SAMPLE_RATE,
+                  margin_db: Optional[float] = None,
+                  min_db: Optional[float] = None,
+                  min_silence: Optional[float] = None,
+                  min_speech: Optional[float] = None,
+                  padding: Optional[float] = None) -> SpeechMap:
+    """基于帧能量的语音活动检测（全部为 NumPy 向量运算）
+
+    阈值随音频自适应：取噪声底（第 10 百分位）+ margin_db，但不高于响度（第 95 百分位）- margin_db，
+    也不低于 min_db。只检测能量，音量和人声相当的背景音乐不会被跳过。
+
+    Args:
+        pcm: 16kHz 单声道 float32 采样（可以是内存映射）
+        其他参数默认读取 VAD_MARGIN_DB / VAD_MIN_DB / VAD_MIN_SILENCE / VAD_MIN_SPEECH / VAD_PADDING
+
+    Returns:
+        SpeechMap: 语音区间；没有检测到语音时 regions 为空
+    """
+    import numpy as np
+
+    margin_db = margin_db if margin_db is not None else float(os.getenv('VAD_MARGIN_DB', str(DEFAULT_MARGIN_DB)))
+    min_db = min_db if min_db is not None else float(os.getenv('VAD_MIN_DB', str(DEFAULT_MIN_DB)))
+    min_silence = min_silence if min_silence is not None else float(os.getenv('VAD_MIN_SILENCE', str(DEFAULT_MIN_SILENCE_SECONDS)))
+    min_speech = min_speech if min_speech is not None else float(os.getenv('VAD_MIN_SPEECH', str(DEFAULT_MIN_SPEECH_SECONDS)))
+    padding = padding if padding is not None else float(os.getenv('VAD_PADDING', str(DEFAULT_PADDING_SECONDS)))
+
+    duration = len(pcm) / sample_rate
+    frame = sample_rate * FRAME_MS // 1000
+    count = len(pcm) // frame
+    if count == 0:
+        return SpeechMap([(0.0, duration)] if duration else [], duration)
+
+    # 每帧的均方能量（einsum 不会生成与音频等大的临时数组）
+    frames = np.asarray(pcm[:count * frame]).reshape(count, frame)
+    energy = np.einsum('ij,ij->i', frames, frames) / frame
+    energy_db = 10 * np.log10(energy + 1e-10)
+
+    noise_floor, loud = np.percentile(energy_db, [10, 95])
+    threshold = max(min_db, min(noise_floor + margin_db, loud - margin_db))
+    active = energy_db > threshold
+
+    # 连续语音帧的起止下标 [starts, ends)
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return SpeechMap([], duration)
+
+    # 合并短停顿，再去掉过短的语音
+    frame_seconds = frame / sample_rate
+    keep = (starts[1:] - ends[:-1]) * frame_seconds >= min_silence
+    starts = np.concatenate((starts[:1], starts[1:][keep]))
+    ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+    long_enough = (ends - starts) * frame_seconds >= min_speech
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    regions: List[Tuple[float, float]] = []
+    for start, end in zip(starts * frame_seconds - padding, ends * frame_seconds + padding):
+        start, end = max(0.0, float(start)), min(duration, float(end))
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return SpeechMap(regions, duration)
+
+
+class VadStats:
+    """统计语音活动检测跳过的音频时长"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'jobs': 0, 'audio_seconds': 0.0, 'skipped_seconds': 0.0}
+
+    def record(self, speech: SpeechMap) -> None:
+        with self._lock:
+            self._stats['jobs'] += 1
+            self._stats['audio_seconds'] += speech.duration
+            self._stats['skipped_seconds'] += speech.skipped_seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats['audio_seconds']
+        stats['skipped_fraction'] = round(stats['skipped_seconds'] / total, 4) if total else 0.0
+        stats['audio_seconds'] = round(stats['audio_seconds'], 1)
+        stats['skipped_seconds'] = round(stats['skipped_seconds'], 1)
+        return stats
+
+
+vad_stats = VadStats()
+
+
+def speech_only(pcm, sample_rate: int = SAMPLE_RATE):
+    """检测语音并返回 (紧凑音频, SpeechMap)
+
+    VAD 关闭、没有可跳过的部分或没有检测到语音时返回 (原音频, None)，调用方整段转录。
+    """
+    if not vad_enabled():
+        return pcm, None
+
+    speech = detect_speech(pcm, sample_rate)
+    vad_stats.record(speech)
+    if not speech.regions or speech.skipped_seconds < 1:
+        return pcm, None
+
+    print(f"🔇 跳过 {speech.skipped_seconds:.0f} 秒静音（占 {speech.skipped_fraction:.0%}），"
+          f"只转录 {len(speech.regions)} 段共 {speech.speech_seconds:.0f} 秒语音")
+    return speech.compact(pcm, sample_rate), speech
@@ -1,27 +1,39 @@
 import os
-from pdb import lasti2lineno
 import sys
 import json
 import time
 import shutil
 import re
 import subprocess
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+from contextlib import nullcontext
 import datetime
 from pathlib import Path
 import random
 from itertools import zip_longest
 
-import yt_dlp
-import httpx
-from unsplash.api import Api as UnsplashApi
-from unsplash.auth import Auth as UnsplashAuth
+# yt_dlp、httpx、bs4 等重量级依赖在使用处按需导入，
+# 避免拖慢 CLI 和 worker 的启动
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-import whisper
-import openai
 import argparse
 
+from audio_extract import audio_variant, build_audio_options, extract_audio_file, find_audio_file
+from download_plan import DownloadPlan, build_download_plan, duration_rejection
+from hedged_download import DownloadAttempt, DownloadCancelled, hedged_download
+from media_cache import get_media_cache
+from retry_policy import PERMANENT, RetryPolicy, classify_download_error
+from services import UNSPLASH_API_URL, get_services
+from stream_download import stream_to_file
+from subtitles import (parse_subtitle, select_subtitle_track,
+                       subtitle_fast_path_enabled, transcript_source_stats)
+from transcript import Transcript
+from transcription import BACKENDS, backend_name, fetch_audio, get_backend
+from whisper_models import DECODING_PROFILES
+from workspace import JobWorkspace
+
+if TYPE_CHECKING:
+    import numpy as np
+
 # 加载环境变量
 load_dotenv()
 
@@ -60,70 +72,26 @@ proxies = {
 import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
-# OpenRouter configuration
-openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
-openrouter_app_name = os.getenv('OPENROUTER_APP_NAME', 'video-note')
-openrouter_http_referer = os.getenv('OPENROUTER_HTTP_REFERER', 'https://github.com')
-openrouter_available = False
-
-# 配置 OpenAI API
-client = openai.OpenAI(
-    api_key=openrouter_api_key,
-    base_url="https://openrouter.ai/api/v1",
-    default_headers={
-        "HTTP-Referer": openrouter_http_referer,
-        "X-Title": openrouter_app_name,
-    }
-)
+# 外部服务（OpenRouter、Unsplash、ffmpeg）均延迟初始化，导入时不做任何探测
+services = get_services()
 
 # 选择要使用的模型
 # AI_MODEL = "google/gemini-pro"  # 使用 Gemini Pro 模型
 AI_MODEL = "deepseek/deepseek-chat-v3-0324:free"
 
-# Test OpenRouter connection
-if openrouter_api_key:
-    try:
-        print(f"正在测试 OpenRouter API 连接...")
-        response = client.models.list()  # 使用更简单的API调用来测试连接
-        print("✅ OpenRouter API 连接测试成功")
-        openrouter_available = True
-    except Exception as e:
-        print(f"⚠️ OpenRouter API 连接测试失败: {str(e)}")
-        print("将继续尝试使用API，但可能会遇到问题")
-
-# 检查Unsplash配置
-unsplash_access_key = os.getenv('UNSPLASH_ACCESS_KEY')
-unsplash_client = None
-
-if unsplash_access_key:
-    try:
-        auth = UnsplashAuth(
-            client_id=unsplash_access_key,
-            client_secret=None,
-            redirect_uri=None
-        )
-        unsplash_client = UnsplashApi(auth)
-        print("✅ Unsplash API 配置成功")
-    except Exception as e:
-        print(f"❌ Failed to initialize Unsplash client: {str(e)}")
-
-# 检查ffmpeg
-ffmpeg_path = None
-try:
-    subprocess.run(["/opt/homebrew/bin/ffmpeg", "-version"], 
-                    stdout=subprocess.PIPE, 
-                    stderr=subprocess.PIPE)
-    print("✅ ffmpeg is available at /opt/homebrew/bin/ffmpeg")
-    ffmpeg_path = "/opt/homebrew/bin/ffmpeg"
-except Exception:
-    try:
-        subprocess.run(["ffmpeg", "-version"],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE)
-        print("✅ ffmpeg is available (from PATH)")
-        ffmpeg_path = "ffmpeg"
-    except Exception as e:
-        print(f"⚠️ ffmpeg not found: {str(e)}")
+# 兼容旧的模块级全局变量，实际值由服务层在首次访问时提供
+_LAZY_GLOBALS = {
+    'client': 'openrouter_client',
+    'openrouter_available': 'openrouter_available',
+    'unsplash_client': 'unsplash_client',
+    'ffmpeg_path': 'ffmpeg_path',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_GLOBALS:
+        return getattr(services, _LAZY_GLOBALS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class DownloadError(Exception):
     """自定义下载错误类"""
@@ -135,23 +103,24 @@ class DownloadError(Exception):
         super().__init__(self.message)
 
 class VideoNoteGenerator:
-    def __init__(self, output_dir: str = "temp_notes"):
+    # 默认的转录后端（可被构造参数或 TRANSCRIBE_BACKEND 环境变量覆盖）
+    DEFAULT_TRANSCRIPTION_BACKEND = 'whisper'
+
+    def __init__(self, output_dir: str = "temp_notes", transcription_backend: Optional[str] = None,
+                 decoding_profile: Optional[str] = None):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         
-        self.openrouter_available = openrouter_available
-        self.unsplash_client = unsplash_client
-        self.ffmpeg_path = ffmpeg_path
+        # 转录后端，同时决定下载时提取的音频格式；单个请求可以另行指定
+        self.transcription_backend = backend_name(transcription_backend, self.DEFAULT_TRANSCRIPTION_BACKEND)
+        # Whisper 解码配置（fast / balanced / accurate），为 None 时读取 WHISPER_PROFILE
+        self.decoding_profile = decoding_profile
         
-        # 初始化whisper模型
-        print("正在加载Whisper模型...")
-        self.whisper_model = None
-        try:
-            self.whisper_model = whisper.load_model("medium")
-            print("✅ Whisper模型加载成功")
-        except Exception as e:
-            print(f"⚠️ Whisper模型加载失败: {str(e)}")
-            print("将在需要时重试加载")
+        # 按平台视频ID寻址的持久化下载缓存
+        self.media_cache = get_media_cache()
+        
+        # 下载重试策略（指数退避 + 抖动，按错误类别分配重试次数）
+        self.download_retry_policy = RetryPolicy()
         
         # 日志目录
         self.log_dir = os.path.join(self.output_dir, 'logs')
@@ -168,15 +137,30 @@ class VideoNoteGenerator:
             'youtube': os.path.join(self.cookie_dir, 'youtube_cookies.txt')
         }
     
-    def _ensure_whisper_model(self) -> None:
-        """确保Whisper模型已加载"""
-        if self.whisper_model is None:
-            try:
-                print("正在加载Whisper模型...")
-                self.whisper_model = whisper.load_model("medium")
-                print("✅ Whisper模型加载成功")
-            except Exception as e:
-                print(f"⚠️ Whisper模型加载失败: {str(e)}")
+    @property
+    def openrouter_client(self):
+        """OpenRouter 客户端（首次使用时创建）"""
+        return services.openrouter_client
+
+    @property
+    def openrouter_available(self) -> bool:
+        """OpenRouter 是否可用（首次使用时探测并缓存）"""
+        return services.openrouter_available
+
+    @property
+    def unsplash_client(self):
+        """Unsplash 客户端（首次使用时创建）"""
+        return services.unsplash_client
+
+    @property
+    def audio_format(self) -> str:
+        """下载时提取的音频格式，与转录后端匹配"""
+        return get_backend(self.transcription_backend).audio_format
+
+    @property
+    def ffmpeg_path(self) -> Optional[str]:
+        """ffmpeg 路径（首次使用时探测并缓存）"""
+        return services.ffmpeg_path
 
     def _determine_platform(self, url: str) -> Optional[str]:
         """
@@ -254,18 +238,31 @@ class VideoNoteGenerator:
             return 'you-get'
         return None
 
-    def _download_with_alternative_method(self, platform: str, url: str, temp_dir: str, method: str) -> Optional[str]:
-        """使用备用方法下载"""
+    def _download_with_alternative_method(self, platform: str, url: str, temp_dir: str, method: str,
+                                          attempt: Optional[DownloadAttempt] = None) -> Optional[str]:
+        """使用备用方法下载
+        
+        attempt 不为空时（对冲下载），下载过程中会汇报进度并在被取消时尽快停止
+        """
         try:
             if method == 'you-get':
                 cmd = ['you-get', '--no-proxy', '--no-check-certificate', '-o', temp_dir, url]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                while True:
+                    try:
+                        _, stderr = process.communicate(timeout=1)
+                        break
+                    except subprocess.TimeoutExpired:
+                        if attempt and attempt.cancelled:
+                            process.kill()
+                            process.communicate()
+                            attempt.check_cancelled()
+                if process.returncode == 0:
                     # 查找下载的文件
                     files = [f for f in os.listdir(temp_dir) if f.endswith(('.mp4', '.flv', '.webm'))]
                     if files:
                         return os.path.join(temp_dir, files[0])
-                raise Exception(result.stderr)
+                raise Exception(stderr)
                 
             elif method == 'requests':
                 # 使用requests直接下载
@@ -278,7 +275,7 @@ class VideoNoteGenerator:
                 }
                 
                 # 首先获取页面内容
-                response = httpx.get(url, headers=headers, verify=False)
+                response = services.http.get(url, headers=headers)
                 
                 if response.status_code == 200:
                     # 尝试从页面中提取视频URL
@@ -312,17 +309,12 @@ class VideoNoteGenerator:
                         if not video_url.startswith('http'):
                             video_url = 'https:' + video_url if video_url.startswith('//') else video_url
                         
-                        # 下载视频
-                        video_response = httpx.get(video_url, headers=headers, stream=True, verify=False)
-                        if video_response.status_code == 200:
-                            file_path = os.path.join(temp_dir, 'video.mp4')
-                            with open(file_path, 'wb') as f:
-                                for chunk in video_response.iter_content(chunk_size=8192):
-                                    if chunk:
-                                        f.write(chunk)
-                            return file_path
+                        # 流式下载视频，中断时从 .part 文件续传
+                        file_path = os.path.join(temp_dir, 'video.mp4')
+                        return stream_to_file(services.http, video_url, file_path, headers=headers,
+                                              progress=attempt.on_progress if attempt else None)
                         
-                    raise Exception(f"无法下载视频: HTTP {video_response.status_code}")
+                    raise Exception("无法从页面中找到视频地址")
                 raise Exception(f"无法访问页面: HTTP {response.status_code}")
                 
             elif method == 'pytube':
@@ -342,6 +334,159 @@ class VideoNoteGenerator:
             print(f"备用下载方法 {method} 失败: {str(e)}")
             return None
 
+    def _build_video_info(self, info: Dict, platform: str) -> Dict:
+        """从 yt-dlp 的元数据中提取笔记需要的视频信息"""
+        return {
+            'title': info.get('title', '未知标题'),
+            'uploader': info.get('uploader', '未知作者'),
+            'description': info.get('description', ''),
+            'duration': info.get('duration', 0),
+            'platform': platform,
+            'transcript_source': 'asr'
+        }
+
+    def _fetch_subtitle_transcript(self, info: Dict) -> Tuple[Optional[Transcript], Optional[str]]:
+        """
+        获取平台已有的字幕（中文优先）并转换为转录文本
+        
+        Returns:
+            Tuple[Optional[Transcript], Optional[str]]: (带时间戳的转录, 来源标识如 'subtitles:zh-Hans:manual')，没有可用字幕时为 (None, None)
+        """
+        track = select_subtitle_track(info)
+        if not track:
+            return None, None
+
+        lang, kind, fmt = track
+        try:
+            text = fmt.get('data')
+            if text is None:
+                import yt_dlp
+                with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+                    text = ydl.urlopen(fmt['url']).read().decode('utf-8', errors='replace')
+            transcript = Transcript.from_segments(parse_subtitle(text, fmt['ext']))
+        except Exception as e:
+            print(f"⚠️ 获取字幕失败，将下载音频转录: {str(e)}")
+            return None, None
+
+        if not transcript:
+            return None, None
+        return transcript, f"subtitles:{lang}:{kind}"
+
+    def _plan_download(self, url: str, platform: str, options: Dict) -> Tuple[Dict, DownloadPlan]:
+        """只获取视频元数据（不下载），生成下载规划"""
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(options) as ydl:
+            print("正在获取视频元数据...")
+            info = ydl.extract_info(url, download=False)
+        if not info:
+            raise DownloadError("无法获取视频信息", platform, "info_error")
+
+        plan = build_download_plan(info, platform)
+        print(f"📋 {plan.title}：时长 {plan.duration} 秒，"
+              f"预计转录 {plan.estimated_asr_minutes} 分钟、调用AI {plan.estimated_llm_calls} 次")
+        if plan.format_id:
+            print(f"选择音频格式: {plan.format_id}")
+        return info, plan
+
+    def plan_video(self, url: str) -> Optional[DownloadPlan]:
+        """
+        下载前的规划：返回标题、时长、可用格式、字幕和成本估算，不下载任何媒体数据
+        
+        Args:
+            url: 视频URL
+            
+        Returns:
+            DownloadPlan: 下载规划，获取失败时返回 None
+        """
+        platform = self._determine_platform(url)
+        if not platform:
+            print("⚠️ 不支持的视频平台")
+            return None
+        try:
+            _, plan = self._plan_download(url, platform, {'quiet': True, 'no_warnings': True})
+            return plan
+        except Exception as e:
+            print(f"⚠️ {self._handle_download_error(e, platform, url)}")
+            return None
+
+    def _with_download_retry(self, action: Callable[[int], Any], description: str,
+                             attempt: Optional[DownloadAttempt] = None) -> Any:
+        """按错误类别重试：永久错误立即失败，临时错误指数退避
+
+        Args:
+            action: 执行一次操作的函数，参数为第几次尝试
+            description: 操作描述，用于输出日志
+            attempt: 对冲下载中的运行状态；遇到可重试的错误时请求并行启动备用方法，被取消时停止重试
+        """
+        retry = self.download_retry_policy.start()
+        number = 0
+        while True:
+            number += 1
+            try:
+                return action(number)
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                if attempt and attempt.cancelled:
+                    raise DownloadCancelled(f"{attempt.method} 已取消") from e
+                print(f"⚠️ {description}失败（第{number}次）: {str(e)}")
+                delay = retry.next_delay(e)
+                if delay is None:
+                    print(f"错误类型: {retry.last_error_class}，不再重试")
+                    raise
+                print(f"错误类型: {retry.last_error_class}，等待{delay:.1f}秒后重试...")
+                if attempt:
+                    attempt.request_hedge()
+                    attempt.sleep(delay)
+                else:
+                    time.sleep(delay)
+
+    def _download_with_ytdlp(self, attempt: DownloadAttempt, info: Dict, plan: DownloadPlan, platform: str,
+                             options: Dict, audio_exts: Tuple[str, ...], temp_dir: str) -> str:
+        """用 yt-dlp 下载规划阶段选出的音频格式，返回音频文件路径"""
+        import yt_dlp
+
+        # 只下载规划阶段选出的最小纯音频格式，复用已获取的元数据而不重新解析页面
+        download_options = dict(options, format=plan.format_id) if plan.format_id else dict(options)
+        # 进度回调：记录是否已收到数据，被取消时中止下载
+        download_options['progress_hooks'] = [
+            lambda progress: attempt.on_progress(progress.get('downloaded_bytes') or 0)
+        ]
+
+        def download(number: int) -> str:
+            with yt_dlp.YoutubeDL(download_options) as ydl:
+                print(f"正在尝试下载（第{number}次）...")
+                result = ydl.process_ie_result(info, download=True)
+                if not result:
+                    raise DownloadError("无法获取视频信息", platform, "info_error")
+
+                # 找到下载的音频文件
+                audio_path = find_audio_file(result, temp_dir, audio_exts)
+                if not audio_path:
+                    raise DownloadError("未找到下载的音频文件", platform, "file_error")
+
+                if not os.path.exists(audio_path):
+                    raise DownloadError("音频文件不存在", platform, "file_error")
+                return audio_path
+
+        return self._with_download_retry(download, "下载", attempt)
+
+    def _download_alternative_audio(self, attempt: DownloadAttempt, platform: str, url: str,
+                                    temp_dir: str, method: str) -> str:
+        """用备用方法下载视频并提取音频，返回音频文件路径"""
+        # 每个方法使用单独的子目录，避免与 yt-dlp 的文件混在一起
+        method_dir = os.path.join(temp_dir, method)
+        os.makedirs(method_dir, exist_ok=True)
+
+        video_path = self._download_with_alternative_method(platform, url, method_dir, method, attempt)
+        attempt.check_cancelled()
+        if not video_path:
+            raise DownloadError(f"备用下载方法 {method} 失败", platform, "download_error")
+        if not self.ffmpeg_path:
+            raise DownloadError("未找到 ffmpeg，无法从视频中提取音频", platform, "file_error")
+        return extract_audio_file(self.ffmpeg_path, video_path, self.audio_format)
+
     def _download_video(self, url: str, temp_dir: str) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
         """下载视频并返回音频文件路径和信息"""
         try:
@@ -349,80 +494,92 @@ class VideoNoteGenerator:
             if not platform:
                 raise DownloadError("不支持的视频平台", "unknown", "platform_error")
 
-            # 基本下载选项
+            # 命中下载缓存时直接返回，完全跳过 yt-dlp；时长上限与规划阶段相同
+            variant = audio_variant(self.audio_format)
+            cached_audio, cached_info = self.media_cache.get(url, variant)
+            if cached_audio:
+                rejected_reason = duration_rejection(cached_info.get('duration'))
+                if rejected_reason:
+                    raise DownloadError(rejected_reason, platform, "duration_error")
+                print(f"✅ 命中下载缓存: {cached_info['title']}")
+                return cached_audio, cached_info
+
+            # 基本下载选项，音频格式由转录后端决定（原始音频流或ASR所需格式）
+            audio_options, audio_exts = build_audio_options(self.audio_format)
             options = {
-                'format': 'bestaudio/best',
                 'outtmpl': os.path.join(temp_dir, '%(title)s.%(ext)s'),
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                }],
                 'quiet': True,
                 'no_warnings': True,
+                **audio_options,
             }
+            alternative = self._get_alternative_download_method(platform, url)
 
-            # 下载视频
-            for attempt in range(3):  # 最多重试3次
-                try:
-                    with yt_dlp.YoutubeDL(options) as ydl:
-                        print(f"正在尝试下载（第{attempt + 1}次）...")
-                        info = ydl.extract_info(url, download=True)
-                        if not info:
-                            raise DownloadError("无法获取视频信息", platform, "info_error")
-
-                        # 找到下载的音频文件
-                        downloaded_files = [f for f in os.listdir(temp_dir) if f.endswith('.mp3')]
-                        if not downloaded_files:
-                            raise DownloadError("未找到下载的音频文件", platform, "file_error")
-
-                        audio_path = os.path.join(temp_dir, downloaded_files[0])
-                        if not os.path.exists(audio_path):
-                            raise DownloadError("音频文件不存在", platform, "file_error")
-
-                        video_info = {
-                            'title': info.get('title', '未知标题'),
-                            'uploader': info.get('uploader', '未知作者'),
-                            'description': info.get('description', ''),
-                            'duration': info.get('duration', 0),
-                            'platform': platform
-                        }
-
-                        print(f"✅ {platform}视频下载成功")
-                        return audio_path, video_info
-
-                except Exception as e:
-                    print(f"⚠️ 下载失败（第{attempt + 1}次）: {str(e)}")
-                    if attempt < 2:  # 如果不是最后一次尝试
-                        print("等待5秒后重试...")
-                        time.sleep(5)
-                    else:
-                        raise  # 最后一次失败，抛出异常
+            # 规划阶段：先只获取元数据，超长视频在下载任何数据前就被拒绝
+            info, plan = None, None
+            try:
+                info, plan = self._with_download_retry(
+                    lambda number: self._plan_download(url, platform, options), "获取元数据")
+            except Exception as e:
+                # yt-dlp 无法解析页面时，只能交给备用下载方法
+                if not alternative or classify_download_error(e) == PERMANENT:
+                    raise
+                print(f"⚠️ 无法获取视频元数据，将使用备用下载方法 {alternative}")
+
+            if plan is not None:
+                if plan.rejected:
+                    raise DownloadError(plan.rejected_reason, platform, "duration_error")
+
+                # 字幕快速路径：平台已有字幕时直接作为转录文本，跳过音频下载和转录
+                if subtitle_fast_path_enabled():
+                    transcript, source = self._fetch_subtitle_transcript(info)
+                    if transcript:
+                        video_info = self._build_video_info(info, platform)
+                        video_info['transcript'] = transcript
+                        video_info['transcript_source'] = source
+                        print(f"✅ 使用平台字幕（{source}），跳过音频下载")
+                        return None, video_info
+
+            # 对冲下载：yt-dlp 迟迟没有数据或遇到可重试的错误时，并行启动平台的备用下载方法，先完成者胜出
+            methods = {}
+            if info is not None:
+                methods['yt-dlp'] = lambda attempt: self._download_with_ytdlp(
+                    attempt, info, plan, platform, options, audio_exts, temp_dir)
+            if alternative:
+                methods[alternative] = lambda attempt: self._download_alternative_audio(
+                    attempt, platform, url, temp_dir, alternative)
+            method, audio_path = hedged_download(platform, methods)
+
+            video_info = self._build_video_info(info or {}, platform)
+            if info is not None:
+                # 存入下载缓存，后续处理直接使用缓存中的文件
+                audio_path = self.media_cache.put(info, url, variant, audio_path, video_info)
+
+            print(f"✅ {platform}视频下载成功（{method}）")
+            return audio_path, video_info
 
         except Exception as e:
             error_msg = self._handle_download_error(e, platform, url)
             print(f"⚠️ {error_msg}")
             return None, None
 
-    def _transcribe_audio(self, audio_path: str) -> str:
-        """使用Whisper转录音频"""
+    def _transcribe_audio(self, audio: Union[str, 'np.ndarray'], pcm_dir: Optional[str] = None,
+                          backend: Optional[str] = None, profile: Optional[str] = None) -> Optional[Transcript]:
+        """用转录后端转录音频（本地文件、音频URL，或已解码的 16kHz float32 采样）
+
+        Args:
+            pcm_dir: 任务工作区内的缓存目录（PCM 缓存、只含语音的音频）
+            backend: 转录后端（tencent / whisper / faster-whisper），默认使用生成器配置的后端
+            profile: Whisper 解码配置（fast / balanced / accurate），默认使用生成器配置的解码配置
+
+        Returns:
+            Transcript: 带时间戳的转录，失败时返回 None
+        """
         try:
-            self._ensure_whisper_model()
-            if not self.whisper_model:
-                raise Exception("Whisper模型未加载")
-                
-            print("正在转录音频（这可能需要几分钟）...")
-            result = self.whisper_model.transcribe(
-                audio_path,
-                language='zh',  # 指定中文
-                task='transcribe',
-                best_of=5,
-                initial_prompt="以下是一段视频的转录内容。请用流畅的中文输出。"  # 添加中文提示
-            )
-            return result["text"].strip()
+            return get_backend(backend, self.transcription_backend).transcribe(audio, pcm_dir, profile or self.decoding_profile)
             
         except Exception as e:
             print(f"⚠️ 音频转录失败: {str(e)}")
-            return ""
+            return None
 
     def _organize_content(self, content: str) -> str:
         """使用AI整理内容"""
@@ -462,7 +619,7 @@ Markdown格式要求：
 {content}"""
 
             # 调用API
-            response = client.chat.completions.create(
+            response = self.openrouter_client.chat.completions.create(
                 model=AI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -666,7 +823,7 @@ Markdown格式要求：
 {content}"""
 
             # 调用API
-            response = client.chat.completions.create(
+            response = self.openrouter_client.chat.completions.create(
                 model=AI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -685,7 +842,7 @@ Markdown格式要求：
             print(f"⚠️ 内容检查失败: {str(e)}")
             return content
 
-    def split_content(self, text: str, max_chars: int = 2000) -> List[str]:
+    def split_content(self, text: Union[str, Transcript], max_chars: int = 2000) -> List[str]:
         """按段落分割文本，保持上下文的连贯性
         
         特点：
@@ -693,11 +850,12 @@ Markdown格式要求：
         2. 保持句子完整性：确保句子不会被截断
         3. 添加重叠内容：每个chunk都包含上一个chunk的最后一段
         4. 智能分割：对于超长段落，按句子分割并保持完整性
+        5. 时间对齐：输入 Transcript 时按说话停顿划分段落，不再解析文本
         """
         if not text:
             return []
 
-        paragraphs = text.split('\n\n')
+        paragraphs = text.paragraphs() if isinstance(text, Transcript) else text.split('\n\n')
         chunks = []
         current_chunk = []
         current_length = 0
@@ -769,14 +927,14 @@ Markdown格式要求：
         
         return chunks
 
-    def _organize_long_content(self, content: str, duration: int = 0) -> str:
+    def _organize_long_content(self, content: Union[str, Transcript], duration: int = 0) -> str:
         """使用AI整理长文内容"""
-        if not content.strip():
+        if not str(content).strip():
             return ""
         
         if not self.openrouter_available:
             print("⚠️ OpenRouter API 不可用，将返回原始内容")
-            return content
+            return str(content)
         
         content_chunks = self.split_content(content)
         organized_chunks = []
@@ -790,14 +948,14 @@ Markdown格式要求：
     
         return "\n\n".join(organized_chunks)
 
-    def _check_long_content(self, content: str) -> str:
+    def _check_long_content(self, content: Union[str, Transcript]) -> str:
         """使用AI整理长文内容"""
-        if not content.strip():
+        if not str(content).strip():
             return ""
         
         if not self.openrouter_available:
             print("⚠️ OpenRouter API 不可用，将返回原始内容")
-            return content
+            return str(content)
         
         content_chunks = self.split_content(content)
         checked_chunks = []
@@ -899,7 +1057,7 @@ Markdown格式要求：
 """
 
             # 调用API
-            response = client.chat.completions.create(
+            response = self.openrouter_client.chat.completions.create(
                 model=AI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -977,7 +1135,7 @@ Markdown格式要求：
             # 将查询词翻译成英文以获得更好的结果
             if self.openrouter_available:
                 try:
-                    response = client.chat.completions.create(
+                    response = self.openrouter_client.chat.completions.create(
                         model=AI_MODEL,
                         messages=[
                             {"role": "system", "content": "你是一个翻译助手。请将输入的中文关键词翻译成最相关的1-3个英文关键词，用逗号分隔。直接返回翻译结果，不要加任何解释。例如：\n输入：'保险理财知识'\n输出：insurance,finance,investment"},
@@ -991,24 +1149,22 @@ Markdown格式要求：
                 except Exception as e:
                     print(f"⚠️ 翻译关键词失败: {str(e)}")
             
-            # 使用httpx直接调用Unsplash API
-            headers = {
-                'Authorization': f'Client-ID {os.getenv("UNSPLASH_ACCESS_KEY")}'
-            }
+            # 使用进程内共享的长连接httpx客户端调用Unsplash API
+            http = services.http
+            search_url = f"{UNSPLASH_API_URL}/search/photos"
             
             # 对每个关键词分别搜索
             all_photos = []
             for keyword in query.split(','):
-                response = httpx.get(
-                    'https://api.unsplash.com/search/photos',
+                response = http.get(
+                    search_url,
+                    headers=services.unsplash_headers,
                     params={
                         'query': keyword.strip(),
                         'per_page': count,
                         'orientation': 'portrait',  # 小红书偏好竖版图片
                         'content_filter': 'high'    # 只返回高质量图片
                     },
-                    headers=headers,
-                    verify=False  # 禁用SSL验证
                 )
                 
                 if response.status_code == 200:
@@ -1021,17 +1177,16 @@ Markdown格式要求：
             
             # 如果收集到的图片不够，用最后一个关键词继续搜索
             while len(all_photos) < count and query:
-                response = httpx.get(
-                    'https://api.unsplash.com/search/photos',
+                response = http.get(
+                    search_url,
+                    headers=services.unsplash_headers,
                     params={
                         'query': query.split(',')[-1].strip(),
                         'per_page': count - len(all_photos),
                         'orientation': 'portrait',
                         'content_filter': 'high',
                         'page': 2  # 获取下一页的结果
-                    },
-                    headers=headers,
-                    verify=False
+                    }
                 )
                 
                 if response.status_code == 200:
@@ -1052,127 +1207,156 @@ Markdown格式要求：
             print(f"⚠️ 获取图片失败: {str(e)}")
             return []
 
-    def process_video(self, url: str) -> List[str]:
+    def _write_notes(self, url: str, workspace: JobWorkspace, video_info: Dict, transcript: Transcript) -> List[str]:
+        """保存原始转录内容，并用AI生成整理版和小红书版本
+        
+        Returns:
+            List[str]: 生成的笔记文件路径列表
+        """
+        # 保存原始转录内容
+        original_file = workspace.artifact_path('original')
+        with open(original_file, 'w', encoding='utf-8') as f:
+            f.write(f"# {video_info['title']}\n\n")
+            f.write(f"## 视频信息\n")
+            f.write(f"- 作者：{video_info['uploader']}\n")
+            f.write(f"- 时长：{video_info['duration']}秒\n")
+            f.write(f"- 平台：{video_info['platform']}\n")
+            f.write(f"- 转录来源：{video_info.get('transcript_source', 'asr')}\n")
+            f.write(f"- 链接：{url}\n\n")
+            f.write(f"## 原始转录内容\n\n")
+            f.write(transcript.text)
+
+        # 带时间戳的转录另存为 JSON，后续可以按时间定位，不用再解析文本
+        if transcript.timed:
+            with open(workspace.artifact_path('transcript', '.json'), 'w', encoding='utf-8') as f:
+                json.dump(transcript.to_dict(), f, ensure_ascii=False)
+
+        # 整理长文版本
+        print("\n📝 正在整理长文版本...")
+        organized_content = self._organize_long_content(transcript, video_info['duration'])
+        organized_file = workspace.artifact_path('organized')
+        with open(organized_file, 'w', encoding='utf-8') as f:
+            f.write(f"# {video_info['title']} - 整理版\n\n")
+            f.write(f"## 视频信息\n")
+            f.write(f"- 作者：{video_info['uploader']}\n")
+            f.write(f"- 时长：{video_info['duration']}秒\n")
+            f.write(f"- 平台：{video_info['platform']}\n")
+            f.write(f"- 链接：{url}\n\n")
+            f.write(f"## 内容整理\n\n")
+            f.write(organized_content)
+
+        # 生成小红书版本
+        print("\n📱 正在生成小红书版本...")
+        try:
+            xiaohongshu_content, titles, tags, images = self.convert_to_xiaohongshu(organized_content)
+
+            # 保存小红书版本
+            xiaohongshu_file = workspace.artifact_path('xiaohongshu')
+
+            # 写入文件
+            with open(xiaohongshu_file, "w", encoding="utf-8") as f:
+                # 写入标题
+                f.write(f"# {titles[0]}\n\n")
+
+                # 如果有图片，先写入第一张作为封面
+                if images:
+                    f.write(f"![封面图]({images[0]})\n\n")
+
+                # 写入正文内容的前半部分
+                content_parts = xiaohongshu_content.split('\n\n')
+                mid_point = len(content_parts) // 2
+
+                # 写入前半部分
+                f.write('\n\n'.join(content_parts[:mid_point]))
+                f.write('\n\n')
+
+                # 如果有第二张图片，插入到中间
+                if len(images) > 1:
+                    f.write(f"![配图]({images[1]})\n\n")
+
+                # 写入后半部分
+                f.write('\n\n'.join(content_parts[mid_point:]))
+
+                # 如果有第三张图片，插入到末尾
+                if len(images) > 2:
+                    f.write(f"\n\n![配图]({images[2]})")
+
+                # 写入标签
+                if tags:
+                    f.write("\n\n---\n")
+                    f.write("\n".join([f"#{tag}" for tag in tags]))
+            print(f"\n✅ 小红书版本已保存至: {xiaohongshu_file}")
+            return [original_file, organized_file, xiaohongshu_file]
+        except Exception as e:
+            print(f"⚠️ 生成小红书版本失败: {str(e)}")
+            import traceback
+            print(f"错误详情:\n{traceback.format_exc()}")
+
+        print(f"\n✅ 笔记已保存至: {original_file}")
+        print(f"✅ 整理版内容已保存至: {organized_file}")
+        return [original_file, organized_file]
+
+    def process_video(self, url: str, job_id: Optional[str] = None, stage_gate=None) -> List[str]:
         """处理视频链接，生成笔记
         
         Args:
             url (str): 视频链接
+            job_id (str): 任务ID，默认自动生成；笔记文件名以任务ID开头
+            stage_gate: 批量模式下的阶段闸门，stage_gate(name) 返回一个上下文管理器，
+                用于限制 'download' / 'transcribe' / 'llm' 各阶段的并发数
         
         Returns:
             List[str]: 生成的笔记文件路径列表
         """
         print("\n📹 正在处理视频...")
+        stage = stage_gate or (lambda name: nullcontext())
         
-        # 创建临时目录
-        temp_dir = os.path.join(self.output_dir, 'temp')
+        # 每个任务使用独立的工作区，并发处理多个视频时互不干扰
+        workspace = JobWorkspace(self.output_dir, job_id)
+        temp_dir = workspace.temp_dir
         os.makedirs(temp_dir, exist_ok=True)
         
         try:
             # 下载视频
             print("⬇️ 正在下载视频...")
-            result = self._download_video(url, temp_dir)
+            with stage('download'):
+                result = self._download_video(url, temp_dir)
             if not result:
                 return []
                 
             audio_path, video_info = result
-            if not audio_path or not video_info:
-                return []
-                
-            print(f"✅ 视频下载成功: {video_info['title']}")
-            
-            # 转录音频
-            print("\n🎙️ 正在转录音频...")
-            print("正在转录音频（这可能需要几分钟）...")
-            transcript = self._transcribe_audio(audio_path)
-            if not transcript:
+            if not video_info:
                 return []
 
-            # 保存原始转录内容
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            original_file = os.path.join(self.output_dir, f"{timestamp}_original.md")
-            with open(original_file, 'w', encoding='utf-8') as f:
-                f.write(f"# {video_info['title']}\n\n")
-                f.write(f"## 视频信息\n")
-                f.write(f"- 作者：{video_info['uploader']}\n")
-                f.write(f"- 时长：{video_info['duration']}秒\n")
-                f.write(f"- 平台：{video_info['platform']}\n")
-                f.write(f"- 链接：{url}\n\n")
-                f.write(f"## 原始转录内容\n\n")
-                f.write(transcript)
-
-            # 整理长文版本
-            print("\n📝 正在整理长文版本...")
-            organized_content = self._organize_long_content(transcript, video_info['duration'])
-            organized_file = os.path.join(self.output_dir, f"{timestamp}_organized.md")
-            with open(organized_file, 'w', encoding='utf-8') as f:
-                f.write(f"# {video_info['title']} - 整理版\n\n")
-                f.write(f"## 视频信息\n")
-                f.write(f"- 作者：{video_info['uploader']}\n")
-                f.write(f"- 时长：{video_info['duration']}秒\n")
-                f.write(f"- 平台：{video_info['platform']}\n")
-                f.write(f"- 链接：{url}\n\n")
-                f.write(f"## 内容整理\n\n")
-                f.write(organized_content)
-            
-            # 生成小红书版本
-            print("\n📱 正在生成小红书版本...")
-            try:
-                xiaohongshu_content, titles, tags, images = self.convert_to_xiaohongshu(organized_content)
-                
-                # 保存小红书版本
-                xiaohongshu_file = os.path.join(self.output_dir, f"{timestamp}_xiaohongshu.md")
+            transcript = video_info.pop('transcript', None)
+            if transcript:
+                # 字幕快速路径，已跳过音频下载和转录
+                print(f"✅ 已获取字幕: {video_info['title']}")
+            else:
+                if not audio_path:
+                    return []
+                print(f"✅ 视频下载成功: {video_info['title']}")
                 
-                # 写入文件
-                with open(xiaohongshu_file, "w", encoding="utf-8") as f:
-                    # 写入标题
-                    f.write(f"# {titles[0]}\n\n")
-                    
-                    # 如果有图片，先写入第一张作为封面
-                    if images:
-                        f.write(f"![封面图]({images[0]})\n\n")
-                    
-                    # 写入正文内容的前半部分
-                    content_parts = xiaohongshu_content.split('\n\n')
-                    mid_point = len(content_parts) // 2
-                    
-                    # 写入前半部分
-                    f.write('\n\n'.join(content_parts[:mid_point]))
-                    f.write('\n\n')
-                    
-                    # 如果有第二张图片，插入到中间
-                    if len(images) > 1:
-                        f.write(f"![配图]({images[1]})\n\n")
-                    
-                    # 写入后半部分
-                    f.write('\n\n'.join(content_parts[mid_point:]))
-                    
-                    # 如果有第三张图片，插入到末尾
-                    if len(images) > 2:
-                        f.write(f"\n\n![配图]({images[2]})")
-                    
-                    # 写入标签
-                    if tags:
-                        f.write("\n\n---\n")
-                        f.write("\n".join([f"#{tag}" for tag in tags]))
-                print(f"\n✅ 小红书版本已保存至: {xiaohongshu_file}")
-                return [original_file, organized_file, xiaohongshu_file]
-            except Exception as e:
-                print(f"⚠️ 生成小红书版本失败: {str(e)}")
-                import traceback
-                print(f"错误详情:\n{traceback.format_exc()}")
-            
-            print(f"\n✅ 笔记已保存至: {original_file}")
-            print(f"✅ 整理版内容已保存至: {organized_file}")
-            return [original_file, organized_file]
+                # 转录音频
+                print("\n🎙️ 正在转录音频...")
+                print("正在转录音频（这可能需要几分钟）...")
+                with stage('transcribe'):
+                    transcript = self._transcribe_audio(audio_path, pcm_dir=workspace.path('pcm'))
+                if not transcript:
+                    return []
+            transcript_source_stats.record(video_info.get('transcript_source', 'asr'))
+
+            # AI整理长文、生成小红书版本并保存笔记
+            with stage('llm'):
+                return self._write_notes(url, workspace, video_info, transcript)
             
         except Exception as e:
             print(f"⚠️ 处理视频时出错: {str(e)}")
             return []
         
         finally:
-            # 清理临时文件
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            # 只清理本任务的临时文件
+            workspace.cleanup()
 
     def process_markdown_file(self, input_file: str) -> None:
         """处理markdown文件，生成优化后的笔记
@@ -1203,23 +1387,30 @@ Markdown格式要求：
             print(f"处理markdown文件时出错: {str(e)}")
             raise
 
-    def generate_xhs_note_from_audio(self, url: str) -> dict:
+    def _fetch_audio(self, url: str, workspace: JobWorkspace,
+                     backend: Optional[str] = None) -> Union[str, 'np.ndarray']:
+        """获取音频URL的内容用于转录
+
+        能直接处理URL的后端（腾讯云 ASR）原样返回URL；否则优先边下载边用 ffmpeg 解码为 16kHz PCM，
+        不落盘，容器不支持流式解码时（例如索引在文件末尾的 mp4）退回到先下载到工作区再转录。
+
+        Returns:
+            np.ndarray 或 str: 音频采样、下载到本地的文件路径或原URL
         """
-        输入音频url，直接返回小红书文案的markdown字符串、原文案transcript和整理文本organized_content
+        if get_backend(backend, self.transcription_backend).accepts_url:
+            return url
+        return fetch_audio(url, workspace.temp_dir)
+
+    def generate_xhs_note_from_audio(self, url: str, backend: Optional[str] = None,
+                                     profile: Optional[str] = None) -> dict:
         """
-        temp_dir = os.path.join(self.output_dir, 'temp_audio_api')
-        os.makedirs(temp_dir, exist_ok=True)
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        rand = random.randint(1000, 9999)
-        local_audio_path = os.path.join(temp_dir, f'audio_{timestamp}_{rand}.mp3')
+        输入音频url，直接返回小红书文案的markdown字符串、原文案transcript、带时间戳的segments和整理文本organized_content
+        """
+        # 每个请求使用独立的工作区，只在需要落盘时使用
+        workspace = JobWorkspace(self.output_dir)
         try:
-            # 下载音频到本地
             try:
-                result = subprocess.run([
-                    "wget", "--no-check-certificate", url, "-O", local_audio_path
-                ], capture_output=True)
-                if result.returncode != 0:
-                    return {"error": f"音频下载失败: {result.stderr.decode()}"}
+                audio = self._fetch_audio(url, workspace, backend)
             except Exception as e:
                 return {"error": f"音频下载失败: {str(e)}"}
 
@@ -1232,7 +1423,7 @@ Markdown格式要求：
                 'platform': 'douyin'
             }
             # 后续处理同 generate_xhs_note_from_url
-            transcript = self._transcribe_audio(local_audio_path)
+            transcript = self._transcribe_audio(audio, pcm_dir=workspace.path('pcm'), backend=backend, profile=profile)
             if not transcript:
                 return {"error": "音频转录失败"}
             organized_content = self._organize_long_content(transcript, int(video_info['duration']))
@@ -1256,43 +1447,35 @@ Markdown格式要求：
             if tags:
                 md += "\n\n---\n"
                 md += "\n".join([f"#{tag}" for tag in tags])
-            return {"note": md, "transcript": transcript, "organized_content": organized_content}
+            return {"note": md, "transcript": transcript.text, "segments": transcript.to_dict(),
+                    "organized_content": organized_content}
 
         finally:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            workspace.cleanup()
 
-    def generate_wj_note_from_audio(self, url: str) -> dict:
+    def generate_wj_note_from_audio(self, url: str, backend: Optional[str] = None,
+                                    profile: Optional[str] = None) -> dict:
         """
-        输入音频url，直接返回原文案transcript和违禁词整理文本organized_content
+        输入音频url，直接返回原文案transcript、带时间戳的segments和违禁词整理文本organized_content
         """
-        temp_dir = os.path.join(self.output_dir, 'temp_audio')
-        os.makedirs(temp_dir, exist_ok=True)
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        rand = random.randint(1000, 9999)
-        local_audio_path = os.path.join(temp_dir, f'audio_{timestamp}_{rand}.mp3')
+        # 每个请求使用独立的工作区，只在需要落盘时使用
+        workspace = JobWorkspace(self.output_dir)
         try:
-            # 下载音频到本地
             try:
-                result = subprocess.run([
-                    "wget", "--no-check-certificate", url, "-O", local_audio_path
-                ], capture_output=True)
-                if result.returncode != 0:
-                    return {"error": f"音频下载失败: {result.stderr.decode()}"}
+                audio = self._fetch_audio(url, workspace, backend)
             except Exception as e:
                 return {"error": f"音频下载失败: {str(e)}"}
 
             # 后续处理同 generate_xhs_note_from_url
-            transcript = self._transcribe_audio(local_audio_path)
+            transcript = self._transcribe_audio(audio, pcm_dir=workspace.path('pcm'), backend=backend, profile=profile)
             if not transcript:
                 return {"error": "音频转录失败"}
 
             checked_content = self._check_long_content(transcript)
-            return {"transcript": transcript, "checked_content": checked_content}
+            return {"transcript": transcript.text, "segments": transcript.to_dict(), "checked_content": checked_content}
 
         finally:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            workspace.cleanup()
 
 def extract_urls_from_text(text: str) -> list:
     """
@@ -1341,9 +1524,15 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='视频笔记生成器')
     parser.add_argument('input', help='输入源：视频URL、包含URL的文件或markdown文件')
     parser.add_argument('--xiaohongshu', action='store_true', help='生成小红书风格的笔记')
+    parser.add_argument('--workers', type=int, default=1, help='批量模式下同时处理的视频数量')
+    parser.add_argument('--download-workers', type=int, help='同时下载的视频数量上限（默认等于 --workers）')
+    parser.add_argument('--transcribe-workers', type=int, help='同时转录的视频数量上限（默认等于 --workers）')
+    parser.add_argument('--llm-workers', type=int, help='同时调用AI整理的视频数量上限（默认等于 --workers）')
+    parser.add_argument('--backend', choices=list(BACKENDS), help='转录后端（默认读取 TRANSCRIBE_BACKEND 环境变量）')
+    parser.add_argument('--profile', choices=list(DECODING_PROFILES), help='Whisper 解码配置（默认读取 WHISPER_PROFILE 环境变量）')
     args = parser.parse_args()
     
-    generator = VideoNoteGenerator()
+    generator = VideoNoteGenerator(transcription_backend=args.backend, decoding_profile=args.profile)
     
     if os.path.exists(args.input):
         # 读取文件内容
@@ -1376,13 +1565,14 @@ if __name__ == '__main__':
                 print(f"  {i}. {url}")
             
             print("\n开始处理URL...")
-            for i, url in enumerate(urls, 1):
-                print(f"\n处理第 {i}/{len(urls)} 个URL: {url}")
-                try:
-                    generator.process_video(url)
-                except Exception as e:
-                    print(f"⚠️ 处理URL时出错：{str(e)}")
-                    continue
+            from batch_pipeline import run_batch
+            run_batch(
+                generator, urls,
+                workers=args.workers,
+                download_workers=args.download_workers,
+                transcribe_workers=args.transcribe_workers,
+                llm_workers=args.llm_workers,
+            )
     else:
         # 检查是否是有效的URL
         if not args.input.startswith(('http://', 'https://')):
@@ -1395,6 +1585,7 @@ if __name__ == '__main__':
             print("   - 文件中的URL可以是任意格式，每行一个或多个")
             print("   - 支持带有其他文字的行")
             print("   - 支持使用#注释")
+            print("   - 使用 --workers N 同时处理多个视频")
             print("\n3. 处理Markdown文件：")
             print("   python video_note_generator.py notes.md")
             sys.exit(1)
@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services import env_flag
+
+# 加载环境变量
+load_dotenv()
+
+# 每批最多解码的 30 秒窗口数
+DEFAULT_BATCH_SIZE = 8
+# 最早进入队列的窗口最多等待多少毫秒凑批
+DEFAULT_MAX_LATENCY_MS = 100
+# 队列空闲多少秒后推理线程退出（有新请求时重新启动）
+SERVER_IDLE_SECONDS = 60
+# 时间戳 token 的精度（秒）
+TIME_PRECISION = 0.02
+# 与 whisper.transcribe 相同的回退和静音判定阈值
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def batching_enabled() -> bool:
+    return env_flag('WHISPER_BATCHING', False)
+
+
+class _WindowRequest:
+    """队列中等待解码的一个 30 秒 mel 窗口"""
+
+    __slots__ = ('mel', 'options', 'future', 'enqueued')
+
+    def __init__(self, mel, options):
+        self.mel = mel
+        self.options = options
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+
+
+class BatchStats:
+    """统计动态批处理的批大小和排队等待时间"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'windows': 0, 'wait_seconds': 0.0, 'decode_seconds': 0.0}
+
+    def record(self, size: int, wait_seconds: float, decode_seconds: float) -> None:
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['windows'] += size
+            self._stats['wait_seconds'] += wait_seconds
+            self._stats['decode_seconds'] += decode_seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        batches, windows = stats['batches'], stats['windows']
+        stats['mean_batch_size'] = round(windows / batches, 2) if batches else 0.0
+        stats['mean_wait_ms'] = round(stats['wait_seconds'] / windows * 1000, 1) if windows else 0.0
+        stats['wait_seconds'] = round(stats['wait_seconds'], 1)
+        stats['decode_seconds'] = round(stats['decode_seconds'], 1)
+        return stats
+
+
+batch_stats = BatchStats()
+
+
+def _needs_fallback(result) -> bool:
+    """输出重复（压缩率过高）或置信度过低时用更高的温度重新解码"""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def _timed_sentences(tokens: List[int], tokenizer, offset: float,
+                     duration: float) -> List[Tuple[float, float, str]]:
+    """按时间戳 token 把一个窗口的输出拆分为 (开始秒, 结束秒, 文本)
+
+    输出形如 <|0.00|> 文本 <|2.40|><|2.40|> 文本 <|5.00|>，时间相对于窗口起点。
+    """
+    sentences = []
+    start = None
+    last_end = 0.0
+    text_tokens: List[int] = []
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            seconds = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if text_tokens:
+                begin = start if start is not None else last_end
+                sentences.append((offset + begin, offset + seconds, tokenizer.decode(text_tokens)))
+                text_tokens, start, last_end = [], None, seconds
+            else:
+                start = seconds
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        # 窗口末尾被截断的句子没有结束时间戳，以窗口结尾为结束时间
+        begin = start if start is not None else last_end
+        sentences.append((offset + begin, offset + duration, tokenizer.decode(text_tokens)))
+    return sentences
+
+
+class WhisperBatchServer:
+    """进程内的 Whisper 动态批处理推理服务（openai-whisper）
+
+    每个转录任务把音频切成 30 秒的 mel 窗口放入共享队列，单个推理线程把所有任务的窗口
+    按解码参数分组，凑满 WHISPER_BATCH_SIZE 个或最早的窗口等待超过 WHISPER_BATCH_MAX_LATENCY_MS
+    后一次性送入编码器和解码器，结果通过 Future 交回各任务。
+
+    与每个请求各自调用 model.transcribe 相比，多个请求不再争抢同一组 torch 线程，
+    CPU 上批量编码的总吞吐量明显更高。代价是窗口按固定的 30 秒切分并且并行解码，
+    不能以前一个窗口的文字作为提示（condition_on_previous_text 不生效），窗口边界处的字可能被切开。
+    """
+
+    def __init__(self, models, batch_size: Optional[int] = None, max_latency: Optional[float] = None):
+        """
+        Args:
+            models: whisper_models.WhisperModelManager（openai-whisper 引擎）
+            batch_size: 每批最多的窗口数，默认 WHISPER_BATCH_SIZE
+            max_latency: 凑批的最长等待秒数，默认 WHISPER_BATCH_MAX_LATENCY_MS / 1000
+        """
+        self.models = models
+        self.batch_size = batch_size or int(os.getenv('WHISPER_BATCH_SIZE', str(DEFAULT_BATCH_SIZE)))
+        if max_latency is None:
+            max_latency = float(os.getenv('WHISPER_BATCH_MAX_LATENCY_MS', str(DEFAULT_MAX_LATENCY_MS))) / 1000
+        self.max_latency = max_latency
+
+        self._cond = threading.Condition()
+        self._queue: List[_WindowRequest] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def transcribe(self, audio, options: Dict) -> List[Tuple[float, float, str]]:
+        """转录整段音频（文件路径或 16kHz float32 采样），返回 (开始秒, 结束秒, 文本) 列表
+
+        Args:
+            options: 与 WhisperModelManager.transcribe 相同的参数（language、initial_prompt、解码配置等）
+        """
+        import whisper
+        from whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, SAMPLE_RATE
+
+        device = self.models.resolve_device()
+        # 任务期间持有模型，避免转录中途被空闲卸载
+        with self.models.acquire() as model:
+            language = options.get('language') or 'en'
+            task = options.get('task', 'transcribe')
+            tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                                        language=language, task=task)
+
+            # 与 whisper.transcribe 相同：在采样上补 30 秒静音后再算 mel，最后一个窗口的不足部分是真正的静音
+            # （在 mel 上补零相当于补了一段响亮的信号，会让模型编造文字）
+            mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels, padding=N_SAMPLES)
+            frames = mel.shape[-1] - N_FRAMES
+            windows = [(seek * HOP_LENGTH / SAMPLE_RATE, min(N_FRAMES, frames - seek) * HOP_LENGTH / SAMPLE_RATE,
+                        mel[:, seek:seek + N_FRAMES])
+                       for seek in range(0, frames, N_FRAMES)]
+
+            results = self._decode_windows([window[2] for window in windows], options, device != 'cpu')
+
+        sentences = []
+        for (offset, duration, _), result in zip(windows, results):
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                continue
+            sentences.extend(_timed_sentences(result.tokens, tokenizer, offset, duration))
+        return sentences
+
+    def _decode_windows(self, mels: List, options: Dict, fp16: bool) -> List:
+        """解码一个任务的所有窗口，不达标的窗口按温度序列依次升温重新排队"""
+        from whisper import DecodingOptions
+
+        temperatures = options.get('temperature', (0.0,))
+        if isinstance(temperatures, (int, float)):
+            temperatures = (temperatures,)
+        beam_size = options.get('beam_size')
+        results: List = [None] * len(mels)
+        pending = list(range(len(mels)))
+        for attempt, temperature in enumerate(temperatures):
+            # beam search 只用于温度 0，升温后改为采样 best_of 个候选
+            decode_options = DecodingOptions(
+                task=options.get('task', 'transcribe'),
+                language=options.get('language'),
+                temperature=temperature,
+                beam_size=beam_size if temperature == 0 and beam_size and beam_size > 1 else None,
+                best_of=options.get('best_of') if temperature > 0 else None,
+                prompt=options.get('initial_prompt'),
+                fp16=options.get('fp16', fp16),
+            )
+            futures = [(index, self.submit(mels[index], decode_options)) for index in pending]
+            pending = []
+            for index, future in futures:
+                results[index] = future.result()
+                if attempt < len(temperatures) - 1 and _needs_fallback(results[index]):
+                    pending.append(index)
+            if not pending:
+                break
+        return results
+
+    def submit(self, mel, options) -> Future:
+        """把一个 30 秒 mel 窗口放入队列，返回 whisper.DecodingResult 的 Future"""
+        request = _WindowRequest(mel, options)
+        with self._cond:
+            self._queue.append(request)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, name='whisper-batch', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return request.future
+
+    def _next_batch(self) -> Optional[List[_WindowRequest]]:
+        """等待并取出下一批窗口，队列空闲超过 SERVER_IDLE_SECONDS 时返回 None"""
+        with self._cond:
+            while not self._queue:
+                if not self._cond.wait(SERVER_IDLE_SECONDS) and not self._queue:
+                    self._thread = None
+                    return None
+
+            # 与最早的窗口使用相同解码参数的窗口才能放在同一批
+            oldest = self._queue[0]
+            while True:
+                batch = [request for request in self._queue if request.options == oldest.options]
+                remaining = oldest.enqueued + self.max_latency - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = batch[:self.batch_size]
+            taken = set(map(id, batch))
+            self._queue = [request for request in self._queue if id(request) not in taken]
+            return batch
+
+    def _serve(self) -> None:
+        batch: Optional[List[_WindowRequest]] = None
+        error: BaseException = RuntimeError("Whisper 批处理推理线程已退出")
+        try:
+            import torch
+            import whisper
+
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._run_batch(batch, torch, whisper)
+        except BaseException as e:
+            print(f"❌ Whisper 批处理推理线程异常退出: {str(e)}")
+            error = e
+            raise
+        finally:
+            # 无论如何退出，都让下一次 submit 重新启动推理线程，并让还在排队的任务立即失败而不是一直等待
+            # 空闲退出时 _next_batch 已经注销了本线程，队列可能已属于新启动的线程，不能清空
+            queued: List[_WindowRequest] = []
+            with self._cond:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                    queued, self._queue = self._queue, []
+            for request in (batch or []) + queued:
+                if not request.future.done():
+                    request.future.set_exception(error)
+
+    def _run_batch(self, batch: List[_WindowRequest], torch, whisper) -> None:
+        start = time.monotonic()
+        try:
+            with self.models.acquire() as model:
+                mel = torch.stack([request.mel for request in batch]).to(model.device)
+                results = whisper.decode(model, mel, batch[0].options)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+        else:
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+        batch_stats.record(len(batch), sum(start - request.enqueued for request in batch),
+                           time.monotonic() - start)
@@ -0,0 +1,384 @@
+import gc
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from services import env_flag
+
+# 加载环境变量
+load_dotenv()
+
+# 预热时使用的静音时长（秒）
+WARMUP_SECONDS = 1
+# Whisper 固定使用 16kHz 采样率
+SAMPLE_RATE = 16000
+
+# 推理引擎：openai-whisper（PyTorch）或 faster-whisper（CTranslate2，CPU 上可用 int8 量化）
+OPENAI_WHISPER = 'openai-whisper'
+FASTER_WHISPER = 'faster-whisper'
+ENGINES = (OPENAI_WHISPER, FASTER_WHISPER)
+
+# 解码配置。beam_size=1 为贪心解码；temperature 是回退序列，输出的压缩率或平均置信度不达标时
+# 依次升温重新解码，best_of 是升温采样时的候选数；condition_on_previous_text 以前文作为提示。
+DECODING_PROFILES: Dict[str, Dict] = {
+    # 贪心解码、不回退、不依赖前文：吞吐量最高，也不会在长音频中陷入重复循环
+    'fast': {'beam_size': 1, 'best_of': 1, 'temperature': (0.0,), 'condition_on_previous_text': False},
+    # 贪心解码，只在解码失败时少量回退
+    'balanced': {'beam_size': 1, 'best_of': 2, 'temperature': (0.0, 0.4, 0.8), 'condition_on_previous_text': True},
+    # 束搜索加完整回退序列，CPU 上耗时约为 fast 的数倍
+    'accurate': {'beam_size': 5, 'best_of': 5, 'temperature': (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+                 'condition_on_previous_text': True},
+}
+DEFAULT_PROFILE = 'balanced'
+
+
+def decoding_profile(name: Optional[str] = None) -> str:
+    """确定解码配置：显式指定 > WHISPER_PROFILE 环境变量 > balanced"""
+    name = (name or os.getenv('WHISPER_PROFILE') or DEFAULT_PROFILE).strip().lower()
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"未知的解码配置: {name}（可选：{', '.join(DECODING_PROFILES)}）")
+    return name
+
+
+def decoding_options(name: Optional[str] = None) -> Dict:
+    """解码配置对应的 transcribe 参数"""
+    return dict(DECODING_PROFILES[decoding_profile(name)])
+
+
+def _load_model(engine: str, model_size: str, device: str, threads: Optional[int] = None):
+    """加载指定引擎的模型
+
+    faster-whisper 的计算精度由 FASTER_WHISPER_COMPUTE_TYPE 决定，默认 CPU 上 int8、GPU 上 float16。
+    """
+    if engine == FASTER_WHISPER:
+        from faster_whisper import WhisperModel
+
+        default_type = 'int8' if device == 'cpu' else 'float16'
+        compute_type = os.getenv('FASTER_WHISPER_COMPUTE_TYPE', default_type)
+        return WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=threads or 0)
+
+    import whisper
+
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    return whisper.load_model(model_size, device=device)
+
+
+def _transcribe_with(engine: str, model, audio, options: Dict) -> List[Tuple[float, float, str]]:
+    """用已加载的模型转录，两种引擎都返回 (开始秒, 结束秒, 文本) 列表"""
+    if engine == OPENAI_WHISPER and options.get('beam_size') == 1:
+        # openai-whisper 用 beam_size=None 表示贪心解码
+        options = dict(options, beam_size=None)
+    if engine == FASTER_WHISPER:
+        # faster-whisper 返回惰性的生成器，遍历时才真正解码
+        segments, _ = model.transcribe(audio, **options)
+        return [(segment.start, segment.end, segment.text) for segment in segments]
+    result = model.transcribe(audio, **options)
+    return [(item['start'], item['end'], item['text']) for item in result['segments']]
+
+
+# 进程池中每个工作进程各自加载的模型
+_worker_engine = OPENAI_WHISPER
+_worker_model = None
+
+
+def _init_segment_worker(engine: str, model_size: str, threads: int) -> None:
+    """工作进程初始化：限制推理线程数并加载模型（进程池存活期间只加载一次）"""
+    global _worker_engine, _worker_model
+    _worker_engine = engine
+    _worker_model = _load_model(engine, model_size, 'cpu', threads)
+
+
+def _transcribe_segment(segment, options: Dict) -> List[Tuple[float, float, str]]:
+    """在工作进程中转录一个分段，返回相对于分段起点的带时间戳句子
+
+    转录参数随任务传入（不同任务可以使用不同的解码配置）。分段指向 PCM 缓存（.npy）时，
+    各进程映射同一个文件并截取自己的范围，不需要重新解码。
+    """
+    audio = segment.path
+    if audio.endswith('.npy'):
+        from pcm_cache import load_pcm, pcm_view
+        audio = pcm_view(load_pcm(audio), segment.file_start, segment.file_end)
+    if _worker_engine == OPENAI_WHISPER:
+        options = dict(options, fp16=False)
+    return _transcribe_with(_worker_engine, _worker_model, audio, options)
+
+
+class _LoadedModel:
+    """已加载的模型及其使用状态"""
+
+    def __init__(self, model):
+        self.model = model
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class WhisperModelManager:
+    """进程内共享的 Whisper 模型管理器
+
+    - 每种推理引擎（openai-whisper / faster-whisper）各有一个管理器
+    - 首次使用时才按配置（WHISPER_MODEL 或 FASTER_WHISPER_MODEL / WHISPER_DEVICE）加载模型
+    - 已加载的模型按 (size, device) 缓存，多个生成器实例共用
+    - 加载后用一段静音做一次预热，避免第一个请求承担初始化开销
+    - 空闲超过 WHISPER_IDLE_UNLOAD_SECONDS 秒的模型会被后台线程卸载
+    - 分段并行转录的进程池同样由管理器持有、多个任务共用，空闲超时后一并关闭
+    """
+
+    def __init__(self,
+                 model_size: Optional[str] = None,
+                 device: Optional[str] = None,
+                 language: Optional[str] = None,
+                 idle_timeout: Optional[float] = None,
+                 warmup: Optional[bool] = None,
+                 engine: str = OPENAI_WHISPER):
+        if engine not in ENGINES:
+            raise ValueError(f"未知的 Whisper 推理引擎: {engine}")
+        self.engine = engine
+        model_env = 'FASTER_WHISPER_MODEL' if engine == FASTER_WHISPER else 'WHISPER_MODEL'
+        self.model_size = model_size or os.getenv(model_env, 'medium')
+        self.device = device or os.getenv('WHISPER_DEVICE') or None
+        self.language = language or os.getenv('WHISPER_LANGUAGE', 'zh')
+        if idle_timeout is None:
+            idle_timeout = float(os.getenv('WHISPER_IDLE_UNLOAD_SECONDS', '600'))
+        self.idle_timeout = idle_timeout
+        self.warmup = env_flag('WHISPER_WARMUP', True) if warmup is None else warmup
+
+        self._lock = threading.RLock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._models: Dict[Tuple[str, str], _LoadedModel] = {}
+        self._reaper: Optional[threading.Thread] = None
+        # 分段并行转录的进程池及其进程数、使用状态
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        self._pool_in_use = 0
+        self._pool_last_used = 0.0
+
+    def resolve_device(self, device: Optional[str] = None) -> str:
+        """确定运行设备，未配置时有 GPU 用 cuda，否则用 cpu"""
+        device = device or self.device
+        if device:
+            return device
+        try:
+            import torch
+            return 'cuda' if torch.cuda.is_available() else 'cpu'
+        except Exception:
+            return 'cpu'
+
+    @contextmanager
+    def acquire(self, model_size: Optional[str] = None, device: Optional[str] = None) -> Iterator[object]:
+        """获取模型用于一次转录，使用期间不会被空闲卸载"""
+        key = (model_size or self.model_size, self.resolve_device(device))
+        entry = self._get_or_load(key)
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def _get_or_load(self, key: Tuple[str, str]) -> _LoadedModel:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry.in_use += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # 同一个模型只加载一次，其他线程等待加载完成
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    entry.in_use += 1
+                    return entry
+
+            model = self._load(*key)
+            with self._lock:
+                entry = _LoadedModel(model)
+                entry.in_use += 1
+                self._models[key] = entry
+                self._start_reaper()
+            return entry
+
+    def _load(self, model_size: str, device: str):
+        """加载并预热模型"""
+        print(f"正在加载Whisper模型（{self.engine}, {model_size}, {device}）...")
+        start = time.time()
+        model = _load_model(self.engine, model_size, device)
+        print(f"✅ Whisper模型加载成功，耗时 {time.time() - start:.1f} 秒")
+
+        if self.warmup:
+            try:
+                import numpy as np
+                silence = np.zeros(SAMPLE_RATE * WARMUP_SECONDS, dtype=np.float32)
+                _transcribe_with(self.engine, model, silence, self._engine_options({'language': self.language}, device))
+                print("✅ Whisper模型预热完成")
+            except Exception as e:
+                print(f"⚠️ Whisper模型预热失败: {str(e)}")
+        return model
+
+    def _engine_options(self, options: Dict, device: str) -> Dict:
+        """补充引擎特有的参数：openai-whisper 在 CPU 上关闭 fp16（否则每次都会告警并回退）"""
+        if self.engine == OPENAI_WHISPER:
+            return dict(options, fp16=(device != 'cpu'))
+        return options
+
+    def transcribe(self, audio, options: Dict) -> List[Tuple[float, float, str]]:
+        """用共享模型转录整段音频（文件路径或 16kHz float32 采样）"""
+        device = self.resolve_device()
+        with self.acquire() as model:
+            return _transcribe_with(self.engine, model, audio, self._engine_options(options, device))
+
+    def segment_workers(self) -> int:
+        """分段并行转录使用的进程数，默认 WHISPER_SEGMENT_WORKERS 或 CPU 核数的四分之一"""
+        default = max(1, (os.cpu_count() or 1) // 4)
+        return max(1, int(os.getenv('WHISPER_SEGMENT_WORKERS', str(default))))
+
+    def transcribe_parallel(self, segments: Sequence, options: Dict,
+                            workers: Optional[int] = None) -> List[Tuple[float, float, str]]:
+        """用进程池并发转录多个分段（仅用于 CPU），按顺序合并并去掉边界处的重复
+
+        每个工作进程加载一份模型，CPU 核数平均分给各进程，因此总耗时随进程数近似线性下降。
+        进程池在多次调用之间保留（模型只在启动工作进程时加载一次），空闲超过 idle_timeout 后由后台线程关闭。
+
+        Args:
+            segments: audio_segments.split_at_silence 切分出的分段
+            options: 传给 transcribe 的参数（language、initial_prompt 等）
+            workers: 进程数，默认 segment_workers()
+        """
+        from audio_segments import transcribe_segments
+
+        workers = workers or self.segment_workers()
+        print(f"正在用 {workers} 个进程并行转录 {len(segments)} 个分段...")
+        start = time.time()
+        pool = self._acquire_pool(workers)
+        try:
+            sentences = transcribe_segments(segments, partial(_transcribe_segment, options=options), pool)
+        except BrokenProcessPool:
+            # 工作进程异常退出（例如内存不足被杀），丢弃进程池，下次重新创建
+            self._shutdown_pool(pool)
+            raise
+        finally:
+            with self._lock:
+                self._pool_in_use -= 1
+                self._pool_last_used = time.monotonic()
+        print(f"✅ 分段转录完成，耗时 {time.time() - start:.1f} 秒")
+        return sentences
+
+    def _acquire_pool(self, workers: int) -> ProcessPoolExecutor:
+        """获取共享的进程池；进程数变化且旧进程池空闲时重新创建，否则继续使用旧进程池"""
+        stale = None
+        with self._lock:
+            if self._pool is not None and self._pool_workers != workers and not self._pool_in_use:
+                stale, self._pool = self._pool, None
+            if self._pool is None:
+                threads = max(1, (os.cpu_count() or 1) // workers)
+                # spawn 避免 fork 时复制已加载的模型和线程状态
+                self._pool = ProcessPoolExecutor(max_workers=workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_segment_worker,
+                                                 initargs=(self.engine, self.model_size, threads))
+                self._pool_workers = workers
+                self._start_reaper()
+            self._pool_in_use += 1
+            pool = self._pool
+        if stale is not None:
+            stale.shutdown(wait=False)
+        return pool
+
+    def _shutdown_pool(self, pool: Optional[ProcessPoolExecutor] = None) -> None:
+        """关闭进程池（pool 为 None 时关闭当前进程池），工作进程中的模型随之释放"""
+        with self._lock:
+            if pool is None or pool is self._pool:
+                pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            print(f"♻️ 已关闭分段转录进程池（{self.engine}）")
+
+    def unload(self, model_size: Optional[str] = None, device: Optional[str] = None) -> bool:
+        """卸载指定模型，正在使用中的模型不会被卸载"""
+        key = (model_size or self.model_size, self.resolve_device(device))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None or entry.in_use:
+                return False
+            del self._models[key]
+        self._release_memory(key)
+        return True
+
+    def unload_idle(self) -> int:
+        """卸载所有空闲超时的模型，返回卸载的数量"""
+        if self.idle_timeout <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            idle_keys = [
+                key for key, entry in self._models.items()
+                if not entry.in_use and now - entry.last_used >= self.idle_timeout
+            ]
+            for key in idle_keys:
+                del self._models[key]
+            idle_pool = (self._pool is not None and not self._pool_in_use
+                         and now - self._pool_last_used >= self.idle_timeout)
+        for key in idle_keys:
+            self._release_memory(key)
+        if idle_pool:
+            self._shutdown_pool()
+        return len(idle_keys)
+
+    def loaded_models(self) -> Dict[Tuple[str, str], float]:
+        """返回已加载模型及其空闲时长（秒）"""
+        now = time.monotonic()
+        with self._lock:
+            return {key: now - entry.last_used for key, entry in self._models.items()}
+
+    def _release_memory(self, key: Tuple[str, str]) -> None:
+        gc.collect()
+        if key[1].startswith('cuda'):
+            try:
+                import torch
+                torch.cuda.empty_cache()
+            except Exception:
+                pass
+        print(f"♻️ 已卸载空闲的Whisper模型（{key[0]}, {key[1]}）")
+
+    def _start_reaper(self) -> None:
+        """启动后台线程定期卸载空闲模型"""
+        if self.idle_timeout <= 0 or (self._reaper and self._reaper.is_alive()):
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name='whisper-idle-unload', daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(1.0, min(self.idle_timeout / 4, 60.0))
+        while True:
+            time.sleep(interval)
+            self.unload_idle()
+            with self._lock:
+                if not self._models and self._pool is None:
+                    self._reaper = None
+                    return
+
+
+_managers: Dict[str, WhisperModelManager] = {}
+_manager_lock = threading.Lock()
+
+
+def get_whisper_manager(engine: str = OPENAI_WHISPER) -> WhisperModelManager:
+    """获取进程内共享的 Whisper 模型管理器（每种推理引擎一个）"""
+    manager = _managers.get(engine)
+    if manager is None:
+        with _manager_lock:
+            manager = _managers.get(engine)
+            if manager is None:
+                manager = _managers[engine] = WhisperModelManager(engine=engine)
+    return manager
@@ -0,0 +1,52 @@
+import datetime
+import os
+import shutil
+import uuid
+from typing import Optional
+
+
+def new_job_id() -> str:
+    """生成任务ID：秒级时间戳 + 随机后缀，保证并发任务不会重名且按时间排序"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{uuid.uuid4().hex[:8]}"
+
+
+class JobWorkspace:
+    """单个任务的独立工作区
+
+    每个任务有自己的临时目录（output_dir/jobs/<job_id>），产物文件名都以 job_id
+    开头，因此同一进程内并发运行的多个任务不会读到、删掉或覆盖彼此的文件。
+
+    用法：
+        with JobWorkspace(output_dir) as workspace:
+            audio_path = download(url, workspace.temp_dir)
+            note_path = workspace.artifact_path('original')
+    """
+
+    def __init__(self, output_dir: str, job_id: Optional[str] = None, keep: bool = False):
+        self.output_dir = output_dir
+        self.job_id = job_id or new_job_id()
+        self.root = os.path.join(output_dir, 'jobs', self.job_id)
+        self.temp_dir = os.path.join(self.root, 'temp')
+        # 为 True 时保留临时文件，便于排查问题
+        self.keep = keep
+
+    def __enter__(self) -> 'JobWorkspace':
+        os.makedirs(self.temp_dir, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.cleanup()
+
+    def path(self, *parts: str) -> str:
+        """工作区内的文件路径"""
+        return os.path.join(self.root, *parts)
+
+    def artifact_path(self, name: str, ext: str = '.md') -> str:
+        """产物文件路径：output_dir/<job_id>_<name><ext>"""
+        return os.path.join(self.output_dir, f"{self.job_id}_{name}{ext}")
+
+    def cleanup(self) -> None:
+        """删除工作区（只删除本任务的目录）"""
+        if not self.keep and os.path.exists(self.root):
+            shutil.rmtree(self.root, ignore_errors=True)